@@ -0,0 +1,142 @@
+# Danzar/async_adapters.py
+"""
+Async adapters for the blocking calls made by teach/research sessions.
+
+LM Studio's `respond`, DuckDuckGo search and SentenceTransformer.encode
+are all synchronous; awaiting them through `run_blocking` moves them onto
+a worker pool so the Discord event loop keeps serving other channels.
+Sessions started with `start_session` can be cancelled by key, and
+`LoopLagMonitor` measures how late the loop wakes up while they run.
+"""
+import time
+import asyncio
+import logging
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+IO_WORKERS    = 4
+LAG_INTERVAL  = 0.1    # seconds between loop-lag probes
+LAG_WINDOW    = 600    # probes kept for percentiles (~1 minute)
+# ────────────────────────────────────────────────────────────────────────────────
+
+EXECUTOR = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="danzar-io")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run `fn(*args, **kwargs)` on the worker pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+
+def _respond(messages: list[dict], model: str) -> str:
+    import lmstudio as lms
+
+    chat = lms.Chat.from_history({"messages": messages})
+    return lms.llm(model).respond(chat).content.strip()
+
+async def llm_respond(messages: list[dict], model: str | None = None, task: str = "chat") -> str:
+    """Reply from `model`, or from whichever model the router picks for `task`."""
+    if model:
+        return await run_blocking(_respond, messages, model)
+    from model_router import get_router
+
+    return await run_blocking(get_router().respond, messages, task)
+
+async def web_search(query: str) -> str:
+    from web_search import search_web
+
+    with span("web_search"):
+        return await run_blocking(search_web, query)
+
+async def web_search_many(queries: list[str]) -> list[str]:
+    from web_search import search_web_many
+
+    return await run_blocking(search_web_many, queries)
+
+def _encode(embedder, texts):
+    emb = embedder.encode(texts, convert_to_numpy=True)
+    return emb.reshape(1, -1) if emb.ndim == 1 else emb
+
+async def encode(embedder, texts):
+    """2-D float array for a string or a list of strings."""
+    return await run_blocking(_encode, embedder, texts)
+
+
+# ─── Session registry ──────────────────────────────────────────────────────────
+# Cancelling a session stops it at its next await; a blocking call already
+# running on the pool finishes in the background and its result is dropped.
+_sessions: dict = {}
+
+def start_session(key, coro) -> asyncio.Task:
+    """Run `coro` as the session for `key` (e.g. a channel id)."""
+    if key in _sessions and not _sessions[key].done():
+        coro.close()
+        raise RuntimeError("a session is already running here")
+    task = asyncio.get_running_loop().create_task(coro)
+    _sessions[key] = task
+
+    def _done(t):
+        if _sessions.get(key) is t:
+            del _sessions[key]
+        if not t.cancelled() and t.exception():
+            logger.error(f"session {key} crashed", exc_info=t.exception())
+    task.add_done_callback(_done)
+    return task
+
+def cancel_session(key) -> bool:
+    task = _sessions.get(key)
+    if task and not task.done():
+        task.cancel()
+        return True
+    return False
+
+def running_sessions() -> list:
+    return [k for k, t in _sessions.items() if not t.done()]
+
+
+# ─── Loop lag ──────────────────────────────────────────────────────────────────
+class LoopLagMonitor:
+    """Sleeps `interval` in a loop and records how late each wake-up was."""
+
+    def __init__(self, interval: float = LAG_INTERVAL, window: int = LAG_WINDOW):
+        self.interval = interval
+        self.samples  = deque(maxlen=window)
+        self.max_lag  = 0.0
+        self._task    = None
+
+    async def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - t0 - self.interval
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def snapshot(self) -> dict:
+        """Lag stats in milliseconds over the recent window."""
+        s = sorted(self.samples)
+        if not s:
+            return {"samples": 0}
+        pick = lambda q: s[min(len(s) - 1, int(q * len(s)))] * 1000
+        return {
+            "samples": len(s),
+            "mean_ms": sum(s) / len(s) * 1000,
+            "p50_ms": pick(0.50),
+            "p95_ms": pick(0.95),
+            "p99_ms": pick(0.99),
+            "max_ms": self.max_lag * 1000,
+        }
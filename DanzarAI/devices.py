@@ -0,0 +1,93 @@
+# Danzar/devices.py
+"""
+Device selection and CPU inference modes for the research models.
+
+DANZAR_DEVICE    auto (default) | cuda | cpu
+DANZAR_CPU_MODE  int8 (default) | fp32 | onnx   — only used when on CPU
+
+int8 applies PyTorch dynamic quantization to every nn.Linear (weights
+stored as int8, activations quantized on the fly). onnx exports through
+optimum/onnxruntime and falls back to int8 if those aren't installed.
+"""
+import os
+import logging
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+DEVICE_PREF = os.getenv("DANZAR_DEVICE", "auto").lower()
+CPU_MODE    = os.getenv("DANZAR_CPU_MODE", "int8").lower()
+
+def pick_device(pref: str = DEVICE_PREF) -> str:
+    """'cuda:0' when a GPU is usable and not disabled, else 'cpu'."""
+    if pref == "cpu":
+        return "cpu"
+    if torch.cuda.is_available():
+        return "cuda:0"
+    if pref == "cuda":
+        logger.warning("DANZAR_DEVICE=cuda but no CUDA device is available; using CPU")
+    return "cpu"
+
+def quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _cpu_mode(mode: str | None) -> str:
+    mode = (mode or CPU_MODE).lower()
+    if mode == "onnx":
+        try:
+            import optimum.onnxruntime  # noqa: F401
+        except ImportError:
+            logger.warning("optimum[onnxruntime] not installed; falling back to int8")
+            return "int8"
+    return mode
+
+def variant_tag(device: str | None = None, cpu_mode: str | None = None) -> str:
+    """Short label for what load_* will produce, e.g. 'cuda:0' or 'cpu-int8'."""
+    device = device or pick_device()
+    return device if device != "cpu" else f"cpu-{_cpu_mode(cpu_mode)}"
+
+def load_pipeline(task: str, model_name: str, device: str | None = None,
+                  cpu_mode: str | None = None, **kwargs):
+    """transformers.pipeline on the picked device, quantized/exported on CPU."""
+    from transformers import pipeline
+
+    device = device or pick_device()
+    if device != "cpu":
+        return pipeline(task, model=model_name, device=0 if device == "cuda:0" else device, **kwargs)
+
+    mode = _cpu_mode(cpu_mode)
+    if mode == "onnx":
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        from transformers import AutoTokenizer
+
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+        tok   = AutoTokenizer.from_pretrained(model_name)
+        logger.info(f"{model_name}: CPU / ONNX Runtime")
+        return pipeline(task, model=model, tokenizer=tok, **kwargs)
+
+    pipe = pipeline(task, model=model_name, device=-1, **kwargs)
+    if mode == "int8":
+        pipe.model = quantize_int8(pipe.model)
+    logger.info(f"{model_name}: CPU / {mode}")
+    return pipe
+
+def load_sentence_transformer(model_name: str, device: str | None = None,
+                              cpu_mode: str | None = None):
+    """SentenceTransformer on the picked device, quantized/exported on CPU."""
+    from sentence_transformers import SentenceTransformer
+
+    device = device or pick_device()
+    if device != "cpu":
+        return SentenceTransformer(model_name, device=device)
+
+    mode = _cpu_mode(cpu_mode)
+    if mode == "onnx":
+        logger.info(f"{model_name}: CPU / ONNX Runtime")
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+
+    model = SentenceTransformer(model_name, device="cpu")
+    if mode == "int8":
+        model[0].auto_model = quantize_int8(model[0].auto_model)
+    logger.info(f"{model_name}: CPU / {mode}")
+    return model
@@ -0,0 +1,106 @@
+# Danzar/embed_cache.py
+"""
+On-disk embedding cache shared across research calls (and runs).
+
+Vectors are keyed by sha1(model name + chunk text) in a SQLite file, so
+overlapping pages fetched by successive `self_teach` iterations are only
+embedded once. The cache is bounded by entry count; the least recently
+used rows are evicted first.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH  = os.path.join(BASE_DIR, "embed_cache.sqlite3")
+MAX_ENTRIES = 200_000   # ~300 MB of 384-d float32 vectors
+EVICT_SLACK = 0.1       # evict down to 90% of MAX_ENTRIES so we don't evict every insert
+
+
+class EmbeddingCache:
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path        = path
+        self.max_entries = max_entries
+        self.hits        = 0
+        self.misses      = 0
+        self._lock       = threading.Lock()
+        self._db         = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS emb ("
+            " key TEXT PRIMARY KEY, vec BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS emb_lru ON emb(last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def encode(self, texts: list[str], model_name: str, encode_fn) -> np.ndarray:
+        """
+        Embeddings for `texts` (float32, one row each). Cached rows are read
+        back; the rest go through `encode_fn(list[str]) -> array` in one call
+        and are stored.
+        """
+        keys = [self.key(model_name, t) for t in texts]
+        found = {}
+        now = time.time()
+        with self._lock:
+            uniq = list(dict.fromkeys(keys))
+            for i in range(0, len(uniq), 500):  # stay under SQLite's variable limit
+                batch = uniq[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vec FROM emb WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update((k, np.frombuffer(v, dtype="float32")) for k, v in rows)
+            if found:
+                self._db.executemany("UPDATE emb SET last_used=? WHERE key=?",
+                                     [(now, k) for k in found])
+
+        miss_idx = [i for i, k in enumerate(keys) if k not in found]
+        self.hits   += len(keys) - len(miss_idx)
+        self.misses += len(miss_idx)
+
+        if miss_idx:
+            # embed each distinct missing text once
+            todo = list(dict.fromkeys(keys[i] for i in miss_idx))
+            text_for = {keys[i]: texts[i] for i in miss_idx}
+            new = np.asarray(encode_fn([text_for[k] for k in todo]), dtype="float32")
+            found.update(zip(todo, new))
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO emb(key, vec, last_used) VALUES (?, ?, ?)",
+                    [(k, v.tobytes(), now) for k, v in zip(todo, new)],
+                )
+                self._evict()
+
+        with self._lock:
+            self._db.commit()
+        return np.vstack([found[k] for k in keys]) if keys else np.zeros((0, 0), dtype="float32")
+
+    def _evict(self):
+        (count,) = self._db.execute("SELECT COUNT(*) FROM emb").fetchone()
+        if count <= self.max_entries:
+            return
+        drop = count - int(self.max_entries * (1 - EVICT_SLACK))
+        self._db.execute(
+            "DELETE FROM emb WHERE key IN (SELECT key FROM emb ORDER BY last_used LIMIT ?)", (drop,)
+        )
+
+    # ─── Stats ─────────────────────────────────────────────────────────────────
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset_stats(self):
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM emb").fetchone()[0]
@@ -0,0 +1,186 @@
+# Danzar/frontier.py
+"""
+Breadth-first exploration frontier for self-teaching research.
+
+Every subtopic the LLM proposes goes onto a frontier instead of only the
+first one. A small worker pool researches several topics at once, so one
+topic's network waits overlap another's model time. The whole run is
+bounded by a wall-clock budget and a maximum number of researched topics.
+A proposed topic whose embedding is too close to one already visited or
+queued is skipped. Each finding is appended to a JSONL store, so knowledge
+outlives the process.
+"""
+import os
+import json
+import time
+import heapq
+import logging
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR      = os.path.dirname(os.path.abspath(__file__))
+FINDINGS_PATH = os.path.join(BASE_DIR, "findings.jsonl")
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+WORKERS       = 3      # topics researched at once
+TIME_BUDGET   = 600    # seconds for the whole run; no new topics start after it
+MAX_TOPICS    = 9      # research calls per run (the compute budget)
+MAX_DEPTH     = 3      # root is depth 0
+SIM_THRESHOLD = 0.85   # cosine ≥ this to a seen topic ⇒ skip as duplicate
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+class FindingsStore:
+    """Append-only JSONL of {topic, parent, depth, summary, subtopics, ts}."""
+
+    def __init__(self, path: str = FINDINGS_PATH):
+        self.path  = path
+        self._lock = threading.Lock()
+
+    def append(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def load(self) -> list[dict]:
+        if not os.path.exists(self.path):
+            return []
+        out = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    continue  # tolerate a torn last line after a crash
+        return out
+
+
+@dataclass(order=True)
+class _Node:
+    depth: int
+    seq: int
+    topic: str = field(compare=False)
+    parent: str | None = field(compare=False, default=None)
+
+
+class Frontier:
+    """
+    research_fn(topic) -> summary
+    expand_fn(topic, summary) -> list of subtopic strings
+    embed_fn(list[str]) -> unit-normalized array[n, dim]
+    """
+
+    def __init__(self, research_fn, expand_fn, embed_fn, store: FindingsStore | None = None,
+                 workers: int = WORKERS, time_budget: float = TIME_BUDGET,
+                 max_topics: int = MAX_TOPICS, max_depth: int = MAX_DEPTH,
+                 sim_threshold: float = SIM_THRESHOLD, use_history: bool = True):
+        self.research_fn   = research_fn
+        self.expand_fn     = expand_fn
+        self.embed_fn      = embed_fn
+        self.store         = store or FindingsStore()
+        self.workers       = workers
+        self.time_budget   = time_budget
+        self.max_topics    = max_topics
+        self.max_depth     = max_depth
+        self.sim_threshold = sim_threshold
+        self.use_history   = use_history
+
+        self._heap    = []
+        self._seq     = 0
+        self._seen    = np.zeros((0, 0), dtype="float32")
+        self.skipped  = []   # (topic, most similar seen topic, similarity)
+        self._labels  = []
+
+    # ─── dedupe ────────────────────────────────────────────────────────────────
+    def _admit(self, topics: list[str]) -> list[str]:
+        """Embed candidates once; keep those not too similar to anything seen."""
+        topics = [t.strip() for t in topics if t and t.strip()]
+        if not topics:
+            return []
+        vecs = np.asarray(self.embed_fn(topics), dtype="float32")
+        kept = []
+        for t, v in zip(topics, vecs):
+            if len(self._seen):
+                sims = self._seen @ v
+                j = int(np.argmax(sims))
+                if sims[j] >= self.sim_threshold:
+                    self.skipped.append((t, self._labels[j], float(sims[j])))
+                    continue
+            self._seen = v[None, :] if not len(self._seen) else np.vstack([self._seen, v])
+            self._labels.append(t)
+            kept.append(t)
+        return kept
+
+    def _push(self, topic: str, depth: int, parent: str | None):
+        self._seq += 1
+        heapq.heappush(self._heap, _Node(depth, self._seq, topic, parent))
+
+    # ─── worker ────────────────────────────────────────────────────────────────
+    def _explore(self, node: _Node) -> dict:
+        t0 = time.perf_counter()
+        summary = self.research_fn(node.topic)
+        subs = self.expand_fn(node.topic, summary) if node.depth < self.max_depth else []
+        return {
+            "topic": node.topic,
+            "parent": node.parent,
+            "depth": node.depth,
+            "summary": summary,
+            "subtopics": subs,
+            "seconds": round(time.perf_counter() - t0, 2),
+            "ts": time.time(),
+        }
+
+    # ─── scheduler ─────────────────────────────────────────────────────────────
+    def run(self, root: str, on_finding=None) -> list[dict]:
+        """Explore from `root` until the frontier empties or a budget runs out."""
+        if self.use_history:
+            history = [r["topic"] for r in self.store.load() if r.get("topic")]
+            if history:
+                self._admit(history)
+        # the root is always researched, even if it was seen in an earlier run
+        root_vec = np.asarray(self.embed_fn([root]), dtype="float32")
+        self._seen = root_vec if not len(self._seen) else np.vstack([self._seen, root_vec])
+        self._labels.append(root)
+        self._push(root, 0, None)
+
+        deadline = time.monotonic() + self.time_budget
+        started, findings, running = 0, [], {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while self._heap or running:
+                while (self._heap and len(running) < self.workers
+                       and started < self.max_topics and time.monotonic() < deadline):
+                    node = heapq.heappop(self._heap)
+                    running[pool.submit(self._explore, node)] = node
+                    started += 1
+                if not running:
+                    break  # budget exhausted with work left on the frontier
+
+                # wake at the deadline to stop scheduling; after it, just drain
+                left = deadline - time.monotonic()
+                done, _ = wait(running, timeout=left if left > 0 else None,
+                               return_when=FIRST_COMPLETED)
+                for fut in done:
+                    node = running.pop(fut)
+                    try:
+                        rec = fut.result()
+                    except Exception as e:
+                        logger.exception(f"research of {node.topic!r} failed")
+                        print(f"⚠️ “{node.topic}” failed: {e}")
+                        continue
+                    self.store.append(rec)
+                    findings.append(rec)
+                    for sub in self._admit(rec["subtopics"]):
+                        self._push(sub, node.depth + 1, node.topic)
+                    if on_finding:
+                        on_finding(rec)
+
+        if self._heap:
+            print(f"⏹️ Budget reached with {len(self._heap)} topics left on the frontier.")
+        if self.skipped:
+            print(f"♻️ Skipped {len(self.skipped)} near-duplicate topics.")
+        return findings
@@ -0,0 +1,201 @@
+# Danzar/html_extract.py
+"""
+Streaming HTML → text extraction shared by utils/fetch.py and
+research_tool_free.py.
+
+No DOM is built: the page is fed to an event parser (lxml's C parser when
+available, else the stdlib one) starting at the content root, text is
+emitted as it streams past, boilerplate subtrees are skipped, and feeding
+stops as soon as the root element closes. `extract_many` spreads a batch
+of pages over a process pool.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:  # stdlib fallback
+    etree = None
+
+# Subtrees whose text is never content.
+SKIP_TAGS = frozenset({
+    "head", "script", "style", "nav", "footer", "aside", "noscript", "header",
+    "form", "iframe", "svg", "template", "button", "select",
+})
+# Tags that end a line of text.
+BLOCK_TAGS = frozenset({
+    "p", "div", "br", "li", "ul", "ol", "dl", "dt", "dd", "tr", "table",
+    "section", "article", "main", "blockquote", "pre", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "td", "th", "caption", "figcaption",
+})
+FEED_SIZE = 64 * 1024
+_WS = re.compile(r"[ \t\r\f\v\xa0]+")
+
+
+class _TextTarget:
+    """Parser target (lxml target interface: start/end/data/close)."""
+
+    def __init__(self, root_tag=None, root_class=None):
+        self.root_tag   = root_tag
+        self.root_class = root_class
+        self.in_root    = root_tag is None
+        self.root_depth = 0     # open root_tag elements inside the root
+        self.skip_tag   = None
+        self.skip_depth = 0
+        self.done       = False
+        self.lines      = []
+        self._buf       = []
+
+    def _flush(self):
+        if self._buf:
+            line = _WS.sub(" ", "".join(self._buf)).strip()
+            if line:
+                self.lines.append(line)
+            self._buf = []
+
+    def start(self, tag, attrib):
+        if self.done:
+            return
+        tag = tag.lower()
+        if not self.in_root:
+            if tag == self.root_tag and (
+                self.root_class is None
+                or self.root_class in (attrib.get("class") or "").split()
+            ):
+                self.in_root, self.root_depth = True, 1
+            return
+        if self.root_tag and tag == self.root_tag:
+            self.root_depth += 1
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        if tag in SKIP_TAGS:
+            self.skip_tag, self.skip_depth = tag, 1
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+
+    def end(self, tag):
+        if self.done or not self.in_root:
+            return
+        tag = tag.lower()
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth == 0:
+                    self.skip_tag = None
+        elif tag in BLOCK_TAGS:
+            self._flush()
+        if self.root_tag and tag == self.root_tag:
+            self.root_depth -= 1
+            if self.root_depth == 0:
+                self._flush()
+                self.done = True
+
+    def data(self, text):
+        if self.in_root and not self.skip_tag and not self.done:
+            self._buf.append(text)
+
+    def close(self):
+        self._flush()
+        return self.lines
+
+
+class _StdlibParser(HTMLParser):
+    """Adapts html.parser callbacks onto a _TextTarget."""
+
+    VOID = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input",
+                      "link", "meta", "source", "track", "wbr"})
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {k: v or "" for k, v in attrs})
+        if tag in self.VOID:
+            self.target.end(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, {k: v or "" for k, v in attrs})
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self.VOID:
+            self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def _run(html: str, root_tag, root_class) -> list[str]:
+    target = _TextTarget(root_tag, root_class)
+    if etree is not None:
+        parser = etree.HTMLParser(target=target, recover=True, no_network=True)
+    else:
+        parser = _StdlibParser(target)
+    for i in range(0, len(html), FEED_SIZE):
+        parser.feed(html[i:i + FEED_SIZE])
+        if target.done:
+            break
+    if etree is not None:
+        try:
+            parser.close()
+        except etree.XMLSyntaxError:
+            pass
+    else:
+        parser.close()
+    return target.close()
+
+
+def _root_offset(html: str, root_tag: str, root_class: str | None) -> int:
+    """Cheap textual pre-scan: index of the tag that opens the content root, or -1."""
+    if root_class is None:
+        return -1
+    pos = html.find(root_class)
+    while pos != -1:
+        start = html.rfind("<", 0, pos)
+        if start != -1 and html[start + 1:start + 1 + len(root_tag)].lower() == root_tag:
+            return start
+        pos = html.find(root_class, pos + 1)
+    return -1
+
+
+def extract_text(html: str, root_tag: str | None = None, root_class: str | None = None,
+                 paragraph_sep: str = "\n") -> str:
+    """
+    Visible text of `html`, one line per block element, boilerplate removed.
+
+    With `root_tag`/`root_class` (e.g. "div", "mw-parser-output") only that
+    subtree is parsed; if the page has no such element the whole document
+    is used instead.
+    """
+    if not html:
+        return ""
+    if root_tag:
+        if root_class is None:
+            lines = _run(html, root_tag, None)
+        else:
+            off = _root_offset(html, root_tag, root_class)
+            lines = _run(html[off:], root_tag, root_class) if off != -1 else []
+        if lines:
+            return paragraph_sep.join(lines)
+    return paragraph_sep.join(_run(html, None, None))
+
+
+def _extract_args(args):
+    return extract_text(*args)
+
+
+def extract_many(pages: list[str], root_tag: str | None = None, root_class: str | None = None,
+                 paragraph_sep: str = "\n", workers: int | None = None) -> list[str]:
+    """`extract_text` over a batch, fanned out across CPU cores for big batches."""
+    workers = workers or os.cpu_count() or 1
+    args = [(p, root_tag, root_class, paragraph_sep) for p in pages]
+    if workers <= 1 or len(pages) < 2 * workers:
+        return [_extract_args(a) for a in args]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_extract_args, args, chunksize=max(1, len(args) // (workers * 4))))
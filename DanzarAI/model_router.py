@@ -0,0 +1,158 @@
+# Danzar/model_router.py
+"""
+Routes each LLM call to a small or a large local model.
+
+Formulaic work (summaries, follow-up questions, private thoughts, rolling
+conversation summaries) and very short chat turns go to SMALL_MODEL as long
+as the prompt stays under SMALL_MAX_PROMPT_TOKENS; open-ended answers and
+anything large stay on LARGE_MODEL. If the small model fails the call is
+retried on the large one, and if it can't be loaded during warm-up the
+small route is switched off. Latency is recorded per route.
+
+Models are plain callables `(messages) -> str`, so fakes can stand in for
+LM Studio: `ModelRouter({"small": fake_small, "large": fake_large})`.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+from tracing import observe
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+LARGE_MODEL = os.getenv("DANZAR_LARGE_MODEL", "gemma-3-12b-it")
+SMALL_MODEL = os.getenv("DANZAR_SMALL_MODEL", "")   # e.g. "gemma-3-1b-it"; "" = always large
+SMALL_TASKS = {"summary", "follow_up", "thought", "conversation_summary"}
+SMALL_MAX_PROMPT_TOKENS = 1024   # bigger prompts go to the large model whatever the task
+SHORT_CHAT_TOKENS       = 8      # chat turns this short (quick clarifications) can go small
+CHARS_PER_TOKEN         = 4
+METRICS_WINDOW          = 500
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+def prompt_tokens(messages: list[dict]) -> int:
+    return sum(len(m["content"]) for m in messages) // CHARS_PER_TOKEN
+
+
+def lmstudio_model(name: str):
+    """Callable that sends a chat to LM Studio model `name`."""
+    def respond(messages: list[dict]) -> str:
+        import lmstudio as lms
+
+        chat = lms.Chat.from_history({"messages": messages})
+        return lms.llm(name).respond(chat).content.strip()
+
+    def load():
+        import lmstudio as lms
+
+        lms.llm(name)          # LM Studio loads the model if it is not loaded yet
+    respond.model_name = name
+    respond.load = load
+    return respond
+
+
+class ModelRouter:
+    def __init__(self, models: dict, small_tasks=SMALL_TASKS,
+                 small_max_tokens: int = SMALL_MAX_PROMPT_TOKENS,
+                 short_chat_tokens: int = SHORT_CHAT_TOKENS):
+        self.models = models                  # {"small": fn, "large": fn}; "small" optional
+        self.small_tasks = set(small_tasks)
+        self.small_max_tokens  = small_max_tokens
+        self.short_chat_tokens = short_chat_tokens
+        self._lat   = {name: deque(maxlen=METRICS_WINDOW) for name in models}
+        self._count = {name: 0 for name in models}
+        self.fallbacks = 0
+        self._lock  = threading.Lock()
+
+    def route(self, messages: list[dict], task: str = "chat") -> str:
+        """"small" or "large" for this call."""
+        if "small" not in self.models:
+            return "large"
+        tokens = prompt_tokens(messages)
+        if tokens > self.small_max_tokens:
+            return "large"
+        if task in self.small_tasks:
+            return "small"
+        if task == "chat" and len(messages[-1]["content"]) // CHARS_PER_TOKEN <= self.short_chat_tokens:
+            return "small"
+        return "large"
+
+    def _call(self, name: str, messages: list[dict]) -> str:
+        t0 = time.perf_counter()
+        try:
+            return self.models[name](messages)
+        finally:
+            elapsed = time.perf_counter() - t0
+            observe("llm", elapsed, route=name)
+            with self._lock:
+                self._lat[name].append(elapsed)
+                self._count[name] += 1
+
+    def respond(self, messages: list[dict], task: str = "chat") -> str:
+        name = self.route(messages, task)
+        if name == "small":
+            try:
+                return self._call("small", messages)
+            except Exception as e:
+                logger.warning(f"small model failed on {task!r} ({e}); retrying on the large one")
+                with self._lock:
+                    self.fallbacks += 1
+        return self._call("large", messages)
+
+    def warm(self):
+        """
+        Have every backend that can load its model ahead of the first call do so.
+        A small model that fails to load is dropped and everything goes large.
+        """
+        for name, model in list(self.models.items()):
+            load = getattr(model, "load", None)
+            if not load:
+                continue
+            try:
+                load()
+            except Exception as e:
+                if name != "small":
+                    raise
+                logger.warning(f"small model unavailable ({e}); routing everything to the large one")
+                self.models = {k: v for k, v in self.models.items() if k != "small"}
+                continue
+            logger.info(f"{name} model loaded")
+
+    def metrics(self) -> dict:
+        """Per-route call counts and latency (seconds) over the recent window."""
+        out = {}
+        with self._lock:
+            for name, lat in self._lat.items():
+                s = sorted(lat)
+                if not s:
+                    out[name] = {"calls": self._count[name]}
+                    continue
+                pick = lambda q: s[min(len(s) - 1, int(q * len(s)))]
+                out[name] = {"calls": self._count[name], "mean_s": sum(s) / len(s),
+                             "p50_s": pick(0.50), "p95_s": pick(0.95)}
+            out["fallbacks"] = self.fallbacks
+        return out
+
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_router() -> ModelRouter:
+    """Shared router over the configured LM Studio models."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            models = {"large": lmstudio_model(LARGE_MODEL)}
+            if SMALL_MODEL:
+                models["small"] = lmstudio_model(SMALL_MODEL)
+            _router = ModelRouter(models)
+        return _router
+
+def set_router(router: ModelRouter):
+    """Install a router (e.g. over fake models)."""
+    global _router
+    with _router_lock:
+        _router = router
@@ -0,0 +1,63 @@
+# Danzar/page_fetch.py
+"""
+Concurrent page fetching for the research tools.
+
+`iter_pages` downloads a list of URLs on a thread pool and yields each
+page's cleaned text as soon as it lands, so the caller can chunk and embed
+early pages while later ones are still in flight. A total deadline bounds
+the whole stage; stragglers are abandoned, not waited on.
+"""
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from html_extract import extract_text
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+FETCH_TIMEOUT  = 5     # seconds per URL
+FETCH_DEADLINE = 8     # seconds for the whole fetch stage
+FETCH_WORKERS  = 8
+# ────────────────────────────────────────────────────────────────────────────────
+
+_session = requests.Session()
+_session.mount("http://",  HTTPAdapter(pool_maxsize=FETCH_WORKERS))
+_session.mount("https://", HTTPAdapter(pool_maxsize=FETCH_WORKERS))
+_session.headers["User-Agent"] = "Mozilla/5.0"
+
+def fetch_and_clean(url: str, timeout: float = FETCH_TIMEOUT) -> str:
+    """Download & strip out scripts/styles/etc., return plain text."""
+    try:
+        r = _session.get(url, timeout=timeout)
+        return extract_text(r.text)
+    except Exception:
+        return ""
+
+def iter_pages(urls: list[str], deadline: float = FETCH_DEADLINE,
+               workers: int = FETCH_WORKERS, timeout: float = FETCH_TIMEOUT):
+    """
+    Yield (url, text) in completion order until every URL is done or
+    `deadline` seconds have passed, whichever comes first.
+    """
+    if not urls:
+        return
+    pool = ThreadPoolExecutor(max_workers=min(workers, len(urls)))
+    futs = {pool.submit(fetch_and_clean, u, timeout): u for u in urls}
+    seen = set()
+    try:
+        for fut in as_completed(futs, timeout=deadline):
+            seen.add(fut)
+            yield futs[fut], fut.result()
+    except FuturesTimeout:
+        # pages that finished while the caller was busy still count
+        late = [f for f in futs if f.done() and f not in seen and not f.cancelled()]
+        left = sum(not f.done() for f in futs)
+        logger.warning(f"fetch deadline {deadline}s hit; abandoning {left} of {len(urls)} URLs")
+        for fut in late:
+            yield futs[fut], fut.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,158 @@
+# Danzar/profiler.py
+"""
+Live-process profiling for the running bot, no restart needed.
+
+- `start_profile(seconds)` samples every thread's stack (event loop, the
+  danzar-io worker pool running LLM/search/embedding calls, the GUI, TTS
+  playback…) via sys._current_frames() for a fixed time, then writes the
+  samples in collapsed-stack format ("thread;outer;…;inner count"), which
+  flamegraph.pl, speedscope and inferno all read
+- `LoopWatchdog` notices when the asyncio loop stops turning over for longer
+  than a threshold and logs the loop thread's stack at that moment, i.e.
+  the coroutine step that is blocking it
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+PROFILE_DIR      = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+SAMPLE_INTERVAL  = 0.005   # seconds between stack samples
+MAX_SECONDS      = 300     # longest profile a command may ask for
+BLOCK_THRESHOLD  = float(os.getenv("DANZAR_BLOCK_THRESHOLD", "0.25"))  # loop stall worth logging
+WATCHDOG_TICK    = 0.05
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+def _stack(frame) -> list[str]:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+class SamplingProfiler:
+    def __init__(self, seconds: float, interval: float = SAMPLE_INTERVAL, out_dir: str = PROFILE_DIR):
+        self.seconds  = min(seconds, MAX_SECONDS)
+        self.interval = interval
+        self.out_dir  = out_dir
+        self.samples  = Counter()   # collapsed stack -> count
+        self.ticks    = 0
+
+    def run(self) -> str:
+        """Sample for `seconds`, write the collapsed stacks and return their path."""
+        me    = threading.get_ident()
+        names = {}
+        end   = time.monotonic() + self.seconds
+        while time.monotonic() < end:
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                thread = names.get(ident, f"thread-{ident}").replace(";", ":")
+                self.samples[";".join([thread, *_stack(frame)])] += 1
+            self.ticks += 1
+            time.sleep(self.interval)
+        return self.write()
+
+    def write(self) -> str:
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, time.strftime("danzar-%Y%m%d-%H%M%S.folded"))
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.samples.most_common():
+                f.write(f"{stack} {n}\n")
+        return path
+
+    def top(self, n: int = 5) -> list[tuple[str, int]]:
+        """Innermost frames with the most samples (threads sitting idle included)."""
+        leaves = Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+
+_running = threading.Lock()
+
+def start_profile(seconds: float, on_done=None) -> bool:
+    """
+    Profile the whole process for `seconds` on a background thread.
+    `on_done(path, profiler)` is called from that thread when the file is
+    written. Returns False if a profile is already running.
+    """
+    if not _running.acquire(blocking=False):
+        return False
+
+    def work():
+        prof = SamplingProfiler(seconds)
+        try:
+            path = prof.run()
+            logger.info(f"profile written to {path} ({prof.ticks} samples)")
+            if on_done:
+                on_done(path, prof)
+        except Exception:
+            logger.exception("profiling failed")
+        finally:
+            _running.release()
+
+    threading.Thread(target=work, name="profiler", daemon=True).start()
+    return True
+
+
+class LoopWatchdog:
+    """Logs the loop thread's stack whenever the loop is stuck past `threshold` seconds."""
+
+    def __init__(self, threshold: float = BLOCK_THRESHOLD, tick: float = WATCHDOG_TICK):
+        self.threshold  = threshold
+        self.tick       = tick
+        self.stalls     = 0
+        self._beat      = time.monotonic()
+        self._loop_tid  = None
+        self._task      = None
+        self._stop      = threading.Event()
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.tick)
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.tick):
+            beat  = self._beat
+            stuck = time.monotonic() - beat
+            if stuck < self.threshold or reported == beat:
+                continue
+            reported = beat          # one report per stall
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_tid)
+            where = "".join(traceback.format_stack(frame)) if frame else "(no frame)\n"
+            logger.warning(f"event loop blocked for {stuck * 1000:.0f}ms+ in:\n{where}")
+
+    def start(self):
+        """Call from the event loop."""
+        if self._task and not self._task.done():
+            return
+        self._loop_tid = threading.get_ident()
+        self._beat     = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
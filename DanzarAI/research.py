@@ -1,81 +1,73 @@
 import time
 import asyncio
 import logging
-import lmstudio as lms
-from web_search import search_web
+from types import SimpleNamespace
+from async_adapters import llm_respond, web_search, run_blocking
+from tracing import span, observe
 
 logger = logging.getLogger(__name__)
 
-async def research_session(start_q: str, duration_min: int, channel):
+def _norm(q: str) -> str:
+    return " ".join(q.lower().split()).strip(" ?.!")
+
+async def research_session(start_q: str, duration_min: float, channel,
+                           pipelined: bool = True, state=None):
     """
     Runs until duration_min elapses. Each round:
       1) announce + private thought
       2) safe web search
       3) safe summarization
       4) safe follow-up question
+
+    With `pipelined` the round's LLM calls and search start together, and
+    as soon as the follow-up question is known its web search is launched
+    speculatively, while the summary is still generating, so the next round
+    usually finds its results already fetched. Indexing goes through the
+    shared RAGStore, whose flusher embeds in batches off the event loop.
+    `pipelined=False` is the original strictly sequential loop.
+
+    `state` (rag_store, settings, save_rag) defaults to danzar's shared
+    objects. Returns a stats dict.
     """
-    # Late import to share the SAME globals
-    from .danzar import embedder, faiss_index, rag_texts, settings, save_rag
+    if state is None:
+        # Late import to share the SAME objects (danzar.py registers itself as "danzar")
+        import danzar
+        state = SimpleNamespace(rag_store=danzar.rag_store, settings=danzar.settings,
+                                save_rag=danzar.save_rag)
 
     start_ts  = time.time()
     end_ts    = start_ts + duration_min * 60
     current_q = start_q
 
-    sys_p = settings["personality"] + (
+    sys_p = state.settings["personality"] + (
         "\n\nYou are the RESEARCHER: before searching, think about why you’re asking this "
         "and what you expect to find."
     )
 
+    prefetch    = {}   # normalized query -> Task[str] (speculative web searches)
+    stats       = {"rounds": 0, "prefetch_hits": 0, "pipelined": pipelined}
+
+    async def add(kind: str, text: str, priority: int = 0):
+        state.rag_store.add_many([f"{kind}: {text}"], priority)
+
+    def speculate(task: asyncio.Task):
+        if task.cancelled() or task.exception() or not pipelined:
+            return
+        key = _norm(task.result())
+        if key and key not in prefetch:
+            prefetch[key] = asyncio.create_task(web_search(task.result()))
+
     round = 1
-    while time.time() < end_ts:
-        await channel.send(f"🔄 Research Round {round}: Question → “{current_q}”")
+    search_t = thought_t = fq_t = None
+    try:
+        while time.time() < end_ts:
+            round_t0 = time.perf_counter()
+            await channel.send(f"🔄 Research Round {round}: Question → “{current_q}”")
 
-        # 1) private thought
-        try:
             thought_msgs = [
                 {"role":"system","content":sys_p},
                 {"role":"user",  "content":f"Why research “{current_q}”? What am I looking for?"}
             ]
-            tchat   = lms.Chat.from_history({"messages": thought_msgs})
-            thought = lms.llm("gemma-3-12b-it").respond(tchat).content.strip()
-            await channel.send(thought)
-        except Exception as e:
-            logger.exception(f"[round {round}] thought error")
-            await channel.send(f"⚠️ Thought gen failed: {e}")
-
-        # 2) web search
-        web_ctx = ""
-        try:
-            web_ctx = search_web(current_q) or ""
-            await channel.send(f"🔍 Web results:\n{web_ctx}")
-            rag_texts.append(f"web: {web_ctx}")
-            faiss_index.add(embedder.encode([web_ctx], convert_to_numpy=True))
-        except Exception as e:
-            logger.exception(f"[round {round}] web search error")
-            await channel.send(f"⚠️ Web search failed: {e}")
-
-        # 3) summarize
-        summary = ""
-        if web_ctx:
-            try:
-                sum_msgs = [
-                    {"role":"system","content":sys_p},
-                    {"role":"user",  "content":f"Summarize in 3 bullets:\n{web_ctx}"}
-                ]
-                schat   = lms.Chat.from_history({"messages": sum_msgs})
-                summary = lms.llm("gemma-3-12b-it").respond(schat).content.strip()
-                await channel.send(f"📄 Summary:\n{summary}")
-                rag_texts.append(f"summary: {summary}")
-                faiss_index.add(embedder.encode([summary], convert_to_numpy=True))
-            except Exception as e:
-                logger.exception(f"[round {round}] summary error")
-                await channel.send(f"⚠️ Summarization failed: {e}")
-        else:
-            await channel.send("⚠️ Skipping summary—no web results.")
-
-        # 4) next question
-        next_q = current_q
-        try:
             fq_msgs = [
                 {"role":"system","content":sys_p},
                 {"role":"user","content":(
@@ -83,24 +75,91 @@ async def research_session(start_q: str, duration_min: int, channel):
                     "Give me a one-sentence question."
                 )}
             ]
-            fqchat = lms.Chat.from_history({"messages": fq_msgs})
-            next_q = lms.llm("gemma-3-12b-it").respond(fqchat).content.strip()
-            await channel.send(f"➡️ Follow-up Question: {next_q}")
-            rag_texts.append(f"follow_up: {next_q}")
-            faiss_index.add(embedder.encode([next_q], convert_to_numpy=True))
-        except Exception as e:
-            logger.exception(f"[round {round}] follow-up error")
-            await channel.send(f"⚠️ Follow-up question failed: {e}")
-
-        current_q = next_q
-        round += 1
-
-        # time left
-        rem = max(0, int(end_ts - time.time()))
-        m, s = divmod(rem, 60)
-        await channel.send(f"⏳ Time left: {m:02d}:{s:02d}")
-
-        await asyncio.sleep(1)
-
-    save_rag()
-    await channel.send(f"✅ Research complete! Indexed {round-1} rounds.")
+            search_t = thought_t = fq_t = None
+            if pipelined:
+                search_t = prefetch.pop(_norm(current_q), None)
+                stats["prefetch_hits"] += search_t is not None
+                search_t  = search_t or asyncio.create_task(web_search(current_q))
+                thought_t = asyncio.create_task(llm_respond(thought_msgs, task="thought"))
+                fq_t      = asyncio.create_task(llm_respond(fq_msgs, task="follow_up"))
+                fq_t.add_done_callback(speculate)
+                # speculative searches for anything but the upcoming question are stale
+                for t in prefetch.values():
+                    t.cancel()
+                prefetch.clear()
+
+            # 1) private thought
+            try:
+                with span("research_stage", stage="thought"):
+                    thought = await (thought_t or llm_respond(thought_msgs, task="thought"))
+                await channel.send(thought)
+            except Exception as e:
+                logger.exception(f"[round {round}] thought error")
+                await channel.send(f"⚠️ Thought gen failed: {e}")
+
+            # 2) web search
+            web_ctx = ""
+            try:
+                with span("research_stage", stage="search"):
+                    web_ctx = await (search_t or web_search(current_q)) or ""
+                await channel.send(f"🔍 Web results:\n{web_ctx}")
+                await add("web", web_ctx)
+            except Exception as e:
+                logger.exception(f"[round {round}] web search error")
+                await channel.send(f"⚠️ Web search failed: {e}")
+
+            # 3) summarize
+            summary = ""
+            if web_ctx:
+                try:
+                    sum_msgs = [
+                        {"role":"system","content":sys_p},
+                        {"role":"user",  "content":f"Summarize in 3 bullets:\n{web_ctx}"}
+                    ]
+                    with span("research_stage", stage="summary"):
+                        summary = await llm_respond(sum_msgs, task="summary")
+                    await channel.send(f"📄 Summary:\n{summary}")
+                    await add("summary", summary, priority=1)
+                except Exception as e:
+                    logger.exception(f"[round {round}] summary error")
+                    await channel.send(f"⚠️ Summarization failed: {e}")
+            else:
+                await channel.send("⚠️ Skipping summary—no web results.")
+
+            # 4) next question
+            next_q = current_q
+            try:
+                with span("research_stage", stage="follow_up"):
+                    next_q = await (fq_t or llm_respond(fq_msgs, task="follow_up"))
+                await channel.send(f"➡️ Follow-up Question: {next_q}")
+                await add("follow_up", next_q)
+            except Exception as e:
+                logger.exception(f"[round {round}] follow-up error")
+                await channel.send(f"⚠️ Follow-up question failed: {e}")
+
+            current_q = next_q
+            stats["rounds"] = round
+            observe("research_round", time.perf_counter() - round_t0, pipelined=pipelined)
+            round += 1
+
+            # time left
+            rem = max(0, int(end_ts - time.time()))
+            m, s = divmod(rem, 60)
+            await channel.send(f"⏳ Time left: {m:02d}:{s:02d}")
+
+            if not pipelined:
+                await asyncio.sleep(1)
+    finally:
+        # on !stop or an error, nothing started for the current round may outlive it
+        for t in (search_t, thought_t, fq_t, *prefetch.values()):
+            if t is not None:
+                t.cancel()
+
+    elapsed_min = (time.time() - start_ts) / 60
+    stats["rounds_per_min"] = stats["rounds"] / elapsed_min if elapsed_min else 0.0
+    await run_blocking(state.save_rag)
+    await channel.send(
+        f"✅ Research complete! Indexed {round-1} rounds "
+        f"({stats['rounds_per_min']:.1f} rounds/min, {stats['prefetch_hits']} prefetched searches used)."
+    )
+    return stats
@@ -2,32 +2,44 @@
 import argparse
 import json
 import re
-from research_tool_free import research_topic_free
-from transformers import pipeline
+import threading
+from research_tool_free import research_topic_free, embed_chunks, EMBED_CACHE
+from devices import load_pipeline
+from frontier import Frontier, FindingsStore, WORKERS, TIME_BUDGET, SIM_THRESHOLD
 
-def self_teach(topic: str, max_iters: int = 3):
+def parse_subtopics(out: str) -> list[str]:
+    """JSON array of strings, falling back to one-per-line regex."""
+    try:
+        subs = json.loads(out)
+        if not (isinstance(subs, list) and len(subs) >= 1):
+            raise ValueError()
+        return [str(s).strip() for s in subs if str(s).strip()]
+    except Exception:
+        return [s.strip() for s in
+                re.findall(r'^\s*\d*\.*\s*"?([^"\]\[]+)"?\s*$', out, flags=re.MULTILINE)]
+
+def self_teach(topic: str, max_iters: int = 3, workers: int = WORKERS,
+               time_budget: float = TIME_BUDGET, sim_threshold: float = SIM_THRESHOLD,
+               use_history: bool = True):
     """
     1) research topic → summary
     2) prompt LLM for JSON array of 3 follow-up subtopics
     3) parse JSON (fallback to regex)
-    4) repeat on the first subtopic
+    4) queue every new subtopic on a breadth-first frontier and research up
+       to `workers` of them at once, until `max_iters` topics are done or
+       `time_budget` seconds pass (see frontier.py)
+    Findings are appended to frontier.FINDINGS_PATH as they complete.
     """
-    llm = pipeline(
+    llm = load_pipeline(
         "text2text-generation",
-        model="google/flan-t5-base",  # or your local LLM
-        device=0,
+        "google/flan-t5-base",  # or your local LLM
         max_new_tokens=128,
         num_beams=4,
         do_sample=False
     )
+    llm_lock = threading.Lock()  # one generate() at a time on the shared model
 
-    memory = []
-    current = topic
-    for i in range(max_iters):
-        print(f"\n🔍 Iteration {i+1}/{max_iters}: researching “{current}”…")
-        summary = research_topic_free(current)
-        memory.append((current, summary))
-
+    def expand(current: str, summary: str) -> list[str]:
         prompt = (
             f"You just read this summary of **{current}**:\n\n"
             f"{summary}\n\n"
@@ -36,27 +48,25 @@ def self_teach(topic: str, max_iters: int = 3):
             "[\"character classes and skill trees\",\"endgame monolith mechanics\",\"item crafting strategies\"]\n"
             "Do NOT include any other text."
         )
-        out = llm(prompt)[0]["generated_text"].strip()
-        print(f"\n🤖 Raw LLM output:\n{out}\n")
-
-        # Try JSON parsing
-        try:
-            subs = json.loads(out)
-            if not (isinstance(subs, list) and len(subs) >= 1):
-                raise ValueError()
-        except Exception:
-            # fallback to regex
-            subs = re.findall(r'^\s*\d*\.*\s*"?([^"\]\[]+)"?\s*$', out, flags=re.MULTILINE)
+        with llm_lock:
+            out = llm(prompt)[0]["generated_text"].strip()
+        print(f"\n🤖 Raw LLM output for “{current}”:\n{out}\n")
+        return parse_subtopics(out)
 
-        if not subs:
-            print("▶️ No valid sub-topics found—stopping early.")
-            break
+    def report(rec: dict):
+        print(f"\n✅ [{rec['depth']}] “{rec['topic']}” in {rec['seconds']}s"
+              f" → {len(rec['subtopics'])} leads")
+        print(f"🗃️ Embedding cache: {EMBED_CACHE.hits} hits / {EMBED_CACHE.misses} misses "
+              f"({EMBED_CACHE.hit_rate:.0%} hit rate, {len(EMBED_CACHE)} cached)")
 
-        next_topic = subs[0].strip()
-        print(f"▶️ Next up: “{next_topic}”")
-        current = next_topic
-
-    return memory
+    EMBED_CACHE.reset_stats()
+    frontier = Frontier(
+        research_topic_free, expand, embed_chunks, FindingsStore(),
+        workers=workers, time_budget=time_budget, max_topics=max_iters,
+        sim_threshold=sim_threshold, use_history=use_history,
+    )
+    findings = frontier.run(topic, on_finding=report)
+    return [(r["topic"], r["summary"]) for r in findings]
 
 def main():
     p = argparse.ArgumentParser(
@@ -65,13 +75,21 @@ def main():
     p.add_argument("topic", nargs="+", help="What do you want to research?")
     p.add_argument(
         "--iters", "-n", type=int, default=3,
-        help="How many follow-up rounds to run"
+        help="How many topics to research in total (the compute budget)"
     )
+    p.add_argument("--workers", "-w", type=int, default=WORKERS,
+                   help="How many topics to research concurrently")
+    p.add_argument("--budget", "-t", type=float, default=TIME_BUDGET,
+                   help="Wall-clock budget in seconds")
+    p.add_argument("--fresh", action="store_true",
+                   help="Ignore topics visited in earlier runs when deduplicating")
     args = p.parse_args()
     subject = " ".join(args.topic)
 
-    print(f"\n🎓 Starting self-learning research on “{subject}” for up to {args.iters} rounds.\n")
-    notes = self_teach(subject, max_iters=args.iters)
+    print(f"\n🎓 Starting self-learning research on “{subject}” for up to {args.iters} topics "
+          f"({args.workers} at a time, {args.budget:.0f}s budget).\n")
+    notes = self_teach(subject, max_iters=args.iters, workers=args.workers,
+                       time_budget=args.budget, use_history=not args.fresh)
 
     for topic, summary in notes:
         print(f"\n--- {topic.upper()} ---\n{summary}\n")
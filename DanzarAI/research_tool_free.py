@@ -1,48 +1,40 @@
-import requests
-from bs4 import BeautifulSoup
-from duckduckgo_search import DDGS
-from sentence_transformers import SentenceTransformer
+import time
+import threading
 import faiss
 import numpy as np
-from transformers import pipeline
+from devices import load_pipeline, load_sentence_transformer, variant_tag
+from page_fetch import fetch_and_clean, iter_pages, FETCH_DEADLINE
+from embed_cache import EmbeddingCache
+from summarize import summarize_hierarchical
+from web_search import search_urls
 
 # ─── CONFIG ────────────────────────────────────────────────────────────────────
 MAX_RESULTS   = 5      # how many DuckDuckGo links
 CHUNK_SIZE    = 1000   # chars per chunk
 CHUNK_OVERLAP = 200    # chars overlap
 TOP_K         = 4      # how many chunks to retrieve
-# Summarizer (runs on GPU if you set device=0)
-SUMMARIZER = pipeline(
+# Models go on cuda:0 when available, else CPU (int8 by default); see devices.py
+SUMMARIZER = load_pipeline(
     "summarization",
-    model="facebook/bart-large-cnn",
-    device=0  # set to 0 for cuda:0, or -1 to force CPU
-)
-# Embedder (runs on GPU if you set device="cuda:0")
-EMBEDDER = SentenceTransformer(
-    "all-MiniLM-L6-v2",
-    device="cuda:0"
+    "facebook/bart-large-cnn",
 )
+EMBED_MODEL = "all-MiniLM-L6-v2"
+EMBEDDER = load_sentence_transformer(EMBED_MODEL)
+# quantized vectors differ slightly from fp32 ones, so they're cached separately
+EMBED_CACHE_KEY = f"{EMBED_MODEL}@{variant_tag()}"
 EMBED_DIM = EMBEDDER.get_sentence_embedding_dimension()
+# Chunk embeddings persist across calls, keyed by chunk hash + model name
+EMBED_CACHE = EmbeddingCache()
+# frontier.py researches several topics at once on threads; the shared models
+# (and their HF fast tokenizers, which raise "Already borrowed" when threads
+# mix truncation settings) take one call at a time, like flan-t5's llm_lock
+SUMMARIZER_LOCK = threading.Lock()
+EMBEDDER_LOCK   = threading.Lock()
 # ────────────────────────────────────────────────────────────────────────────────
 
 def web_search(query: str, max_results: int = MAX_RESULTS) -> list[str]:
-    """Use DDGS to fetch top DuckDuckGo results."""
-    with DDGS() as ddgs:
-        results = ddgs.text(query, max_results=max_results)
-    return [r["href"] for r in results if r.get("href")]
-
-def fetch_and_clean(url: str) -> str:
-    """Download & strip out scripts/styles/etc., return plain text."""
-    try:
-        r = requests.get(url, timeout=5)
-        soup = BeautifulSoup(r.text, "html.parser")
-        for tag in soup(["script", "style", "nav", "footer", "aside"]):
-            tag.decompose()
-        text = soup.get_text(separator="\n")
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        return "\n".join(lines)
-    except Exception:
-        return ""
+    """Top DuckDuckGo result URLs (cached and rate-limited, see web_search.py)."""
+    return search_urls(query, max_results)
 
 def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
     """Split a long string into overlapping chunks."""
@@ -53,55 +45,72 @@ def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP)
         start = end - overlap
     return chunks
 
-def build_faiss_index(chunks: list[str]):
+def _encode(chunks: list[str]) -> np.ndarray:
+    with EMBEDDER_LOCK:
+        embs = EMBEDDER.encode(chunks, show_progress_bar=False, convert_to_numpy=True)
+    return (embs / np.linalg.norm(embs, axis=1, keepdims=True)).astype("float32")
+
+def embed_chunks(chunks: list[str]) -> np.ndarray:
+    """Unit-normalized float32 embeddings, one row per chunk (cached on disk)."""
+    return EMBED_CACHE.encode(chunks, EMBED_CACHE_KEY, _encode)
+
+def build_faiss_index(chunks: list[str], embs: np.ndarray | None = None):
     """Embed chunks and store in a cosine-sim FAISS index."""
-    embs = EMBEDDER.encode(chunks, show_progress_bar=False)
-    embs = embs / np.linalg.norm(embs, axis=1, keepdims=True)
+    if embs is None:
+        embs = embed_chunks(chunks)
     index = faiss.IndexFlatIP(EMBED_DIM)
     index.add(embs)
     return index
 
-def research_topic_free(topic: str) -> str:
+def research_topic_free(topic: str, deadline: float = FETCH_DEADLINE,
+                        timings: dict | None = None) -> str:
     """
     1) DuckDuckGo search (DDGS)
-    2) Scrape & chunk
+    2) Fetch pages concurrently (bounded by `deadline`), chunking and
+       embedding each page as soon as it arrives
     3) Build FAISS + retrieve topK
-    4) Summarize locally
+    4) Summarize locally (batched map-reduce, see summarize.py)
+    Per-stage wall times (seconds) of this call are written to `timings`.
     """
+    timings = timings if timings is not None else {}
+    timings.update({"search": 0.0, "fetch": 0.0, "embed": 0.0, "retrieve": 0.0, "summarize": 0.0})
+
     print(f"🔍 Searching for “{topic}”…")
+    t0 = time.perf_counter()
     urls = web_search(topic)
-    docs = []
-    for u in urls:
-        txt = fetch_and_clean(u)
-        if len(txt) > 300:
-            docs.extend(chunk_text(txt))
+    timings["search"] = time.perf_counter() - t0
+
+    docs, embs = [], []
+    t_fetch = time.perf_counter()
+    for url, txt in iter_pages(urls, deadline=deadline):
+        if len(txt) <= 300:
+            continue
+        chunks = chunk_text(txt)
+        t_emb = time.perf_counter()
+        embs.append(embed_chunks(chunks))
+        timings["embed"] += time.perf_counter() - t_emb
+        docs.extend(chunks)
+    # fetch = wall time of the whole fetch+embed stage minus the embedding done inline
+    timings["fetch"] = time.perf_counter() - t_fetch - timings["embed"]
     if not docs:
         return f"❌ No usable text found for “{topic}.”"
 
-    print(f"📚 Embedding {len(docs)} chunks…")
-    index = build_faiss_index(docs)
-
-    q_emb = EMBEDDER.encode([topic])
-    q_emb = q_emb / np.linalg.norm(q_emb, axis=1, keepdims=True)
-    D, I = index.search(q_emb, TOP_K)
+    print(f"📚 Embedded {len(docs)} chunks from {len(embs)} pages…")
+    t0 = time.perf_counter()
+    index = build_faiss_index(docs, np.vstack(embs))
+    q_emb = embed_chunks([topic])
+    D, I = index.search(q_emb, min(TOP_K, len(docs)))
     top_chunks = [docs[i] for i in I[0]]
+    timings["retrieve"] = time.perf_counter() - t0
 
-    print(f"✂️ Summarizing top {TOP_K} chunks…")
+    print(f"✂️ Summarizing top {len(top_chunks)} chunks…")
+    t0 = time.perf_counter()
     joined = "\n\n".join(top_chunks)
-    if len(joined) > 3000:
-        parts = chunk_text(joined, size=3000, overlap=500)
-        summ = [
-            SUMMARIZER(p, max_length=200, min_length=50, do_sample=False)[0]["summary_text"]
-            for p in parts
-        ]
-        final = SUMMARIZER(
-            " ".join(summ),
-            max_length=200, min_length=50, do_sample=False
-        )[0]["summary_text"]
-    else:
-        final = SUMMARIZER(
-            joined,
-            max_length=300, min_length=75, do_sample=False
-        )[0]["summary_text"]
+    stages = {}
+    with SUMMARIZER_LOCK:   # covers the tokenizer calls in split_by_tokens too
+        final = summarize_hierarchical(joined, SUMMARIZER, timings=stages)
+    timings["summarize"] = time.perf_counter() - t0
+    timings.update({f"summarize_{k}": v for k, v in stages.items()})
 
+    print("⏱️ " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
     return final
@@ -0,0 +1,92 @@
+# Danzar/summarize.py
+"""
+Hierarchical (map-reduce) summarization over a HF summarization pipeline.
+
+Input is split into parts by *tokens* (what the model actually limits),
+the map step sends all parts through the pipeline in batches instead of
+one forward pass per part, and the reduce step is skipped when the joined
+part summaries are already short enough to be the answer.
+"""
+import time
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+MAP_BATCH      = 4     # parts per pipeline forward pass
+PART_OVERLAP   = 64    # tokens shared between neighbouring parts
+MAP_LENGTH     = (50, 200)   # (min, max) new tokens per part summary
+FINAL_LENGTH   = (75, 300)   # (min, max) new tokens for the final summary
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+def _input_limit(summarizer) -> int:
+    tok = summarizer.tokenizer
+    limit = getattr(summarizer.model.config, "max_position_embeddings", None) or tok.model_max_length
+    limit = min(limit, tok.model_max_length)
+    return limit - tok.num_special_tokens_to_add()
+
+def split_by_tokens(text: str, tokenizer, max_tokens: int, overlap: int = PART_OVERLAP) -> list[str]:
+    """Token windows of at most `max_tokens`, decoded back to text."""
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    if len(ids) <= max_tokens:
+        return [text]
+    step = max(1, max_tokens - overlap)
+    return [
+        tokenizer.decode(ids[i:i + max_tokens], skip_special_tokens=True)
+        for i in range(0, len(ids) - overlap, step)
+    ]
+
+def _run(summarizer, texts: list[str], length: tuple[int, int], batch_size: int) -> list[str]:
+    out = summarizer(
+        texts,
+        min_length=length[0],
+        max_length=length[1],
+        do_sample=False,
+        truncation=True,
+        batch_size=batch_size,
+    )
+    return [o["summary_text"] for o in out]
+
+def summarize_hierarchical(text: str, summarizer, batch_size: int = MAP_BATCH,
+                           timings: dict | None = None) -> str:
+    """
+    Summarize `text` of any length.
+
+    Fits in one window  → one pass with FINAL_LENGTH.
+    Otherwise           → map all parts (batched), then reduce the joined part
+                          summaries, recursing while they still overflow the
+                          window; the reduce pass is skipped if the joined
+                          summaries already fit within FINAL_LENGTH tokens.
+    Stage times are added to `timings` under tokenize / map / reduce.
+    """
+    timings = timings if timings is not None else {}
+    for k in ("tokenize", "map", "reduce"):
+        timings.setdefault(k, 0.0)
+    tok   = summarizer.tokenizer
+    limit = _input_limit(summarizer)
+
+    t0 = time.perf_counter()
+    parts = split_by_tokens(text, tok, limit)
+    timings["tokenize"] += time.perf_counter() - t0
+
+    if len(parts) == 1:
+        t0 = time.perf_counter()
+        final = _run(summarizer, parts, FINAL_LENGTH, 1)[0]
+        timings["reduce"] += time.perf_counter() - t0
+        return final
+
+    while len(parts) > 1:
+        t0 = time.perf_counter()
+        joined = " ".join(_run(summarizer, parts, MAP_LENGTH, batch_size))
+        timings["map"] += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        n_tokens = len(tok(joined, add_special_tokens=False)["input_ids"])
+        parts = split_by_tokens(joined, tok, limit) if n_tokens > limit else [joined]
+        timings["tokenize"] += time.perf_counter() - t0
+
+    if n_tokens <= FINAL_LENGTH[1]:
+        return joined  # already summary-sized; skip the reduce pass
+
+    t0 = time.perf_counter()
+    final = _run(summarizer, parts, MAP_LENGTH, 1)[0]
+    timings["reduce"] += time.perf_counter() - t0
+    return final
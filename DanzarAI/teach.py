@@ -4,22 +4,18 @@ import time
 import os
 import logging
 
-import lmstudio as lms
-import numpy as np
-
-from web_search import search_web
 import danzar
 from vision_search import reverse_image_search, caption_image
+from async_adapters import llm_respond, web_search, run_blocking
+from tracing import observe
 
-# Pull in RAG state from danzar.py
-embedder    = danzar.embedder
-faiss_index = danzar.faiss_index
-rag_texts   = danzar.rag_texts
-save_rag    = danzar.save_rag
+# Shared RAG store from danzar.py (the object itself, so reloads can't go stale)
+rag_store = danzar.rag_store
+save_rag  = danzar.save_rag
 
 # Prepare logs
 BASE_DIR     = os.path.dirname(os.path.abspath(__file__))
-LOG_DIR      = os.path.join(BASE_DIR, "logs")
+LOG_DIR      = os.getenv("DANZAR_LOG_DIR") or os.path.join(BASE_DIR, "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 TEACH_LOG    = os.path.join(LOG_DIR, "teach.log")
 RESEARCH_LOG = os.path.join(LOG_DIR, "research.log")
@@ -50,49 +46,38 @@ async def teaching_session(start_q: str, turns: int, channel):
     question   = root_topic
 
     for i in range(1, turns + 1):
+        round_t0 = time.perf_counter()
         teach_logger.info(f"ROUND {i} USER: {question}")
         await channel.send(f"**User:** {question}")
 
         try:
-            snippets = search_web(question)
+            snippets = await web_search(question)
         except Exception as e:
             snippets = f"[search failed: {e}]"
         teach_logger.info(f"ROUND {i} SNIPPETS: {snippets}")
         await channel.send(f"**Danzar (snippets):**\n{snippets}")
 
-        # index
-        emb1 = embedder.encode(snippets, convert_to_numpy=True)
-        if emb1.ndim == 1: emb1 = emb1.reshape(1,-1)
-        faiss_index.add(emb1)
-        rag_texts.append(f"search: {snippets}")
+        # index (embedded in the background by the store's flusher)
+        rag_store.add_many([f"search: {snippets}"])
 
         sum_sys = "You are Danzar summarizing research. Bullet points ONLY."
-        chat_s  = lms.Chat.from_history({
-            "messages":[
-                {"role":"system","content": sum_sys},
-                {"role":"user",  "content": snippets}
-            ]
-        })
-        summary = lms.llm("gemma-3-12b-it").respond(chat_s).content.strip()
+        summary = await llm_respond([
+            {"role":"system","content": sum_sys},
+            {"role":"user",  "content": snippets}
+        ], task="summary")
         teach_logger.info(f"ROUND {i} SUMMARY: {summary}")
         await channel.send(f"**Danzar (summary):**\n{summary}")
 
-        emb2 = embedder.encode(summary, convert_to_numpy=True)
-        if emb2.ndim == 1: emb2 = emb2.reshape(1,-1)
-        faiss_index.add(emb2)
-        rag_texts.append(f"assistant: {summary}")
+        rag_store.add_many([f"assistant: {summary}"], priority=1)
 
         nxt_sys = (
             f"You are Danzar. Root topic is '{root_topic}'. "
             "Using ONLY the summary below, output EXACTLY ONE strictly on-topic follow-up question ending with '?'"
         )
-        chat_q  = lms.Chat.from_history({
-            "messages":[
-                {"role":"system","content": nxt_sys},
-                {"role":"user",  "content": summary}
-            ]
-        })
-        next_q = lms.llm("gemma-3-12b-it").respond(chat_q).content.strip()
+        next_q  = await llm_respond([
+            {"role":"system","content": nxt_sys},
+            {"role":"user",  "content": summary}
+        ], task="follow_up")
         if not next_q.endswith("?"):
             lines = [ln for ln in next_q.splitlines() if ln.strip().endswith("?")]
             next_q = lines[-1].strip() if lines else question
@@ -105,7 +90,8 @@ async def teaching_session(start_q: str, turns: int, channel):
             channel.teach_left_var.set(f"Rounds left: {remaining}")
 
         question = next_q
-        save_rag()
+        await run_blocking(save_rag)
+        observe("teach_round", time.perf_counter() - round_t0)
 
     teach_logger.info(f"Teaching complete: {turns} rounds")
     await channel.send(f"✅ Teaching complete: {turns} rounds.")
@@ -119,15 +105,16 @@ async def research_session(topic: str, minutes: int, channel):
     rnd        = 1
 
     while time.time() < end_time:
+        round_t0 = time.perf_counter()
         research_logger.info(f"ROUND {rnd} USER: {question}")
         await channel.send(f"**User:** {question}")
 
         if os.path.isfile(question):
-            caption = caption_image(question)
+            caption = await run_blocking(caption_image, question)
             research_logger.info(f"ROUND {rnd} CAPTION: {caption}")
             await channel.send(f"**Caption:** {caption}")
             try:
-                vis = reverse_image_search(question)
+                vis = await run_blocking(reverse_image_search, question)
                 vis_text = "\n".join(r["link"] for r in vis)
             except Exception as e:
                 vis_text = f"[vision failed: {e}]"
@@ -136,45 +123,33 @@ async def research_session(topic: str, minutes: int, channel):
             raw_ctx = caption + "\n" + vis_text
         else:
             try:
-                snippets = search_web(question)
+                snippets = await web_search(question)
             except Exception as e:
                 snippets = f"[search failed: {e}]"
             research_logger.info(f"ROUND {rnd} SNIPPETS: {snippets}")
             await channel.send(f"**Snippets:**\n{snippets}")
             raw_ctx = snippets
 
-        embc = embedder.encode(raw_ctx, convert_to_numpy=True)
-        if embc.ndim == 1: embc = embc.reshape(1,-1)
-        faiss_index.add(embc)
-        rag_texts.append(f"context: {raw_ctx}")
+        rag_store.add_many([f"context: {raw_ctx}"])
 
         sum_sys = "You are Danzar summarizing research. Bullet points ONLY."
-        chat_s  = lms.Chat.from_history({
-            "messages":[
-                {"role":"system","content": sum_sys},
-                {"role":"user",  "content": raw_ctx}
-            ]
-        })
-        summary = lms.llm("gemma-3-12b-it").respond(chat_s).content.strip()
+        summary = await llm_respond([
+            {"role":"system","content": sum_sys},
+            {"role":"user",  "content": raw_ctx}
+        ], task="summary")
         research_logger.info(f"ROUND {rnd} SUMMARY: {summary}")
         await channel.send(f"**Summary:**\n{summary}")
 
-        embs = embedder.encode(summary, convert_to_numpy=True)
-        if embs.ndim == 1: embs = embs.reshape(1,-1)
-        faiss_index.add(embs)
-        rag_texts.append(f"assistant: {summary}")
+        rag_store.add_many([f"assistant: {summary}"], priority=1)
 
         nxt_sys = (
             f"You are Danzar. Root topic is '{root_topic}'. "
             "Using ONLY the summary below, ask ONE strictly on-topic follow-up question ending with '?'"
         )
-        chat_q = lms.Chat.from_history({
-            "messages":[
-                {"role":"system","content": nxt_sys},
-                {"role":"user",  "content": summary}
-            ]
-        })
-        next_q = lms.llm("gemma-3-12b-it").respond(chat_q).content.strip()
+        next_q = await llm_respond([
+            {"role":"system","content": nxt_sys},
+            {"role":"user",  "content": summary}
+        ], task="follow_up")
         if not next_q.endswith("?"):
             lines = [ln for ln in next_q.splitlines() if ln.strip().endswith("?")]
             next_q = lines[-1].strip() if lines else question
@@ -184,7 +159,8 @@ async def research_session(topic: str, minutes: int, channel):
 
         question = next_q
         rnd += 1
-        save_rag()
+        await run_blocking(save_rag)
+        observe("teach_research_round", time.perf_counter() - round_t0)
 
     research_logger.info(f"Research complete: {minutes}m")
     await channel.send(f"✅ Research complete: {minutes} minutes.")
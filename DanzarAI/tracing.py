@@ -0,0 +1,140 @@
+# Danzar/tracing.py
+"""
+Span timing for the request pipeline, kept as in-process histograms.
+
+    with span("llm", route="small"):
+        ...
+
+Each (name, labels) pair gets a Prometheus-style cumulative histogram plus
+a window of recent samples for percentiles. `render_prometheus()` produces
+the text exposition format; `serve()` publishes it on a local HTTP port
+(rag_server.py adds it as a Flask route instead), and `snapshot()` feeds
+the bot's !stats command.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.getenv("DANZAR_METRICS_PORT", "9108"))   # 0 = no endpoint
+BUCKETS      = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+WINDOW       = 1000    # recent samples kept per span for percentiles
+METRIC_NAME  = "danzar_span_seconds"
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count   = 0
+        self.sum     = 0.0
+        self.recent  = deque(maxlen=WINDOW)
+
+    def observe(self, seconds: float):
+        for i, le in enumerate(BUCKETS):
+            if seconds <= le:
+                self.buckets[i] += 1
+        self.count += 1
+        self.sum   += seconds
+        self.recent.append(seconds)
+
+
+_hists: dict = {}      # (name, ((label, value), …)) -> Histogram
+_lock = threading.Lock()
+
+def observe(name: str, seconds: float, **labels):
+    key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    with _lock:
+        hist = _hists.get(key)
+        if hist is None:
+            hist = _hists[key] = Histogram()
+        hist.observe(seconds)
+
+@contextmanager
+def span(name: str, **labels):
+    """Time the enclosed block (across awaits too) under `name`."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+def _label_str(labels, extra=()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+def render_prometheus() -> str:
+    """All span histograms in the Prometheus text exposition format."""
+    lines = [f"# HELP {METRIC_NAME} Time spent in each pipeline stage.",
+             f"# TYPE {METRIC_NAME} histogram"]
+    with _lock:
+        items = sorted(_hists.items())
+        for (name, labels), h in items:
+            base = (("span", name), *labels)
+            for le, n in zip(BUCKETS, h.buckets):
+                lines.append(f"{METRIC_NAME}_bucket{_label_str(base, [('le', str(le))])} {n}")
+            lines.append(f"{METRIC_NAME}_bucket{_label_str(base, [('le', '+Inf')])} {h.count}")
+            lines.append(f"{METRIC_NAME}_sum{_label_str(base)} {h.sum:.6f}")
+            lines.append(f"{METRIC_NAME}_count{_label_str(base)} {h.count}")
+    return "\n".join(lines) + "\n"
+
+def snapshot() -> dict:
+    """{"name[label=value]": {count, mean_s, p50_s, p95_s, p99_s}} per span."""
+    out = {}
+    with _lock:
+        for (name, labels), h in sorted(_hists.items()):
+            s = sorted(h.recent)
+            if not s:
+                continue
+            pick = lambda q: s[min(len(s) - 1, int(q * len(s)))]
+            key = name + ("[" + ",".join(f"{k}={v}" for k, v in labels) + "]" if labels else "")
+            out[key] = {"count": h.count, "mean_s": h.sum / h.count,
+                        "p50_s": pick(0.50), "p95_s": pick(0.95), "p99_s": pick(0.99)}
+    return out
+
+def reset():
+    with _lock:
+        _hists.clear()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+_server = None
+
+def serve(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    """Serve /metrics from a daemon thread (once). Returns the server, or None if disabled/taken."""
+    global _server
+    if _server or not port:
+        return _server
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"metrics on http://{host}:{port}/metrics")
+    _server = server
+    return server
@@ -2,23 +2,67 @@
 
 import requests
 from bs4 import BeautifulSoup
-from transformers import BlipProcessor, BlipForConditionalGeneration
 from PIL import Image
 import os
+import logging
+import threading
 
-# Load BLIP
-processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-model     = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+BLIP_MODEL = "Salesforce/blip-image-captioning-base"
+
+# BLIP loads on first caption (or from danzar.py's startup warm-up)
+_blip      = None
+_blip_lock = threading.Lock()
+
+def load_blip():
+    """
+    Import transformers and load the BLIP processor and model (once).
+    """
+    global _blip
+    with _blip_lock:
+        if _blip is None:
+            from transformers import BlipProcessor, BlipForConditionalGeneration
+            _blip = (BlipProcessor.from_pretrained(BLIP_MODEL),
+                     BlipForConditionalGeneration.from_pretrained(BLIP_MODEL))
+    return _blip
 
 def caption_image(path: str) -> str:
     """
     Generate a natural-language caption for the local image file.
     """
+    processor, model = load_blip()
     img = Image.open(path).convert("RGB")
     inputs = processor(img, return_tensors="pt")
     out    = model.generate(**inputs)
     return processor.decode(out[0], skip_special_tokens=True)
 
+def analyze_image(path: str) -> dict:
+    """
+    OCR text and a caption for the local image file: the CPU-heavy half of an
+    image request, run in the bot or in a request_journal.py worker.
+    """
+    import pytesseract
+
+    try:
+        with span("ocr"):
+            img = Image.open(path).convert("RGB")
+            ocr = pytesseract.image_to_string(img, config="--psm 6").strip()
+    except pytesseract.TesseractNotFoundError:
+        ocr = ""
+    except Exception as e:
+        ocr = ""
+        logger.warning(f"OCR error: {e}")
+
+    try:
+        with span("caption"):
+            caption = caption_image(path)
+    except Exception as e:
+        caption = f"[Caption error: {e}]"
+    return {"caption": caption, "ocr": ocr}
+
 def reverse_image_search(path: str, max_results: int = 5) -> list[dict]:
     """
     Perform a simple reverse-image search using Google. Returns list of dicts:
@@ -0,0 +1,152 @@
+# Danzar/warmup.py
+"""
+Deferred model loading for a fast cold start.
+
+Heavy resources (embedder, TTS voice, BLIP, the embedded RAG history…) are
+registered with a loader and a priority instead of being built at import
+time. `start()` loads them one at a time on a background thread, most
+urgent first, while the bot is already connected. Code that needs one calls
+`get(name)` from a thread (loading it right there if nobody has started
+yet) or `await wait(name)` on the event loop, and waits until it is ready.
+
+Each load, and any phase marked with begin()/end() (imports, the Discord
+connect…), is kept in a startup timeline for `report()`.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+from tracing import observe
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+# lazy  = connect first, load models in the background
+# eager = load everything before connecting (the old behaviour)
+STARTUP_MODE = os.getenv("DANZAR_STARTUP", "lazy")
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+class Warmup:
+    def __init__(self):
+        self.t0       = time.perf_counter()   # timeline origin
+        self._jobs    = {}        # name -> (priority, seq, loader)
+        self._futures = {}        # name -> Future holding the loaded resource
+        self._claimed = set()     # names someone has started loading
+        self._phases  = {}        # name -> [start, end] seconds since t0
+        self._lock    = threading.Lock()
+        self._thread  = None
+
+    def register(self, name: str, loader, priority: int = 0):
+        """Load `loader()` as resource `name`; lower priorities load first."""
+        fut = Future()
+        fut.set_running_or_notify_cancel()    # waiters being cancelled must not cancel it
+        with self._lock:
+            self._jobs[name]    = (priority, len(self._jobs), loader)
+            self._futures[name] = fut
+
+    # ─── timeline ──────────────────────────────────────────────────────────────
+    def _now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def begin(self, name: str):
+        with self._lock:
+            self._phases[name] = [self._now(), None]
+
+    def end(self, name: str):
+        """Close phase `name` (opened at t=0 if begin() was never called); later calls are no-ops."""
+        with self._lock:
+            phase = self._phases.setdefault(name, [0.0, None])
+            if phase[1] is not None:
+                return
+            phase[1] = self._now()
+        observe("startup", phase[1] - phase[0], phase=name)
+
+    def report(self) -> str:
+        with self._lock:
+            phases  = sorted(self._phases.items(), key=lambda kv: kv[1][0])
+            waiting = [n for n in sorted(self._jobs, key=self._jobs.get) if n not in self._phases]
+        rows = [f"{'phase':<18} {'start':>7} {'end':>7} {'took':>7}"]
+        for name, (start, end) in phases:
+            if end is None:
+                rows.append(f"{name:<18} {start:>6.1f}s {'…':>7} {'…':>7}")
+            else:
+                fut    = self._futures.get(name)
+                failed = " failed" if fut and fut.done() and fut.exception() else ""
+                rows.append(f"{name:<18} {start:>6.1f}s {end:>6.1f}s {end - start:>6.1f}s{failed}")
+        rows += [f"{name:<18} {'queued':>7}" for name in waiting]
+        return "\n".join(rows)
+
+    # ─── loading ───────────────────────────────────────────────────────────────
+    def _load(self, name: str):
+        with self._lock:
+            if name in self._claimed:
+                return
+            self._claimed.add(name)
+            loader = self._jobs[name][2]
+        fut = self._futures[name]
+        self.begin(name)
+        try:
+            fut.set_result(loader())
+        except Exception as e:
+            logger.error(f"warm-up: loading {name} failed: {e}")
+            fut.set_exception(e)
+        finally:
+            self.end(name)
+
+    def _run(self):
+        for name in sorted(self._jobs, key=self._jobs.get):
+            self._load(name)
+        logger.info(f"warm-up done, startup timeline:\n{self.report()}")
+
+    def start(self):
+        """Load everything registered, in priority order, on a daemon thread (once)."""
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def wait_all(self):
+        for fut in list(self._futures.values()):
+            fut.exception()
+
+    def ready(self, name: str) -> bool:
+        fut = self._futures[name]
+        return fut.done() and fut.exception() is None
+
+    def get(self, name: str):
+        """The resource, loading it in this thread if nobody has started on it (blocks)."""
+        self._load(name)
+        return self._futures[name].result()
+
+    async def wait(self, name: str) -> bool:
+        """Wait on the loop until `name` is loaded; False if loading it failed."""
+        self.start()
+        try:
+            await asyncio.wrap_future(self._futures[name])
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False
+
+
+class Lazy:
+    """
+    Stand-in for resource `name` that can be handed out before it is loaded:
+    attribute access waits for it. `known` answers attributes up front.
+    """
+
+    def __init__(self, warmup: Warmup, name: str, **known):
+        self._warmup = warmup
+        self._name   = name
+        self._known  = known
+
+    def __getattr__(self, attr):
+        if attr in self._known:
+            return self._known[attr]
+        return getattr(self._warmup.get(self._name), attr)
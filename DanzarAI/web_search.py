@@ -1,10 +1,184 @@
-from duckduckgo_search import DDGS
+# Danzar/web_search.py
+"""
+Shared DuckDuckGo search layer for the bot, teach/research sessions and
+research_tool_free.
+
+- results are cached per normalized query for CACHE_TTL seconds, and a
+  query already in flight is awaited instead of being sent twice
+- DDGS sessions are reused (one per worker thread) instead of opened per call
+- a token bucket keeps us under DuckDuckGo's rate limit
+- `search_many` runs several queries concurrently
+- if the upstream call fails, a cached result up to STALE_TTL old is served
+- the backend is anything with `text(query, max_results) -> [dict]`, so a
+  fake can be passed to `SearchClient` or installed with `set_backend`
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+MAX_RESULTS    = 5
+CACHE_TTL      = 15 * 60        # seconds a result is served without asking again
+STALE_TTL      = 24 * 60 * 60   # oldest result still served when DuckDuckGo fails
+CACHE_ENTRIES  = 512
+RATE           = 1.0            # requests per second
+BURST          = 3
+SEARCH_WORKERS = 4              # concurrent queries in search_many
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+def normalize_query(query: str) -> str:
+    """Case, spacing and trailing punctuation don't change what DuckDuckGo returns."""
+    return " ".join(query.lower().split()).strip(" ?.!")
+
+
+class DDGSBackend:
+    """DuckDuckGo text search, keeping one DDGS session per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _session(self):
+        ddgs = getattr(self._local, "ddgs", None)
+        if ddgs is None:
+            from duckduckgo_search import DDGS
+            ddgs = self._local.ddgs = DDGS()
+        return ddgs
+
+    def text(self, query: str, max_results: int) -> list[dict]:
+        try:
+            return list(self._session().text(query, max_results=max_results) or [])
+        except Exception:
+            self._local.ddgs = None   # don't reuse a session that just failed
+            raise
+
+
+class RateLimiter:
+    """Blocking token bucket shared by every thread: `rate` calls/sec, `burst` at once."""
+
+    def __init__(self, rate: float = RATE, burst: int = BURST):
+        self.rate     = rate
+        self.capacity = burst
+        self.tokens   = float(burst)
+        self.updated  = time.monotonic()
+        self._lock    = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SearchClient:
+    def __init__(self, backend=None, ttl: float = CACHE_TTL, stale_ttl: float = STALE_TTL,
+                 max_entries: int = CACHE_ENTRIES, rate: float = RATE, burst: int = BURST,
+                 workers: int = SEARCH_WORKERS):
+        self.backend     = backend or DDGSBackend()
+        self.ttl         = ttl
+        self.stale_ttl   = stale_ttl
+        self.max_entries = max_entries
+        self.limiter     = RateLimiter(rate, burst)
+        self.workers     = workers
+        self.stats       = {"hits": 0, "misses": 0, "stale": 0, "errors": 0}
+        self._cache      = OrderedDict()   # (norm query, max_results) -> (fetched_at, results)
+        self._inflight   = {}              # same key -> Future of the call in progress
+        self._lock       = threading.Lock()
+
+    def results(self, query: str, max_results: int = MAX_RESULTS) -> list[dict]:
+        """Raw result dicts (title/href/body) for `query`."""
+        key = (normalize_query(query), max_results)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and time.time() - hit[0] < self.ttl:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return hit[1]
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["hits"] += 1
+        if not owner:
+            return fut.result()
+
+        try:
+            self.limiter.acquire()
+            results = self.backend.text(query, max_results)
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                del self._inflight[key]
+                stale = hit and time.time() - hit[0] < self.stale_ttl
+                if stale:
+                    self.stats["stale"] += 1
+            if stale:
+                logger.warning(f"search failed for {query!r} ({e}); serving cached results")
+                fut.set_result(hit[1])
+                return hit[1]
+            fut.set_exception(e)
+            raise
+
+        with self._lock:
+            self._cache[key] = (time.time(), results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            del self._inflight[key]
+        fut.set_result(results)
+        return results
+
+    def search_many(self, queries: list[str], max_results: int = MAX_RESULTS) -> list[list[dict]]:
+        """Results for each query, in order, fetched concurrently."""
+        if len(queries) <= 1:
+            return [self.results(q, max_results) for q in queries]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(queries))) as pool:
+            return list(pool.map(lambda q: self.results(q, max_results), queries))
+
+    @property
+    def hit_rate(self) -> float:
+        seen = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / seen if seen else 0.0
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> SearchClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SearchClient()
+        return _client
+
+def set_backend(backend):
+    """Route every search through `backend` (e.g. a fake), with a fresh cache."""
+    global _client
+    with _client_lock:
+        _client = SearchClient(backend)
+
+
+def format_snippets(results: list[dict]) -> str:
+    snippets = [f"- {r.get('body', '').replace(chr(10), ' ')}" for r in results]
+    return "I found these on the web:\n" + "\n".join(snippets)
 
 def search_web(query: str) -> str:
-    snippets = []
-    with DDGS() as ddgs:
-        for r in ddgs.text(query, max_results=5):
-            body = r.get("body","").replace("\n"," ")
-            snippets.append(f"- {body}")
-    context = "\n".join(snippets)
-    return f"I found these on the web:\n{context}"
+    return format_snippets(get_client().results(query))
+
+def search_web_many(queries: list[str]) -> list[str]:
+    return [format_snippets(r) for r in get_client().search_many(queries)]
+
+def search_urls(query: str, max_results: int = MAX_RESULTS) -> list[str]:
+    return [r["href"] for r in get_client().results(query, max_results) if r.get("href")]
@@ -0,0 +1,206 @@
+# conversation_memory.py
+"""
+Per-channel conversation memory for the bot.
+
+- channels live in an LRU map; past MAX_CHANNELS, or after IDLE_TTL without
+  a message, the least recently used ones are dropped
+- recent turns sit in a bounded deque; turns pushed out of it are queued
+  for the background summarizer, which folds them into a rolling summary
+  so old context survives in a few sentences instead of being lost
+- everything is saved to MEMORY_FILE (periodically and on exit) and
+  reloaded at startup
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+MAX_CHANNELS  = 256
+MAX_TURNS     = 12              # messages kept verbatim per channel (user + assistant)
+IDLE_TTL      = 7 * 24 * 3600   # seconds before an idle channel is forgotten
+SUMMARY_BATCH = 4               # overflowed messages that trigger a summary update
+MAX_OVERFLOW  = SUMMARY_BATCH * 4   # unsummarized messages kept while summaries keep failing
+SAVE_INTERVAL = 60              # seconds between background saves
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Conversation:
+    topic: str | None = None
+    summary: str = ""
+    turns: deque = field(default_factory=lambda: deque(maxlen=MAX_TURNS))
+    overflow: list = field(default_factory=list)   # pushed out, not yet summarized
+    last_active: float = field(default_factory=time.time)
+
+    def to_json(self) -> dict:
+        return {"topic": self.topic, "summary": self.summary, "turns": list(self.turns),
+                "overflow": self.overflow, "last_active": self.last_active}
+
+
+class ConversationMemory:
+    def __init__(self, path: str | None = None, max_channels: int = MAX_CHANNELS,
+                 max_turns: int = MAX_TURNS, idle_ttl: float = IDLE_TTL):
+        self.path         = path
+        self.max_channels = max_channels
+        self.max_turns    = max_turns
+        self.idle_ttl     = idle_ttl
+        self._convs       = OrderedDict()   # str(channel id) -> Conversation
+        self._lock        = threading.Lock()  # atexit saves from another thread
+        self._wake        = None
+        self._task        = None
+        self._dirty       = False
+
+    # ─── access ────────────────────────────────────────────────────────────────
+    def _get(self, cid, create: bool = True) -> Conversation | None:
+        key  = str(cid)
+        conv = self._convs.get(key)
+        if conv is None and create:
+            conv = self._convs[key] = Conversation(turns=deque(maxlen=self.max_turns))
+        if conv is not None:
+            self._convs.move_to_end(key)
+        return conv
+
+    def _evict(self):
+        cutoff = time.time() - self.idle_ttl
+        while self._convs:
+            key, oldest = next(iter(self._convs.items()))
+            if len(self._convs) <= self.max_channels and oldest.last_active >= cutoff:
+                break
+            del self._convs[key]
+            logger.info(f"conversation memory: forgot idle channel {key}")
+
+    def _cap(self, key, conv: Conversation):
+        """Drop the oldest unsummarized messages past MAX_OVERFLOW (the summarizer is failing)."""
+        extra = len(conv.overflow) - MAX_OVERFLOW
+        if extra > 0:
+            del conv.overflow[:extra]
+            logger.warning(f"conversation memory: dropped {extra} unsummarized messages for {key}")
+
+    def history(self, cid) -> list[dict]:
+        with self._lock:
+            conv = self._get(cid, create=False)
+            return list(conv.turns) if conv else []
+
+    def topic(self, cid) -> str | None:
+        with self._lock:
+            conv = self._get(cid, create=False)
+            return conv.topic if conv else None
+
+    def summary(self, cid) -> str:
+        with self._lock:
+            conv = self._get(cid, create=False)
+            return conv.summary if conv else ""
+
+    def set_topic(self, cid, topic: str):
+        """Remember the channel's first topic; later calls don't replace it."""
+        with self._lock:
+            conv = self._get(cid)
+            if not conv.topic:
+                conv.topic = topic
+                self._dirty = True
+            self._evict()
+
+    def add_exchange(self, cid, user: str, assistant: str):
+        with self._lock:
+            conv = self._get(cid)
+            for msg in ({"role": "user", "content": user},
+                        {"role": "assistant", "content": assistant}):
+                if len(conv.turns) == conv.turns.maxlen:
+                    conv.overflow.append(conv.turns.popleft())
+                conv.turns.append(msg)
+            self._cap(cid, conv)
+            conv.last_active = time.time()
+            self._dirty = True
+            self._evict()
+            due = len(conv.overflow) >= SUMMARY_BATCH
+        if due and self._wake:
+            self._wake.set()
+
+    def __len__(self):
+        return len(self._convs)
+
+    # ─── rolling summaries ─────────────────────────────────────────────────────
+    async def summarize_due(self, summarize):
+        """Fold overflowed turns into each channel's summary via `await summarize(prev, msgs)`."""
+        with self._lock:
+            due = [(k, c.summary, list(c.overflow)) for k, c in self._convs.items()
+                   if len(c.overflow) >= SUMMARY_BATCH]
+        for key, prev, msgs in due:
+            try:
+                new = (await summarize(prev, msgs)).strip()
+            except Exception:
+                logger.exception(f"conversation summary failed for {key}")
+                continue
+            with self._lock:
+                conv = self._convs.get(key)
+                if conv is None:
+                    continue
+                conv.summary  = new or prev
+                # turns that overflowed while we were summarizing wait for the next pass
+                # (by identity: _cap may have dropped some of `msgs` in the meantime)
+                done = {id(m) for m in msgs}
+                conv.overflow = [m for m in conv.overflow if id(m) not in done]
+                self._dirty = True
+
+    async def _run(self, summarize):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), SAVE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.summarize_due(summarize)
+            if self._dirty and self.path:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, self.save)
+                except Exception:
+                    logger.exception("conversation memory save failed")
+
+    def start(self, summarize):
+        """Start the background summarizer/saver on the running loop."""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run(summarize))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    # ─── persistence ───────────────────────────────────────────────────────────
+    def save(self, path: str | None = None):
+        path = path or self.path
+        with self._lock:
+            data = {k: c.to_json() for k, c in self._convs.items()}
+            self._dirty = False
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def load(self, path: str | None = None):
+        path = path or self.path
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        convs = OrderedDict()
+        # saved in LRU order, oldest first
+        for key, c in data.items():
+            convs[key] = Conversation(
+                topic=c.get("topic"), summary=c.get("summary", ""),
+                turns=deque(c.get("turns", []), maxlen=self.max_turns),
+                overflow=c.get("overflow", []), last_active=c.get("last_active", time.time()),
+            )
+        with self._lock:
+            self._convs = convs
+            for key, conv in convs.items():
+                self._cap(key, conv)
+            self._evict()
+        logger.info(f"conversation memory: loaded {len(convs)} channels")
@@ -1,81 +1,104 @@
 #!/usr/bin/env python3
 import os
 import re
+import sys
 import json
+import time
 import threading
 import asyncio
 import logging
 import atexit
+from types import SimpleNamespace
 from dotenv import load_dotenv
 load_dotenv()
 
+# teach.py does `import danzar`; when run as a script make that resolve to
+# this module instead of importing (and loading every model) a second time
+if __name__ == "__main__":
+    sys.modules.setdefault("danzar", sys.modules[__name__])
+
+# heavy models load in the background after connecting (see DanzarAI/warmup.py)
+from warmup import Warmup, Lazy, STARTUP_MODE
+startup = Warmup()
+
 import discord
 from discord.ext import commands
-import lmstudio as lms
 
 # Local modules
 from gui import GUIChannel
 from web_search import search_web
-from vision_search import reverse_image_search, caption_image
+from vision_search import reverse_image_search, load_blip, analyze_image
+from async_adapters import start_session, cancel_session, LoopLagMonitor, run_blocking
 
-# BLIP for captions
-from transformers import BlipProcessor, BlipForConditionalGeneration
-from PIL import Image
-processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-model     = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
-
-# OCR
-import pytesseract
-from pytesseract import TesseractNotFoundError
+# BLIP captioning and OCR live in vision_search; BLIP loads during warm-up
 
 # RAG / embeddings
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
+from rag_store import RAGStore
+from prompt_builder import PromptBuilder
+from conversation_memory import ConversationMemory
+from request_scheduler import RequestScheduler, default_classify, PRIORITY_GUI
+from request_journal import RequestJournal, start_workers
+from faq import FAQStore
+from tracing import span, observe, snapshot as trace_snapshot, serve as serve_metrics
+from profiler import start_profile, LoopWatchdog
+from async_adapters import llm_respond
+from model_router import get_router
 
 # TTS
+import tts
 from tts import make_wav, play_wav
 
+# ─── Logging ───────────────────────────────────────────────────────────────
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 # ─── RAG State ─────────────────────────────────────────────────────────────
 BASE = os.path.dirname(__file__)
 SETTINGS_FILE = os.path.join(BASE, "settings.json")
 HISTORY_FILE  = os.path.join(BASE, "rag_histories.json")
 
-embedder    = SentenceTransformer('all-MiniLM-L6-v2')
-dim         = embedder.get_sentence_embedding_dimension()
-rag_texts   = []
-faiss_index = faiss.IndexFlatL2(dim)
+EMBED_MODEL = "all-MiniLM-L6-v2"
+EMBED_DIM   = 384   # known up front so the store can be built before the model loads
+
+def load_embedder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBED_MODEL)
+
+embedder  = Lazy(startup, "embedder", get_sentence_embedding_dimension=lambda: EMBED_DIM)
+# one shared store for the bot, teach/research sessions and the GUI thread
+rag_store = RAGStore(embedder, HISTORY_FILE)
 
 def save_rag():
+    # before the history has loaded the store holds only part of it
+    if not startup.ready("rag"):
+        return
     try:
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(rag_texts, f, ensure_ascii=False, indent=2)
+        rag_store.save()
     except Exception as e:
         logger.warning(f"Could not save RAG histories: {e}")
 
 def load_rag():
-    global rag_texts, faiss_index
-    rag_texts   = []
-    faiss_index = faiss.IndexFlatL2(dim)
-    if os.path.exists(HISTORY_FILE):
-        try:
-            raw = json.load(open(HISTORY_FILE, "r", encoding="utf-8"))
-            if isinstance(raw, list) and raw:
-                rag_texts = raw
-                emb = embedder.encode(rag_texts, convert_to_numpy=True)
-                if emb.ndim == 1:
-                    emb = emb.reshape(1, -1)
-                faiss_index.add(emb)
-        except Exception as e:
-            logger.error(f"Failed to load RAG histories: {e}")
+    try:
+        rag_store.load()   # re-embeds the whole history
+    finally:
+        rag_store.start()
 
 atexit.register(save_rag)
-load_rag()
 
-# ─── Settings & Logging ────────────────────────────────────────────────────
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# FAQ / small-talk fast path (answers without the LLM, see faq.py)
+FAQ_FILE = os.path.join(BASE, "faq.json")
+faq      = FAQStore(embedder, FAQ_FILE)
 
+# warm-up order: what text replies need first, then voice, screenshots, the
+# RAG history (teach/research only) and finally the LM Studio models
+startup.register("embedder", load_embedder, priority=0)
+startup.register("faq",      faq.load,      priority=1)
+startup.register("tts",      tts.load,      priority=2)
+startup.register("blip",     load_blip,     priority=3)
+startup.register("rag",      load_rag,      priority=4)
+startup.register("llm",      lambda: get_router().warm(), priority=5)
+
+# ─── Settings ──────────────────────────────────────────────────────────────
 def load_settings():
     defaults = {
         "voice": "p231",
@@ -98,8 +121,20 @@ def save_settings(s):
         json.dump(s, f, ensure_ascii=False, indent=2)
     logger.info("Settings saved.")
 
+def parse_admin_ids(raw: str) -> set[int]:
+    """User ids from a comma/space separated list; anything non-numeric is skipped."""
+    ids = set()
+    for tok in raw.replace(",", " ").split():
+        if tok.isdigit():
+            ids.add(int(tok))
+        else:
+            logger.warning(f"DANZAR_ADMIN_IDS: ignoring {tok!r} (not a user id)")
+    return ids
+
 settings       = load_settings()
 DISCORD_TOKEN  = os.getenv("DISCORD_TOKEN") or ""
+# user ids allowed to run admin commands (the application owner always is)
+ADMIN_IDS      = parse_admin_ids(os.getenv("DANZAR_ADMIN_IDS", ""))
 if not DISCORD_TOKEN:
     raise RuntimeError("DISCORD_TOKEN not set")
 
@@ -111,17 +146,127 @@ intents.message_content = True
 intents.voice_states    = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
-request_queue = asyncio.Queue()
+
+def classify_request(item) -> int:
+    return PRIORITY_GUI if isinstance(item[2], GUIChannel) else default_classify(item)
+
+def discard_upload(path):
+    """Delete a downloaded screenshot once done with it (never the GUI's own)."""
+    if isinstance(path, str) and os.path.isfile(path) \
+            and os.path.abspath(path) != os.path.abspath(SCREENSHOT_PATH):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+async def notify_rejected(item, reason):
+    author, query, channel = item
+    discard_upload(query)    # shed or rejected screenshots are never answered
+    try:
+        await channel.send(
+            f"🚦 {author.display_name}, I'm swamped right now and had to drop your request"
+            f"{' to make room' if reason == 'shed' else ''} — please try again in a bit."
+        )
+    except Exception as e:
+        logger.warning(f"Could not notify about {reason} request: {e}")
+
+# ─── Request Journal ───────────────────────────────────────────────────────
+JOURNAL_FILE = os.path.join(BASE, "requests.sqlite3")
+WORKERS      = int(os.getenv("DANZAR_WORKERS", "0"))   # processes for OCR + captioning; 0 = in the bot
+JOB_TIMEOUT  = 120    # seconds to wait for a worker before analysing the image here
+journal      = RequestJournal(JOURNAL_FILE)   # open requests survive a crash (see request_journal.py)
+workers      = []
+
+def encode_request(item):
+    author, query, channel = item
+    if isinstance(channel, GUIChannel):   # local and gone after a restart anyway
+        return None
+    return {"author": author.id, "name": author.display_name, "channel": channel.id,
+            "query": query, "image": os.path.isfile(query)}
+
+async def decode_request(p):
+    """Journal payload back to a queue item; None if it can't be answered any more."""
+    if p["image"] and not os.path.isfile(p["query"]):
+        return None
+    try:
+        channel = bot.get_channel(p["channel"]) or await bot.fetch_channel(p["channel"])
+    except Exception as e:
+        logger.warning(f"Journal: channel {p['channel']} unavailable: {e}")
+        return None
+    if channel is None:
+        return None
+    return SimpleNamespace(id=p["author"], display_name=p["name"]), p["query"], channel
+
+_replayed = False
+
+async def replay_journal():
+    """Queue the requests a previous run accepted but never answered (once per process)."""
+    global _replayed
+    if _replayed:
+        return
+    _replayed = True
+    await run_blocking(journal.prune)
+    jobs = await run_blocking(journal.unacked, "request")
+    for job in jobs:
+        item = await decode_request(job.payload)
+        if item is None:
+            await run_blocking(journal.ack, job.id, status="dropped")
+        else:
+            request_queue.put_nowait(item, jid=job.id)
+    if jobs:
+        logger.info(f"Journal: replayed {len(jobs)} unanswered requests")
+
+# priority classes, bounded, merges back-to-back messages (see request_scheduler.py)
+request_queue = RequestScheduler(
+    classify=classify_request, on_reject=notify_rejected,
+    on_wait=lambda item, waited: observe("queue_wait", waited),
+    journal=journal, encode=encode_request,
+)
 
 # ─── Context Buffer ─────────────────────────────────────────────────────────
-MAX_HISTORY    = 6
-chat_histories = {}  # channel_id -> history list
-root_topics    = {}  # channel_id -> root query
+MEMORY_FILE = os.path.join(BASE, "conversations.json")
+memory      = ConversationMemory(MEMORY_FILE)   # per-channel turns, topic, rolling summary
+
+def save_memory():
+    try:
+        memory.save()
+    except Exception as e:
+        logger.warning(f"Could not save conversation memory: {e}")
+
+try:
+    memory.load()
+except Exception as e:
+    logger.error(f"Failed to load conversation memory: {e}")
+atexit.register(save_memory)
+
+async def summarize_turns(prev: str, msgs: list[dict]) -> str:
+    """Fold turns that scrolled out of the history into the running summary."""
+    convo = "\n".join(f"{m['role']}: {m['content']}" for m in msgs)
+    return await llm_respond([
+        {"role": "system", "content": "You keep short running summaries of chat conversations."},
+        {"role": "user",   "content": (
+            f"Current summary:\n{prev or '(none)'}\n\nNew messages:\n{convo}\n\n"
+            "Rewrite the summary to include the new messages, in at most 5 sentences. "
+            "Keep names, facts and open questions."
+        )},
+    ], task="conversation_summary")
+
+lag_monitor = LoopLagMonitor()
+watchdog    = LoopWatchdog()   # logs whatever holds the loop past DANZAR_BLOCK_THRESHOLD
+# system prefix stays byte-identical across requests (see prompt_builder.py)
+prompt_builder = PromptBuilder(lambda: settings["personality"])
 
 @bot.event
 async def on_ready():
+    startup.end("discord_connect")
     logger.info(f"Logged in as {bot.user}")
+    startup.start()   # no-op unless imported without running __main__
     bot.loop.create_task(_process_queue())
+    await replay_journal()
+    lag_monitor.start()
+    watchdog.start()
+    serve_metrics()   # Prometheus text on 127.0.0.1:DANZAR_METRICS_PORT/metrics
+    memory.start(summarize_turns)
     chan = settings.get("auto_join_channel")
     if chan:
         try:
@@ -140,114 +285,281 @@ async def on_message(msg):
     if re.search(mention_pattern, msg.content):
         text = re.sub(mention_pattern, "", msg.content).strip()
         cid  = msg.channel.id
-        if cid not in root_topics and text:
-            root_topics[cid] = text
+        if text:
+            memory.set_topic(cid, text)
 
         # Handle image attachments
         if msg.attachments:
             os.makedirs("downloads", exist_ok=True)
             for att in msg.attachments:
                 if att.content_type and att.content_type.startswith("image/"):
-                    path = os.path.join("downloads", att.filename)
+                    # Discord calls most pasted screenshots "image.png": keep uploads apart
+                    path = os.path.join("downloads", f"{msg.id}_{att.id}_{att.filename}")
                     await att.save(path)
-                    caption = caption_image(path)
-                    await msg.channel.send(f"I’ve analyzed your screenshot. **{caption}**")
-                    await request_queue.put((msg.author, path, msg.channel))
+                    # analysed once the scheduler serves it, behind any text waiting
+                    if not await request_queue.put((msg.author, path, msg.channel)):
+                        discard_upload(path)
         if text:
             await request_queue.put((msg.author, text, msg.channel))
         return
 
     await bot.process_commands(msg)
 
+# ─── Teach / Research Sessions ─────────────────────────────────────────────
+@bot.command(name="teach")
+async def teach_cmd(ctx, turns: int, *, topic: str):
+    """!teach <turns> <topic> — search/summarize/follow-up loop in this channel."""
+    from teach import teaching_session
+    await _warmed(ctx.channel, "rag", "the knowledge base")
+    try:
+        start_session(ctx.channel.id, teaching_session(topic, turns, ctx.channel))
+    except RuntimeError as e:
+        await ctx.send(f"⚠️ {e} (use !stop first)")
+
+@bot.command(name="research")
+async def research_cmd(ctx, minutes: int, *, topic: str):
+    """!research <minutes> <topic> — timed research session in this channel."""
+    from research import research_session
+    await _warmed(ctx.channel, "rag", "the knowledge base")
+    try:
+        start_session(ctx.channel.id, research_session(topic, minutes, ctx.channel))
+    except RuntimeError as e:
+        await ctx.send(f"⚠️ {e} (use !stop first)")
+
+@bot.command(name="stop")
+async def stop_cmd(ctx):
+    """Cancel the teach/research session running in this channel."""
+    if cancel_session(ctx.channel.id):
+        await ctx.send("🛑 Session cancelled.")
+    else:
+        await ctx.send("Nothing running here.")
+
+@bot.command(name="lag")
+async def lag_cmd(ctx):
+    """Event-loop lag over the last minute."""
+    snap = lag_monitor.snapshot()
+    if not snap["samples"]:
+        await ctx.send("No lag samples yet.")
+        return
+    await ctx.send(
+        f"⏱️ Loop lag — mean {snap['mean_ms']:.1f}ms, p95 {snap['p95_ms']:.1f}ms, "
+        f"p99 {snap['p99_ms']:.1f}ms, max {snap['max_ms']:.1f}ms ({snap['samples']} samples)"
+    )
+
+@bot.command(name="queue")
+async def queue_cmd(ctx):
+    """Request queue depth and what the scheduler merged or turned away."""
+    st = request_queue.stats
+    jst = (await run_blocking(journal.stats)).get("request", {})
+    await ctx.send(
+        f"📬 Queue — {request_queue.qsize()}/{request_queue.maxsize} waiting; "
+        f"{st['accepted']} accepted, {st['coalesced']} merged, {st['deduped']} duplicates, "
+        f"{st['shed']} shed, {st['rejected']} rejected\n"
+        f"🗄️ Journal — {jst.get('pending', 0) + jst.get('claimed', 0)} unacknowledged, "
+        f"{jst.get('done', 0)} done; {len(workers)} image workers"
+    )
+
+async def is_admin(ctx) -> bool:
+    return ctx.author.id in ADMIN_IDS or await bot.is_owner(ctx.author)
+
+@bot.command(name="profile")
+@commands.check(is_admin)
+async def profile_cmd(ctx, seconds: int = 30):
+    """Admin: sample every thread's stack for `seconds` and upload a flamegraph file."""
+    loop = asyncio.get_running_loop()
+
+    def done(path, prof):
+        top = "\n".join(f"{n:>6}  {frame}" for frame, n in prof.top(5))
+        asyncio.run_coroutine_threadsafe(ctx.send(
+            f"🔥 Profile done ({prof.ticks} samples, {watchdog.stalls} loop stalls so far). "
+            f"Hottest frames:\n```\n{top}\n```", file=discord.File(path)
+        ), loop)
+
+    if start_profile(seconds, on_done=done):
+        await ctx.send(f"🔬 Profiling the whole process for {seconds}s…")
+    else:
+        await ctx.send("A profile is already running.")
+
+@profile_cmd.error
+async def profile_error(ctx, error):
+    if isinstance(error, commands.CheckFailure):
+        await ctx.send("⛔ Only admins can profile the bot.")
+    else:
+        raise error
+
+@bot.command(name="stats")
+async def stats_cmd(ctx):
+    """Per-stage latency of the request pipeline and sessions."""
+    snap = trace_snapshot()
+    if not snap:
+        await ctx.send("No timings recorded yet.")
+        return
+    rows = [f"{'stage':<30} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8}"]
+    for name, st in snap.items():
+        rows.append(f"{name[:30]:<30} {st['count']:>5} {st['p50_s']:>7.2f}s "
+                    f"{st['p95_s']:>7.2f}s {st['p99_s']:>7.2f}s")
+    await ctx.send("📊 Pipeline timings\n```\n" + "\n".join(rows)[:1900] + "\n```")
+
+@bot.command(name="startup")
+async def startup_cmd(ctx):
+    """Cold-start timeline: imports, Discord connect and each model load."""
+    await ctx.send(f"🚀 Startup ({STARTUP_MODE})\n```\n{startup.report()}\n```")
+
+@bot.command(name="faq")
+async def faq_cmd(ctx):
+    """How often the FAQ fast path answered without the LLM."""
+    r = faq.report()
+    await ctx.send(
+        f"⚡ FAQ — {r['hits']} hits / {r['misses']} misses ({r['hit_rate']:.0%}), "
+        f"{r['match_ms']:.1f}ms per lookup vs {r['llm_avg_s']:.1f}s per LLM reply, "
+        f"~{r['saved_s']:.0f}s saved, {r['learned']} learned"
+    )
+
+@bot.command(name="models")
+async def models_cmd(ctx):
+    """Calls and latency per model route."""
+    m = get_router().metrics()
+    lines = [f"🔀 Model routes ({m.pop('fallbacks')} fallbacks to large):"]
+    for name, r in m.items():
+        lat = f", mean {r['mean_s']:.1f}s, p95 {r['p95_s']:.1f}s" if "mean_s" in r else ""
+        lines.append(f"• {name}: {r['calls']} calls{lat}")
+    await ctx.send("\n".join(lines))
+
+@bot.command(name="memory")
+async def memory_cmd(ctx):
+    """RAG store size against its memory budget."""
+    mem = rag_store.memory()
+    mb  = lambda b: b / 2**20
+    await ctx.send(
+        f"🧠 RAG memory — {mem['entries']} entries ({mem['storage']}): "
+        f"{mb(mem['vector_bytes']):.1f} MB vectors (float32 would be {mb(mem['float32_vector_bytes']):.1f} MB) "
+        f"+ {mb(mem['text_bytes']):.1f} MB text = {mb(mem['total_bytes']):.1f} / "
+        f"{mb(mem['budget_bytes']):.0f} MB ({mem['budget_used']:.0%}), {mem['evicted']} evicted"
+    )
+
+async def _warmed(channel, name: str, what: str) -> bool:
+    """Wait for resource `name`, telling the channel if it is still loading."""
+    if not startup.ready(name):
+        await channel.send(f"⏳ Still loading {what}, your request is queued…")
+    return await startup.wait(name)
+
+async def analyze(path: str, channel) -> dict:
+    """OCR + caption for an image, in a worker process if any are running."""
+    if workers:
+        jid = await run_blocking(journal.append, "image_analysis", {"path": os.path.abspath(path)})
+        try:
+            with span("image_analysis", where="worker"):
+                return await journal.wait(jid, JOB_TIMEOUT)
+        except (TimeoutError, RuntimeError) as e:
+            await run_blocking(journal.cancel, jid)
+            logger.warning(f"Image worker gave no result ({e}); analysing here")
+    await _warmed(channel, "blip", "the image model")
+    with span("image_analysis", where="local"):
+        return await run_blocking(analyze_image, path)
+
 async def _process_queue():
     while True:
-        author, query, channel = await request_queue.get()
-        cid = getattr(channel, "id", None)
-
-        # ─── IMAGE branch ────────────────────────────────────────────────
-        if isinstance(query, str) and os.path.isfile(query):
-            try:
-                # OCR
-                img_obj   = Image.open(query).convert("RGB")
-                extracted = pytesseract.image_to_string(img_obj, config="--psm 6").strip()
-            except TesseractNotFoundError:
-                extracted = ""
-            except Exception as e:
-                extracted = ""
-                logger.warning(f"OCR error: {e}")
-
-            # Caption (before any deletion)
+        item = await request_queue.get()
+        try:
+            await _answer(item)
+        except Exception as e:
+            # one bad request must not stop the consumer
+            logger.exception(f"Request from {getattr(item[0], 'display_name', item[0])} failed")
+            request_queue.fail(item, str(e))
             try:
-                caption = caption_image(query)
-            except Exception as e:
-                caption = f"[Caption error: {e}]"
-
-            # Only delete if not the GUI screenshot
-            if os.path.abspath(query) != os.path.abspath(SCREENSHOT_PATH):
-                try:
-                    os.remove(query)
-                except:
-                    pass
-
-            msgs = [
-                {"role":"system", "content": settings["personality"]},
-                {"role":"user",   "content": f"Image Caption:\n{caption}\nOCR Text:\n{extracted}"}
-            ]
-            chat = lms.Chat.from_history({"messages": msgs})
-            reply = lms.llm("gemma-3-12b-it").respond(chat).content.strip()
-
-        # ─── TEXT branch ─────────────────────────────────────────────────
-        else:
-            # small-talk bypass
-            if isinstance(query, str) and re.match(r"^(hi|hello|hey|how are you)\b", query, re.I):
-                canned = {
-                    "hi":    "Hey there! How can I help today?",
-                    "hello": "Hello! What would you like to talk about?",
-                    "hey":   "Hey! What’s on your mind?"
-                }
-                reply = canned.get(query.lower().split()[0], "Hi! What can I do for you?")
-                placeholder = await channel.send(f"{author.display_name} Thinking…")
-                await placeholder.edit(content=reply)
-                request_queue.task_done()
-                continue
-
-            hist = chat_histories.setdefault(cid, [])
-            root = root_topics.get(cid, query)
-            sys_txt = settings["personality"] + f"\n\nStay on topic: '{root}'."
-            messages = [{"role":"system","content": sys_txt}]
-            messages += hist[-MAX_HISTORY:]
-            messages.append({"role":"user", "content": query})
-
-            chat  = lms.Chat.from_history({"messages": messages})
-            reply = lms.llm("gemma-3-12b-it").respond(chat).content.strip()
-
-            # update history
-            hist.append({"role":"user",      "content": query})
-            hist.append({"role":"assistant", "content": reply})
-            if len(hist) > 2*MAX_HISTORY:
-                hist.pop(0); hist.pop(0)
-
-        # ─── Respond + TTS (preserve <think> for GUI) ────────────────────
+                await item[2].send(f"⚠️ Sorry, that one failed: {e}")
+            except Exception:
+                pass
+        except asyncio.CancelledError:
+            request_queue.fail(item, "cancelled")   # replayed on the next start
+            raise
+        finally:
+            request_queue.task_done(item)
+
+async def _answer(item):
+    """Reply to one (author, query, channel) request from the queue."""
+    author, query, channel = item
+    cid  = getattr(channel, "id", None)
+    t_rq = time.perf_counter()
+
+    # ─── IMAGE branch ────────────────────────────────────────────────
+    if isinstance(query, str) and os.path.isfile(query):
+        kind = "image"
+        analysis = await analyze(query, channel)   # raises: file kept for the journal replay
+        await channel.send(f"I’ve analyzed your screenshot. **{analysis['caption']}**")
+        discard_upload(query)
+
+        msgs = prompt_builder.build(
+            [], f"Image Caption:\n{analysis['caption']}\nOCR Text:\n{analysis['ocr']}", key=cid
+        )
+        reply = await llm_respond(msgs, task="image")
+
+    # ─── TEXT branch ─────────────────────────────────────────────────
+    else:
+        kind = "text"
+        # FAQ / small-talk fast path: answered straight away, no placeholder
+        with span("faq_match"):
+            # skipped, not waited for, while the embedder is still loading
+            hit = await run_blocking(faq.match, query) if startup.ready("faq") else None
+        if hit:
+            logger.info(f"FAQ hit {hit.question!r} ({hit.score:.2f}) in {hit.seconds * 1000:.1f}ms")
+            with span("discord_send"):
+                await channel.send(hit.answer if isinstance(channel, GUIChannel)
+                                   else f"{author.display_name}: {hit.answer}")
+            observe("request", time.perf_counter() - t_rq, kind="faq")
+            return
+
+        history, summary = memory.history(cid), memory.summary(cid)
+        with span("prompt_build"):
+            messages = prompt_builder.build(
+                history, query, topic=memory.topic(cid) or query,
+                summary=summary, key=cid,
+            )
+
+        t0    = time.perf_counter()
+        reply = await llm_respond(messages, task="chat")   # small or 12B, see model_router.py
+        # a reply shaped by this channel's history is no answer for everyone else
+        await run_blocking(faq.record_miss, query, reply, time.perf_counter() - t0,
+                           learn=not (history or summary))
+
+        # update history (older turns get summarized in the background)
+        memory.add_exchange(cid, query, reply)
+
+    # ─── Respond + TTS (preserve <think> for GUI) ────────────────────
+    with span("discord_send"):
         placeholder = await channel.send(f"{author.display_name} Thinking…")
 
-        # strip for TTS only
-        tts_text = re.sub(r"<think>.*?</think>", "", reply, flags=re.DOTALL)
-        tts_text = re.sub(r"https?://\S+", "", tts_text).strip()
-        wav = make_wav(tts_text)
+    # strip for TTS only
+    tts_text = re.sub(r"<think>.*?</think>", "", reply, flags=re.DOTALL)
+    tts_text = re.sub(r"https?://\S+", "", tts_text).strip()
+    if startup.ready("tts"):   # replies go out silently until the voice has loaded
+        with span("tts"):
+            wav = make_wav(tts_text)
         threading.Thread(target=play_wav, args=(wav,), daemon=True).start()
 
-        # GUIChannel gets raw reply so its DummyMessage can split out <think>
+    # GUIChannel gets raw reply so its DummyMessage can split out <think>
+    with span("discord_edit"):
         if isinstance(channel, GUIChannel):
             await placeholder.edit(content=reply)
         else:
             await placeholder.edit(content=f"{author.display_name}: {tts_text}")
 
-        request_queue.task_done()
+    observe("request", time.perf_counter() - t_rq, kind=kind)
+
+startup.end("import")
 
 if __name__ == "__main__":
+    if WORKERS:
+        workers = start_workers(WORKERS, JOURNAL_FILE)   # restarted if they die, see request_journal.py
+        atexit.register(workers.stop)
+    if STARTUP_MODE == "eager":
+        startup.start()
+        startup.wait_all()
+    startup.begin("discord_connect")
     threading.Thread(
         target=lambda: bot.run(DISCORD_TOKEN, reconnect=True),
         daemon=True
     ).start()
+    startup.start()
     from gui import run_gui
     run_gui(bot, request_queue, settings, save_settings)
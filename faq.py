@@ -0,0 +1,184 @@
+# faq.py
+"""
+Fast path for FAQs and small talk: answer from a store of known questions
+instead of calling the LLM.
+
+- curated entries live in FAQ_FILE ({"q": [phrasings…], "a": answer});
+  DEFAULT_FAQ seeds it with the greetings the old regex bypass handled
+- an incoming message is checked against the exact (normalized) phrasings
+  first, then embedded once and compared by cosine similarity; a match at
+  or above THRESHOLD is answered immediately
+- with LEARN on, a short question asked LEARN_AFTER times gets its latest
+  LLM answer (minus any <think> block) saved as a learned entry; answers
+  that leaned on channel history aren't learned
+- the embedder is synchronous: call match/record_miss off the event loop
+- hits, misses and the LLM time saved are counted for `report()`
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+THRESHOLD      = float(os.getenv("DANZAR_FAQ_THRESHOLD", "0.85"))  # cosine for a hit
+LEARN          = os.getenv("DANZAR_FAQ_LEARN", "0") == "1"
+LEARN_AFTER    = 3     # identical misses before an answer is learned
+LEARN_MAX_WORDS = 12   # only short, FAQ-like questions are learned
+DEFAULT_FAQ = [
+    {"q": ["hi", "hi there", "hiya"], "a": "Hey there! How can I help today?"},
+    {"q": ["hello", "hello there"], "a": "Hello! What would you like to talk about?"},
+    {"q": ["hey", "hey there", "yo"], "a": "Hey! What’s on your mind?"},
+    {"q": ["how are you", "how are you doing", "how's it going"],
+     "a": "Crackling with arcane energy, thanks for asking! What can I do for you?"},
+    {"q": ["who are you", "what are you", "what is your name"],
+     "a": "I’m Danzar, an elemental mage with a sharp wit — and your resident assistant."},
+    {"q": ["what can you do", "help", "what commands are there"],
+     "a": "Mention me with a question or a screenshot. I can also !teach <turns> <topic> "
+          "and !research <minutes> <topic>; !stop ends a session."},
+    {"q": ["thanks", "thank you", "thx"], "a": "Any time!"},
+]
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split()).strip(" ?.!,")
+
+
+def strip_think(text: str) -> str:
+    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+
+
+@dataclass
+class FAQHit:
+    answer: str
+    question: str
+    score: float
+    seconds: float
+
+
+class FAQStore:
+    def __init__(self, embedder, path: str | None = None, threshold: float = THRESHOLD,
+                 learn: bool = LEARN):
+        self.embedder  = embedder
+        self.path      = path
+        self.threshold = threshold
+        self.learn     = learn
+        self.entries   = []          # {"q": [...], "a": str, "learned": bool}
+        self.stats     = {"hits": 0, "misses": 0, "learned": 0}
+        self._match_s  = 0.0         # total time spent matching
+        self._llm_s    = 0.0         # total LLM time on misses
+        self._llm_n    = 0
+        self._asked    = Counter()   # normalized miss -> times asked
+        self._lock     = threading.Lock()   # index swaps and the counters (match runs on several threads)
+        self._learning = threading.Lock()   # one learner at a time (entries + file)
+        self._exact    = {}
+        self._vecs     = np.zeros((0, 0), dtype="float32")
+        self._owner    = []          # row -> entry index
+
+    # ─── store ─────────────────────────────────────────────────────────────────
+    def load(self):
+        entries = DEFAULT_FAQ
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        self.entries = [dict(e, learned=e.get("learned", False)) for e in entries
+                        if e.get("q") and e.get("a")]
+        self._rebuild()
+        logger.info(f"FAQ: {len(self.entries)} entries, {len(self._owner)} phrasings")
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def _rebuild(self):
+        phrasings, owner, exact = [], [], {}
+        for i, e in enumerate(self.entries):
+            for q in e["q"]:
+                phrasings.append(q)
+                owner.append(i)
+                exact[normalize(q)] = i
+        vecs = self._embed(phrasings) if phrasings else np.zeros((0, 0), dtype="float32")
+        with self._lock:
+            self._vecs, self._owner, self._exact = vecs, owner, exact
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        emb = np.asarray(self.embedder.encode(texts, convert_to_numpy=True), dtype="float32")
+        emb = emb.reshape(len(texts), -1)
+        return emb / np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+
+    # ─── lookup ────────────────────────────────────────────────────────────────
+    def match(self, text: str) -> FAQHit | None:
+        """The stored answer for `text`, or None if nothing is close enough."""
+        t0   = time.perf_counter()
+        norm = normalize(text)
+        with self._lock:
+            i = self._exact.get(norm)
+        if i is not None:
+            hit = (i, 1.0)
+        elif not norm or not len(self._owner):
+            hit = None
+        else:
+            q = self._embed([norm])[0]
+            with self._lock:
+                sims = self._vecs @ q
+                row  = int(np.argmax(sims))
+                hit  = (self._owner[row], float(sims[row])) if sims[row] >= self.threshold else None
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self._match_s += elapsed
+            self.stats["hits" if hit else "misses"] += 1
+        if hit is None:
+            return None
+        e = self.entries[hit[0]]
+        return FAQHit(strip_think(e["a"]), e["q"][0], hit[1], elapsed)
+
+    def record_miss(self, text: str, answer: str, llm_seconds: float, learn: bool = True):
+        """
+        Report the LLM's answer to a miss (for latency stats and learning).
+        `learn=False` when the answer depended on context another asker won't share.
+        """
+        with self._lock:
+            self._llm_s += llm_seconds
+            self._llm_n += 1
+        norm   = normalize(text)
+        answer = strip_think(answer)
+        if not (self.learn and learn and norm and answer) or len(norm.split()) > LEARN_MAX_WORDS:
+            return
+        with self._learning:
+            self._asked[norm] += 1
+            if self._asked[norm] < LEARN_AFTER:
+                return
+            del self._asked[norm]
+            self.entries.append({"q": [norm], "a": answer, "learned": True})
+            with self._lock:
+                self.stats["learned"] += 1
+            self._rebuild()
+            if self.path:
+                self.save()
+        logger.info(f"FAQ: learned an answer for {norm!r}")
+
+    # ─── stats ─────────────────────────────────────────────────────────────────
+    def report(self) -> dict:
+        with self._lock:   # one consistent snapshot of counts and timings
+            stats = dict(self.stats)
+            llm_s, llm_n, match_s = self._llm_s, self._llm_n, self._match_s
+        seen = stats["hits"] + stats["misses"]
+        llm_avg = llm_s / llm_n if llm_n else 0.0
+        match_avg = match_s / seen if seen else 0.0
+        return {
+            **stats,
+            "hit_rate": stats["hits"] / seen if seen else 0.0,
+            "match_ms": match_avg * 1000,
+            "llm_avg_s": llm_avg,
+            "saved_s": stats["hits"] * max(0.0, llm_avg - match_avg),
+        }
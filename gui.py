@@ -10,6 +10,9 @@ import pyautogui
 
 from .teach import research_session, teaching_session
 from .teach_plugin import teach_callback          # External plugin for “Teach” logic
+from profiler import start_profile                 # Live sampling profiler (see DanzarAI/profiler.py)
+
+PROFILE_SECONDS = 30
 
 # ——————————————————————————————————————————————
 # Main window setup
@@ -43,10 +46,12 @@ send_btn       = ttk.Button(btn_frame, text="Send")
 screenshot_btn = ttk.Button(btn_frame, text="Screenshot")
 research_btn   = ttk.Button(btn_frame, text="Research")
 teach_btn      = ttk.Button(btn_frame, text="Teach")
+profile_btn    = ttk.Button(btn_frame, text="Profile")
 
 send_btn.pack(side="left")
 screenshot_btn.pack(side="left", padx=5)
 research_btn.pack(side="left", padx=5)
+profile_btn.pack(side="left", padx=5)
 teach_btn.pack(side="right")
 
 # ——————————————————————————————————————————————
@@ -64,12 +69,25 @@ def on_research():
     # Your existing research logic goes here
     pass
 
+def on_profile():
+    # Sample the running process; report back on the Tk thread when done
+    def done(path, prof):
+        root.after(0, lambda: (conv.insert("end", f"🔥 Profile ({prof.ticks} samples) → {path}\n"),
+                               profile_btn.config(state="normal")))
+
+    if start_profile(PROFILE_SECONDS, on_done=done):
+        profile_btn.config(state="disabled")
+        conv.insert("end", f"🔬 Profiling for {PROFILE_SECONDS}s…\n")
+    else:
+        messagebox.showinfo("Profile", "A profile is already running.")
+
 # ——————————————————————————————————————————————
 # Wire up the commands to callbacks
 # ——————————————————————————————————————————————
 send_btn      .config(command=on_send)             # Standard button callback :contentReference[oaicite:10]{index=10}
 screenshot_btn.config(command=on_screenshot)
 research_btn  .config(command=on_research)
+profile_btn   .config(command=on_profile)
 
 # Teach button now calls the external plugin’s function,
 # passing in all relevant widgets and the root window
@@ -0,0 +1,116 @@
+# prompt_builder.py
+"""
+Token-budgeted chat prompts for _process_queue.
+
+- the system message is the personality text and nothing else, so it is
+  byte-identical on every request and LM Studio can reuse its cached prefix;
+  the per-channel topic and rolling summary ride along on the current user
+  turn instead
+- history is fitted newest-first into the remaining token budget, whole
+  user/assistant pairs at a time, and any single oversized message (a
+  pasted wall of text) is cut down to MAX_MESSAGE_TOKENS
+- every build is recorded so prompt sizes can be inspected later
+"""
+import os
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+PROMPT_TOKENS      = int(os.getenv("DANZAR_PROMPT_TOKENS", "3072"))  # whole prompt
+MAX_MESSAGE_TOKENS = 768    # longest single history message kept verbatim
+MESSAGE_OVERHEAD   = 4      # role markers etc. per message
+STATS_WINDOW       = 500    # recent builds kept for stats
+CHARS_PER_TOKEN    = 4      # same rough ratio as utils/compress.py
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+# local rather than imported from utils/: with DanzarAI/ on sys.path (as
+# danzar.py needs) `utils` resolves to DanzarAI/utils.py instead
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def clip(text: str, max_tokens: int, count=estimate_tokens) -> str:
+    """Keep the head and tail of `text` so it fits in about `max_tokens`."""
+    if count(text) <= max_tokens:
+        return text
+    keep = max(0, max_tokens * CHARS_PER_TOKEN - 20)
+    return text[:keep * 2 // 3] + " […] " + text[-(keep // 3):] if keep else ""
+
+
+class PromptBuilder:
+    """`system` is the system text, or a callable returning it (settings can change)."""
+
+    def __init__(self, system, budget: int = PROMPT_TOKENS,
+                 max_message_tokens: int = MAX_MESSAGE_TOKENS, count=estimate_tokens):
+        self.system = system
+        self.budget = budget
+        self.max_message_tokens = max_message_tokens
+        self.count  = count
+        self.records = deque(maxlen=STATS_WINDOW)
+
+    def _cost(self, msg: dict) -> int:
+        return self.count(msg["content"]) + MESSAGE_OVERHEAD
+
+    def user_turn(self, query: str, topic: str | None = None, summary: str = "") -> str:
+        """The current user message, carrying the summary and topic reminder when there are any."""
+        notes = []
+        if summary:
+            notes.append(f"(Earlier in this conversation: {summary})")
+        if topic and topic.strip() != query.strip():
+            notes.append(f"(Stay on topic: '{topic}'.)")
+        return "\n".join(notes) + "\n\n" + query if notes else query
+
+    def build(self, history: list[dict], query: str, topic: str | None = None,
+              summary: str = "", key=None) -> list[dict]:
+        """[system, *history that fits, user] within `budget` tokens."""
+        system = {"role": "system",
+                  "content": self.system() if callable(self.system) else self.system}
+        room   = self.budget - self._cost(system)
+        user   = {"role": "user", "content": self.user_turn(query, topic, summary)}
+        if self._cost(user) > room:
+            user["content"] = clip(user["content"], room - MESSAGE_OVERHEAD, self.count)
+        room -= self._cost(user)
+
+        kept = []
+        msgs = [dict(m, content=clip(m["content"], self.max_message_tokens, self.count))
+                for m in history]
+        # walk back one exchange at a time so a reply never loses its question
+        i = len(msgs)
+        while i > 0:
+            j = i - 1
+            if msgs[j]["role"] == "assistant" and j > 0 and msgs[j - 1]["role"] == "user":
+                j -= 1
+            cost = sum(self._cost(m) for m in msgs[j:i])
+            if cost > room:
+                break
+            kept[:0] = msgs[j:i]
+            room -= cost
+            i = j
+
+        messages = [system, *kept, user]
+        tokens   = self.budget - room
+        self.records.append({
+            "ts": time.time(), "key": key, "tokens": tokens,
+            "history": len(kept), "dropped": len(history) - len(kept),
+        })
+        logger.info(f"prompt {key}: {tokens} tokens, {len(kept)}/{len(history)} history messages")
+        return messages
+
+    def stats(self) -> dict:
+        """Prompt token counts over the recent window."""
+        s = sorted(r["tokens"] for r in self.records)
+        if not s:
+            return {"prompts": 0}
+        pick = lambda q: s[min(len(s) - 1, int(q * len(s)))]
+        return {
+            "prompts": len(s),
+            "mean_tokens": sum(s) / len(s),
+            "p50_tokens": pick(0.50),
+            "p95_tokens": pick(0.95),
+            "max_tokens": s[-1],
+            "trimmed": sum(1 for r in self.records if r["dropped"]),
+        }
@@ -1,11 +1,27 @@
-import requests
+from rag_client import get_client
 
-RAG_ENDPOINT = "http://localhost:5000/query"
+UNREACHABLE = "I’m having trouble reaching the RAG server."
 
 def query_rag(question: str) -> str:
     try:
-        resp = requests.post(RAG_ENDPOINT, json={"q": question})
-        data = resp.json() if resp.status_code == 200 else {}
-        return data.get("answer", "…")
+        return get_client().query(question).get("answer", "…")
     except Exception:
-        return "I’m having trouble reaching the RAG server."
+        return UNREACHABLE
+
+def query_rag_batch(questions: list[str]) -> list[str]:
+    try:
+        return [r.get("answer", "…") for r in get_client().query_batch(questions)]
+    except Exception:
+        return [UNREACHABLE] * len(questions)
+
+async def aquery_rag(question: str) -> str:
+    try:
+        return (await get_client().aquery(question)).get("answer", "…")
+    except Exception:
+        return UNREACHABLE
+
+async def aquery_rag_batch(questions: list[str]) -> list[str]:
+    try:
+        return [r.get("answer", "…") for r in await get_client().aquery_batch(questions)]
+    except Exception:
+        return [UNREACHABLE] * len(questions)
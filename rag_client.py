@@ -0,0 +1,149 @@
+# rag_client.py
+"""
+Pooled HTTP client for rag_server.py.
+
+One keep-alive connection pool is shared by every call, each request carries
+a (connect, read) timeout, and transient failures are retried with
+exponential backoff. `aquery`/`aquery_batch` do the same without blocking
+the event loop, and the batch variants send many questions in one round trip.
+
+A read timeout is never retried: the server may still be generating, and
+re-sending would start the whole LLM call again.
+"""
+
+import os
+import random
+import asyncio
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+RAG_BASE_URL    = os.getenv("RAG_BASE_URL", "http://localhost:5000")
+CONNECT_TIMEOUT = 3.0    # seconds to open a connection
+READ_TIMEOUT    = 120.0  # seconds to wait for an answer (LLM generation is slow)
+MAX_RETRIES     = 3      # retries on connect errors / 502 / 503 / 504 (not on read timeouts)
+BACKOFF_FACTOR  = 0.5    # sleeps 0.5s, 1s, 2s, … between retries
+POOL_SIZE       = 8      # keep-alive connections kept open to the server
+RETRY_STATUSES  = (502, 503, 504)
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+class RAGClient:
+    """Sync + async client for the `/query` and `/query_batch` endpoints."""
+
+    def __init__(
+        self,
+        base_url: str = RAG_BASE_URL,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF_FACTOR,
+        pool_size: int = POOL_SIZE,
+    ):
+        self.base_url  = base_url.rstrip("/")
+        self.timeout   = (connect_timeout, read_timeout)
+        self.retries   = retries
+        self.backoff   = backoff
+        self.pool_size = pool_size
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,           # a slow answer is not re-generated from scratch
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"POST"}),  # queries are idempotent
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._asession = None  # aiohttp.ClientSession, created on first async call
+
+    # ─── Sync API ──────────────────────────────────────────────────────────────
+    def _post(self, path: str, payload: dict) -> dict:
+        resp = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def query(self, question: str) -> dict:
+        """Ask one question. Returns the server JSON: {"answer": ..., "docs": [...]}."""
+        return self._post("/query", {"q": question})
+
+    def query_batch(self, questions: list[str]) -> list[dict]:
+        """Ask many questions in one request. Results come back in input order."""
+        if not questions:
+            return []
+        return self._post("/query_batch", {"qs": list(questions)})["results"]
+
+    # ─── Async API ─────────────────────────────────────────────────────────────
+    async def _get_asession(self):
+        import aiohttp  # ships with discord.py
+
+        if self._asession is None or self._asession.closed:
+            self._asession = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.timeout[0], sock_read=self.timeout[1]
+                ),
+            )
+        return self._asession
+
+    async def _apost(self, path: str, payload: dict) -> dict:
+        import aiohttp
+
+        session = await self._get_asession()
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.post(f"{self.base_url}{path}", json=payload) as resp:
+                    if resp.status in RETRY_STATUSES and attempt < self.retries:
+                        raise aiohttp.ClientResponseError(
+                            resp.request_info, resp.history, status=resp.status
+                        )
+                    resp.raise_for_status()
+                    return await resp.json()
+            except (aiohttp.ClientConnectionError, aiohttp.ClientResponseError,
+                    asyncio.TimeoutError) as e:
+                status = getattr(e, "status", None)
+                # only connect timeouts are retried, read timeouts mean the query is just slow
+                read_timeout = (isinstance(e, asyncio.TimeoutError)
+                                and not isinstance(e, getattr(aiohttp, "ConnectionTimeoutError", ())))
+                if attempt >= self.retries or read_timeout or (status and status not in RETRY_STATUSES):
+                    raise
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                logger.warning(f"RAG {path} failed ({e!r}); retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def aquery(self, question: str) -> dict:
+        return await self._apost("/query", {"q": question})
+
+    async def aquery_batch(self, questions: list[str]) -> list[dict]:
+        if not questions:
+            return []
+        return (await self._apost("/query_batch", {"qs": list(questions)}))["results"]
+
+    # ─── Cleanup ───────────────────────────────────────────────────────────────
+    def close(self):
+        self.session.close()
+
+    async def aclose(self):
+        if self._asession is not None and not self._asession.closed:
+            await self._asession.close()
+
+
+_default_client = None
+
+def get_client() -> RAGClient:
+    """Process-wide shared client, so every caller reuses the same pool."""
+    global _default_client
+    if _default_client is None:
+        _default_client = RAGClient()
+    return _default_client
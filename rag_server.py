@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
 import os
+from typing import List, Optional
+
+import numpy as np
 from flask import Flask, request, jsonify
 
 # ─── Override LlamaIndex defaults to use local HF embeddings ─────────────
@@ -24,12 +27,95 @@ llm = LMStudio(
 storage_context = StorageContext.from_defaults(persist_dir="./index_storage")
 index = load_index_from_storage(storage_context)
 
+# ─── Context compression (retrieval → compress → generation) ─────────────
+# Wiki chunks are long and mostly irrelevant to any one question, and prefill
+# time on CPU grows with prompt length, so only the most query-relevant,
+# non-redundant sentences are handed to the LLM.
+from llama_index.core.bridge.pydantic import Field
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+from utils.compress import compress_context
+from DanzarAI.tracing import span, render_prometheus
+
+COMPRESS_CONTEXT = os.environ.get("RAG_COMPRESS", "1") != "0"
+CONTEXT_TOKENS   = int(os.environ.get("RAG_CONTEXT_TOKENS", 768))
+SIMILARITY_TOP_K = int(os.environ.get("RAG_TOP_K", 4))
+
+class ContextCompressor(BaseNodePostprocessor):
+    """Keeps only the top MMR-ranked sentences of the retrieved nodes."""
+
+    token_budget: int = Field(default=CONTEXT_TOKENS)
+    mmr_lambda: float = Field(default=0.7)
+    chunk_dup_threshold: float = Field(default=0.92)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ContextCompressor"
+
+    def _postprocess_nodes(
+        self,
+        nodes: List[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None,
+    ) -> List[NodeWithScore]:
+        if not nodes or query_bundle is None:
+            return nodes
+
+        def embed(texts):
+            return np.array(Settings.embed_model.get_text_embedding_batch(texts))
+
+        kept = compress_context(
+            query_bundle.query_str,
+            [n.node.get_content() for n in nodes],
+            embed,
+            token_budget=self.token_budget,
+            lam=self.mmr_lambda,
+            chunk_dup_threshold=self.chunk_dup_threshold,
+        )
+        # new nodes, so the docstore's cached originals are never mutated
+        return [
+            NodeWithScore(
+                node=TextNode(text=text, metadata=nodes[i].node.metadata),
+                score=nodes[i].score,
+            )
+            for i, text in kept
+        ]
+
+def make_query_engine(compress: bool = COMPRESS_CONTEXT, top_k: int = SIMILARITY_TOP_K, **kwargs):
+    postprocessors = [ContextCompressor(token_budget=CONTEXT_TOKENS)] if compress else []
+    return index.as_query_engine(
+        llm=llm,
+        similarity_top_k=top_k,
+        node_postprocessors=postprocessors,
+        **kwargs,
+    )
+
 # Create a RAG‑capable query engine
-query_engine = index.as_query_engine(llm=llm)
+query_engine = make_query_engine()
 
 # ─── Flask app setup ──────────────────────────────────────────────────────
 app = Flask(__name__)
 
+def _answer(user_q: str) -> dict:
+    # 1) Run Retrieval (+ compression), then Generation — what .query() does, timed per stage
+    bundle = QueryBundle(user_q)
+    with span("rag_retrieve"):
+        nodes = query_engine.retrieve(bundle)
+    with span("rag_generate"):
+        response = query_engine.synthesize(bundle, nodes)
+    answer = str(response)
+
+    # 2) Extract the raw source chunks used
+    docs = []
+    if hasattr(response, "source_nodes"):
+        docs = [node.get_content() for node in response.source_nodes]
+
+    return {"answer": answer, "docs": docs}
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus text format: per-stage latency histograms."""
+    return render_prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
 @app.route("/query", methods=["POST"])
 def query():
     """
@@ -44,19 +130,26 @@ def query():
     if not user_q:
         return jsonify({"error": "No question provided"}), 400
 
-    # 1) Run Retrieval + Generation
-    response = query_engine.query(user_q)
-    answer = str(response)
+    with span("rag_request"):
+        return jsonify(_answer(user_q))
 
-    # 2) Extract the raw source chunks used
-    docs = []
-    if hasattr(response, "source_nodes"):
-        docs = [node.get_content() for node in response.source_nodes]
+@app.route("/query_batch", methods=["POST"])
+def query_batch():
+    """
+    Expects JSON payload: { "qs": ["<question 1>", "<question 2>", ...] }
+    Returns JSON: { "results": [ {"answer": ..., "docs": [...]}, ... ] }
+    in the same order as "qs". Blank questions get {"error": ...}.
+    """
+    data = request.get_json(force=True)
+    qs = data.get("qs")
+    if not isinstance(qs, list) or not qs:
+        return jsonify({"error": "No questions provided"}), 400
 
-    return jsonify({
-        "answer": answer,
-        "docs": docs
-    })
+    results = []
+    for q in qs:
+        q = str(q or "").strip()
+        results.append(_answer(q) if q else {"error": "No question provided"})
+    return jsonify({"results": results})
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
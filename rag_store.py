@@ -0,0 +1,439 @@
+# rag_store.py
+"""
+Shared, thread-safe RAG store: texts + FAISS index behind one object.
+
+Everything that reads or writes RAG memory (the bot loop, teach/research
+sessions, the GUI thread, worker pools) holds a reference to the same
+RAGStore, so nothing can go stale when the history is reloaded.
+
+- writes: `add_many` only queues text (cheap, never blocks the event loop);
+  a background flusher embeds queued text in batches and appends texts and
+  vectors together under the write lock
+- dedupe: each new vector is compared with its nearest stored neighbour
+  (and the rest of its batch); anything at or above DEDUP_THRESHOLD cosine
+  is dropped, or with policy "merge" folded into the existing entry by
+  keeping the longer text. Counts are kept in `dedup_stats`
+- storage: vectors are kept as float16 codes by default (half the memory,
+  near-identical distances) or, with RAG_STORAGE=pq, as product-quantized
+  codes once PQ_TRAIN_SIZE entries exist to train on; PQ searches can
+  re-rank their candidates exactly by re-embedding the candidate texts
+- eviction: every entry carries (added time, priority); when the store goes
+  over MAX_ENTRIES or MEMORY_BUDGET_MB, the lowest-priority, oldest entries
+  are removed. `memory()` reports usage against the budget
+- reads: `search` embeds the query outside any lock, then searches under a
+  shared read lock, so readers never see a half-applied batch and never
+  block each other
+"""
+import os
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+import faiss
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+FLUSH_SIZE     = 16    # flush as soon as this many texts are queued
+FLUSH_INTERVAL = 2.0   # …or after this many seconds
+DEDUP_THRESHOLD = 0.95 # cosine at/above which a new entry is a near-duplicate (None = off)
+DEDUP_POLICY    = "merge"  # "drop" the newcomer, or "merge" (keep the longer text)
+
+STORAGE          = os.getenv("RAG_STORAGE", "fp16")     # "flat" (float32), "fp16" or "pq"
+PQ_M             = 48     # sub-quantizers (bytes per vector at 8 bits); rounded to divide dim
+PQ_NBITS         = 8
+PQ_TRAIN_SIZE    = 10000  # pq mode stores fp16 until this many vectors exist (~39 per centroid)
+RERANK           = os.getenv("RAG_RERANK", "1") == "1"  # exact re-rank of PQ candidates
+RERANK_FACTOR    = 4      # candidates fetched per requested result when re-ranking
+MEMORY_BUDGET_MB = float(os.getenv("RAG_MEMORY_MB", "64"))   # vectors + texts
+MAX_ENTRIES      = int(os.getenv("RAG_MAX_ENTRIES", "0"))    # 0 = no entry cap
+EVICT_TO         = 0.9    # evict down to this fraction of the limit, not just under it
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+class _RWLock:
+    """Many readers or one writer; writers aren't starved by a stream of readers."""
+
+    def __init__(self):
+        self._cond    = threading.Condition()
+        self._readers = 0
+        self._writer  = False
+        self._waiting = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    class _Ctx:
+        def __init__(self, enter, exit_):
+            self._enter, self._exit = enter, exit_
+
+        def __enter__(self):
+            self._enter()
+
+        def __exit__(self, *exc):
+            self._exit()
+
+    def read(self):
+        return self._Ctx(self.acquire_read, self.release_read)
+
+    def write(self):
+        return self._Ctx(self.acquire_write, self.release_write)
+
+
+class RAGStore:
+    def __init__(self, embedder, path: str | None = None,
+                 flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 dedup_threshold: float | None = DEDUP_THRESHOLD, dedup_policy: str = DEDUP_POLICY,
+                 storage: str = STORAGE, rerank: bool = RERANK,
+                 memory_budget_mb: float = MEMORY_BUDGET_MB, max_entries: int = MAX_ENTRIES):
+        self.embedder       = embedder
+        self.dim            = embedder.get_sentence_embedding_dimension()
+        self.path           = path
+        self.flush_size     = flush_size
+        self.flush_interval = flush_interval
+        self.dedup_threshold = dedup_threshold
+        self.dedup_policy   = dedup_policy
+        self.dedup_stats    = {"seen": 0, "added": 0, "dropped": 0, "merged": 0}
+        if storage not in ("flat", "fp16", "pq"):
+            raise ValueError(f"unknown RAG storage {storage!r}")
+        self.storage        = storage
+        self.rerank         = rerank
+        self.budget_bytes   = int(memory_budget_mb * 1024 * 1024)
+        self.max_entries    = max_entries
+        self.evicted        = 0
+
+        self._texts   = []
+        self._meta    = []                     # [added_ts, priority] per entry, index order
+        self._tbytes  = 0                      # utf-8 size of _texts
+        self._index   = self._new_index()
+        self._rw      = _RWLock()
+        self._pending = []
+        self._plock   = threading.Lock()       # guards _pending
+        self._flock   = threading.Lock()       # one flush at a time, keeps batch order
+        self._wake    = threading.Event()
+        self._stop    = threading.Event()
+        self._thread  = None
+
+    # ─── embedding ─────────────────────────────────────────────────────────────
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        emb = self.embedder.encode(texts, convert_to_numpy=True)
+        if emb.ndim == 1:
+            emb = emb.reshape(1, -1)
+        return np.ascontiguousarray(emb, dtype="float32")
+
+    # ─── vector storage ────────────────────────────────────────────────────────
+    def _new_index(self):
+        if self.storage == "flat":
+            return faiss.IndexFlatL2(self.dim)
+        # fp16, and pq until there is enough data to train its codebooks
+        return faiss.IndexScalarQuantizer(self.dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+
+    def _pq_m(self) -> int:
+        m = min(PQ_M, self.dim)
+        while self.dim % m:
+            m -= 1
+        return m
+
+    def _build_index(self, emb: np.ndarray):
+        """Index holding `emb`, trained as PQ when the store is in pq mode and `emb` is big enough."""
+        if self.storage == "pq" and len(emb) >= PQ_TRAIN_SIZE:
+            index = faiss.IndexPQ(self.dim, self._pq_m(), PQ_NBITS)
+            index.train(emb)
+        else:
+            index = self._new_index()
+        if len(emb):
+            index.add(emb)
+        return index
+
+    def _maybe_train_pq(self):
+        """Swap the fp16 staging index for a trained PQ one. Caller holds _flock."""
+        if self.storage != "pq" or isinstance(self._index, faiss.IndexPQ):
+            return
+        with self._rw.read():
+            if self._index.ntotal < PQ_TRAIN_SIZE:
+                return
+            vecs = self._index.reconstruct_n(0, self._index.ntotal)
+        t0 = time.perf_counter()
+        index = self._build_index(vecs)          # trains without blocking readers
+        with self._rw.write():
+            self._index = index
+        logger.info(f"RAG store: trained PQ codes on {len(vecs)} vectors "
+                    f"in {time.perf_counter() - t0:.1f}s")
+
+    # ─── writes ────────────────────────────────────────────────────────────────
+    def add_many(self, texts: list[str], priority: int = 0):
+        """
+        Queue texts for indexing. Returns immediately. Higher `priority`
+        entries are evicted after lower ones when the store is over budget.
+        """
+        now = time.time()
+        batch = [[t, priority, now] for t in texts if t and t.strip()]
+        if not batch:
+            return
+        with self._plock:
+            self._pending.extend(batch)
+            full = len(self._pending) >= self.flush_size
+        if full or self._thread is None:
+            self._wake.set()
+
+    def add(self, text: str, priority: int = 0):
+        self.add_many([text], priority)
+
+    def flush(self) -> int:
+        """Embed and index everything queued so far. Returns rows added."""
+        with self._flock:
+            with self._plock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            emb = self._embed([t for t, _, _ in batch])   # slow part, no store lock held
+            with self._rw.write():
+                keep = self._dedupe(batch, emb)
+                for i in keep:
+                    text, prio, ts = batch[i]
+                    self._texts.append(text)
+                    self._meta.append([ts, prio])
+                    self._tbytes += len(text.encode("utf-8"))
+                if keep:
+                    self._index.add(emb[keep])
+                self._evict()
+            self._maybe_train_pq()
+            return len(keep)
+
+    # ─── near-duplicate suppression ────────────────────────────────────────────
+    @staticmethod
+    def _unit(v: np.ndarray) -> np.ndarray:
+        return v / np.maximum(np.linalg.norm(v, axis=-1, keepdims=True), 1e-12)
+
+    def _dedupe(self, batch: list[str], emb: np.ndarray) -> list[int]:
+        """Row indices of `batch` to insert. Caller holds the write lock."""
+        st = self.dedup_stats
+        st["seen"] += len(batch)
+        if self.dedup_threshold is None:
+            st["added"] += len(batch)
+            return list(range(len(batch)))
+
+        unit = self._unit(emb)
+        nn_idx = np.full(len(batch), -1)
+        nn_sim = np.full(len(batch), -1.0)
+        if self._index.ntotal:
+            _, I = self._index.search(emb, 1)
+            nn_idx = I[:, 0]
+            stored = self._unit(np.vstack([self._index.reconstruct(int(i)) for i in nn_idx]))
+            nn_sim = (unit * stored).sum(axis=1)
+
+        keep = []
+        for i, (text, prio, ts) in enumerate(batch):
+            # duplicates inside this batch count too
+            if keep:
+                sims = unit[keep] @ unit[i]
+                j = int(np.argmax(sims))
+                if sims[j] >= self.dedup_threshold:
+                    self._absorb_pending(batch, keep[j], i)
+                    continue
+            if nn_sim[i] >= self.dedup_threshold:
+                j = int(nn_idx[i])
+                # seen again: the stored entry is worth keeping around longer
+                self._meta[j] = [ts, max(prio, self._meta[j][1])]
+                if self.dedup_policy == "merge" and len(text) > len(self._texts[j]):
+                    self._tbytes += len(text.encode("utf-8")) - len(self._texts[j].encode("utf-8"))
+                    self._texts[j] = text
+                    st["merged"] += 1
+                else:
+                    st["dropped"] += 1
+                continue
+            keep.append(i)
+        st["added"] += len(keep)
+        return keep
+
+    def _absorb_pending(self, batch: list[list], kept: int, dup: int):
+        batch[kept][1] = max(batch[kept][1], batch[dup][1])
+        if self.dedup_policy == "merge" and len(batch[dup][0]) > len(batch[kept][0]):
+            batch[kept][0] = batch[dup][0]
+            self.dedup_stats["merged"] += 1
+        else:
+            self.dedup_stats["dropped"] += 1
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Fraction of submitted texts that did not become new entries."""
+        st = self.dedup_stats
+        return 1 - st["added"] / st["seen"] if st["seen"] else 0.0
+
+    # ─── eviction ──────────────────────────────────────────────────────────────
+    def _code_size(self) -> int:
+        return self._index.code_size if hasattr(self._index, "code_size") else self.dim * 4
+
+    def _evict(self):
+        """Drop lowest-priority, oldest entries while over budget. Caller holds the write lock."""
+        n = len(self._texts)
+        if not n:
+            return
+        over_count = self.max_entries and n > self.max_entries
+        over_bytes = self.budget_bytes and n * self._code_size() + self._tbytes > self.budget_bytes
+        if not (over_count or over_bytes):
+            return
+        target = n
+        if over_count:
+            target = min(target, int(self.max_entries * EVICT_TO))
+        if over_bytes:
+            per_entry = self._code_size() + self._tbytes / n
+            target = min(target, int(self.budget_bytes * EVICT_TO / per_entry))
+        order = sorted(range(n), key=lambda i: (self._meta[i][1], self._meta[i][0]))
+        drop = sorted(order[:n - max(target, 0)])
+        # flat-code indexes compact in place and keep their order, so
+        # positions stay aligned with _texts after removal
+        self._index.remove_ids(faiss.IDSelectorBatch(np.array(drop, dtype="int64")))
+        gone = set(drop)
+        self._tbytes -= sum(len(self._texts[i].encode("utf-8")) for i in drop)
+        self._texts = [t for i, t in enumerate(self._texts) if i not in gone]
+        self._meta  = [m for i, m in enumerate(self._meta) if i not in gone]
+        self.evicted += len(drop)
+        logger.info(f"RAG store: evicted {len(drop)} entries, {len(self._texts)} left")
+
+    def memory(self) -> dict:
+        """Approximate bytes held by vectors and texts, against the configured budget."""
+        with self._rw.read():
+            n      = len(self._texts)
+            vec_b  = n * self._code_size()
+            text_b = self._tbytes
+            kind   = "pq" if isinstance(self._index, faiss.IndexPQ) else \
+                     "flat" if isinstance(self._index, faiss.IndexFlat) else "fp16"
+        total = vec_b + text_b
+        return {
+            "entries": n,
+            "storage": kind,
+            "vector_bytes": vec_b,
+            "text_bytes": text_b,
+            "total_bytes": total,
+            "float32_vector_bytes": n * self.dim * 4,
+            "budget_bytes": self.budget_bytes,
+            "budget_used": total / self.budget_bytes if self.budget_bytes else 0.0,
+            "evicted": self.evicted,
+        }
+
+    def _flusher(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("RAG flush failed")
+
+    def start(self):
+        """Start the background flusher (idempotent)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._flusher, name="rag-flush", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    # ─── reads ─────────────────────────────────────────────────────────────────
+    def search(self, query, k: int = 5) -> list[tuple[str, float]]:
+        """[(text, L2 distance), …] nearest to `query` (a string or a vector)."""
+        vec = self._embed([query]) if isinstance(query, str) else \
+            np.ascontiguousarray(np.asarray(query, dtype="float32").reshape(1, -1))
+        with self._rw.read():
+            if not self._index.ntotal:
+                return []
+            approx = isinstance(self._index, faiss.IndexPQ) and self.rerank
+            fetch  = k * RERANK_FACTOR if approx else k
+            D, I = self._index.search(vec, min(fetch, self._index.ntotal))
+            hits = [(self._texts[i], float(d)) for d, i in zip(D[0], I[0]) if i != -1]
+        if not approx:
+            return hits
+        # PQ distances are approximate: re-embed the candidates and rank exactly
+        exact = self._embed([t for t, _ in hits])
+        dist  = ((exact - vec) ** 2).sum(axis=1)
+        order = np.argsort(dist)[:k]
+        return [(hits[i][0], float(dist[i])) for i in order]
+
+    def snapshot(self) -> list[str]:
+        """Consistent copy of every indexed text, in index order."""
+        with self._rw.read():
+            return list(self._texts)
+
+    def __len__(self):
+        with self._rw.read():
+            return self._index.ntotal
+
+    @property
+    def pending(self) -> int:
+        with self._plock:
+            return len(self._pending)
+
+    # ─── persistence ───────────────────────────────────────────────────────────
+    def save(self, path: str | None = None):
+        path = path or self.path
+        self.flush()
+        with self._rw.read():
+            entries = [{"text": t, "ts": ts, "priority": prio}
+                       for t, (ts, prio) in zip(self._texts, self._meta)]
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        st = self.dedup_stats
+        if st["seen"]:
+            logger.info(f"RAG store: {st['seen']} submitted, {st['added']} added, "
+                        f"{st['dropped']} dropped, {st['merged']} merged as near-duplicates "
+                        f"({self.dedup_ratio:.0%} deduplicated)")
+        mem = self.memory()
+        logger.info(f"RAG store: {mem['entries']} entries ({mem['storage']}), "
+                    f"{mem['total_bytes'] / 2**20:.1f} MB of {mem['budget_bytes'] / 2**20:.0f} MB budget, "
+                    f"{mem['evicted']} evicted")
+
+    def load(self, path: str | None = None):
+        """Replace the store's contents with the texts saved at `path`."""
+        path = path or self.path
+        texts, meta = [], []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            now = time.time()
+            for e in raw if isinstance(raw, list) else []:
+                # older files hold plain strings
+                if isinstance(e, str):
+                    e = {"text": e}
+                if isinstance(e, dict) and isinstance(e.get("text"), str):
+                    texts.append(e["text"])
+                    meta.append([e.get("ts", now), e.get("priority", 0)])
+        t0 = time.perf_counter()
+        emb = self._embed(texts) if texts else np.zeros((0, self.dim), dtype="float32")
+        index = self._build_index(emb)
+        with self._flock, self._rw.write():
+            self._texts, self._meta, self._index = texts, meta, index
+            self._tbytes = sum(len(t.encode("utf-8")) for t in texts)
+            self._evict()
+        logger.info(f"RAG store: loaded {len(texts)} entries in {time.perf_counter() - t0:.1f}s")
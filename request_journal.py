@@ -0,0 +1,390 @@
+# request_journal.py
+"""
+Durable SQLite journal behind danzar's request queue, and a job queue for
+worker processes.
+
+- every request the scheduler accepts is appended as a "request" row before
+  it is queued and acknowledged once it has been answered; whatever is still
+  open on restart is replayed into the queue (requests that keep failing are
+  given up after MAX_ATTEMPTS)
+- CPU-heavy work (OCR + captioning of screenshots) can be submitted as job
+  rows of its own kind; worker processes started with
+
+      python request_journal.py worker [--kinds image_analysis]
+
+  claim them under a lease, run the handler from HANDLERS and store the
+  result for the bot to pick up. A worker that dies mid-job lets its lease
+  run out and the job goes to the next worker. Workers started by
+  start_workers() are restarted if they die and exit with the bot.
+
+The database runs in WAL mode so the bot and any number of workers on the
+same host can read and write it at once. Every call here blocks on SQLite;
+from the event loop, run them in a thread (`wait()` already does).
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import argparse
+import importlib
+import threading
+import subprocess
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+LEASE_SECONDS = 60       # a claimed job goes back to the pool after this long
+MAX_ATTEMPTS  = 3        # claims/replays before a row is marked failed
+POLL_INTERVAL = 0.05     # seconds between checks for new jobs / results
+SUPERVISE_INTERVAL = 5   # seconds between checks for dead worker processes
+KEEP_SECONDS  = 86400    # settled rows older than this are pruned
+HANDLERS = {             # job kind -> "module:function", called with the payload as kwargs
+    "image_analysis": "vision_search:analyze_image",
+}
+WARMUP = {               # job kind -> "module:function" a worker runs before claiming
+    "image_analysis": "vision_search:load_blip",
+}
+# ────────────────────────────────────────────────────────────────────────────────
+
+OPEN = ("pending", "claimed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind        TEXT    NOT NULL,
+    payload     TEXT    NOT NULL,
+    status      TEXT    NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    worker      TEXT,
+    lease_until REAL,
+    result      TEXT,
+    created     REAL    NOT NULL,
+    updated     REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS journal_open ON journal(kind, status, id);
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+
+
+class RequestJournal:
+    def __init__(self, path: str, lease: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        self.path         = path        # opened on first use
+        self.lease        = lease
+        self.max_attempts = max_attempts
+        self._local       = threading.local()
+        self._waiters     = {}          # jid -> [(loop, future)] awaiting its result
+        self._wait_lock   = threading.Lock()
+        self._watcher     = None        # thread resolving _waiters, while there are any
+
+    def _db(self) -> sqlite3.Connection:
+        """This thread's connection (sqlite3 connections can't be shared across threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.path != self.path:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")   # survives a crash of the process, not of the OS
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.path = conn, self.path
+        return conn
+
+    # ─── writing ───────────────────────────────────────────────────────────────
+    def append(self, kind: str, payload: dict) -> int:
+        now = time.time()
+        cur = self._db().execute(
+            "INSERT INTO journal (kind, payload, created, updated) VALUES (?, ?, ?, ?)",
+            (kind, json.dumps(payload), now, now),
+        )
+        return cur.lastrowid
+
+    def update(self, jid: int, payload: dict):
+        """Replace an open row's payload (e.g. when messages are merged into it)."""
+        self._db().execute(
+            "UPDATE journal SET payload = ?, updated = ? WHERE id = ? AND status IN (?, ?)",
+            (json.dumps(payload), time.time(), jid, *OPEN),
+        )
+
+    def ack(self, jid: int, result=None, status: str = "done", worker: str | None = None) -> bool:
+        """Settle a row. With `worker`, only if that worker still holds it."""
+        sql  = "UPDATE journal SET status = ?, result = ?, lease_until = NULL, updated = ? WHERE id = ? AND status IN (?, ?)"
+        args = [status, json.dumps(result), time.time(), jid, *OPEN]
+        if worker:
+            sql += " AND worker = ?"
+            args.append(worker)
+        return self._db().execute(sql, args).rowcount == 1
+
+    def fail(self, jid: int, error: str, worker: str | None = None):
+        """Give a job back for another try, or mark it failed once out of attempts."""
+        db = self._db()
+        row = db.execute("SELECT attempts FROM journal WHERE id = ?", (jid,)).fetchone()
+        if row and row[0] >= self.max_attempts:
+            self.ack(jid, {"error": error}, status="failed", worker=worker)
+            return
+        sql  = "UPDATE journal SET status = 'pending', worker = NULL, lease_until = NULL, result = ?, updated = ? WHERE id = ? AND status = 'claimed'"
+        args = [json.dumps({"error": error}), time.time(), jid]
+        if worker:
+            sql += " AND worker = ?"
+            args.append(worker)
+        db.execute(sql, args)
+
+    def cancel(self, jid: int) -> bool:
+        """Withdraw a job nobody has claimed yet."""
+        return self._db().execute(
+            "UPDATE journal SET status = 'cancelled', updated = ? WHERE id = ? AND status = 'pending'",
+            (time.time(), jid),
+        ).rowcount == 1
+
+    # ─── claiming ──────────────────────────────────────────────────────────────
+    def claim(self, worker: str, kinds: list[str], lease: float | None = None) -> Job | None:
+        """Take the oldest pending job of `kinds` (or one whose lease ran out)."""
+        db  = self._db()
+        now = time.time()
+        marks = ",".join("?" * len(kinds))
+        db.execute("BEGIN IMMEDIATE")       # one claimer at a time across processes
+        try:
+            # expired leases on their last attempt are given up, not handed out again
+            db.execute(
+                f"UPDATE journal SET status = 'failed', result = ?, updated = ? WHERE kind IN ({marks}) "
+                "AND status = 'claimed' AND lease_until < ? AND attempts >= ?",
+                (json.dumps({"error": "lease expired on the last attempt"}), now, *kinds, now, self.max_attempts),
+            )
+            row = db.execute(
+                f"SELECT id, kind, payload, attempts FROM journal WHERE kind IN ({marks}) AND "
+                "(status = 'pending' OR (status = 'claimed' AND lease_until < ?)) ORDER BY id LIMIT 1",
+                (*kinds, now),
+            ).fetchone()
+            if row:
+                db.execute(
+                    "UPDATE journal SET status = 'claimed', worker = ?, lease_until = ?, "
+                    "attempts = attempts + 1, updated = ? WHERE id = ?",
+                    (worker, now + (lease or self.lease), now, row[0]),
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        jid, kind, payload, attempts = row
+        return Job(jid, kind, json.loads(payload), attempts + 1)
+
+    def claim_id(self, jid: int, worker: str):
+        """Mark a row as being worked on by `worker` (the bot's own consumer)."""
+        self._db().execute(
+            "UPDATE journal SET status = 'claimed', worker = ?, attempts = attempts + 1, updated = ? "
+            "WHERE id = ? AND status IN (?, ?)",
+            (worker, time.time(), jid, *OPEN),
+        )
+
+    # ─── reading ───────────────────────────────────────────────────────────────
+    def unacked(self, kind: str) -> list[Job]:
+        """Open rows of `kind`, oldest first; those out of attempts are marked failed instead."""
+        db = self._db()
+        db.execute(
+            "UPDATE journal SET status = 'failed', updated = ? WHERE kind = ? AND status IN (?, ?) AND attempts >= ?",
+            (time.time(), kind, *OPEN, self.max_attempts),
+        )
+        rows = db.execute(
+            "SELECT id, kind, payload, attempts FROM journal WHERE kind = ? AND status IN (?, ?) ORDER BY id",
+            (kind, *OPEN),
+        ).fetchall()
+        return [Job(r[0], r[1], json.loads(r[2]), r[3]) for r in rows]
+
+    def status(self, jid: int) -> tuple[str, object]:
+        row = self._db().execute("SELECT status, result FROM journal WHERE id = ?", (jid,)).fetchone()
+        if row is None:
+            raise KeyError(jid)
+        return row[0], json.loads(row[1]) if row[1] else None
+
+    async def wait(self, jid: int, timeout: float):
+        """
+        Result of job `jid` once a worker has acked it; RuntimeError if it
+        failed. All waits are served by one watcher thread, so the loop never
+        touches the database.
+        """
+        loop   = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._wait_lock:
+            self._waiters.setdefault(jid, []).append(waiter)
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="journal-wait", daemon=True)
+                self._watcher.start()
+        try:
+            return await asyncio.wait_for(waiter[1], timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"job {jid} still open after {timeout:g}s") from None
+        finally:
+            with self._wait_lock:
+                waiters = self._waiters.get(jid, [])
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                if not waiters:
+                    self._waiters.pop(jid, None)
+
+    def _watch(self):
+        """Check every awaited job in one query per POLL_INTERVAL; exit when nobody waits."""
+        while True:
+            with self._wait_lock:
+                jids = list(self._waiters)
+                if not jids:
+                    self._watcher = None
+                    return
+            try:
+                rows = self._db().execute(
+                    f"SELECT id, status, result FROM journal WHERE id IN ({','.join('?' * len(jids))})", jids,
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"journal: checking awaited jobs failed: {e}")
+                rows = None
+            if rows is not None:
+                found = {r[0]: r[1:] for r in rows}
+                for jid in jids:
+                    status, result = found.get(jid, ("missing", None))
+                    if status in OPEN:
+                        continue
+                    result = json.loads(result) if result else None
+                    error  = None if status == "done" else \
+                        RuntimeError(f"job {jid} {status}: {(result or {}).get('error', '')}")
+                    with self._wait_lock:
+                        waiters = self._waiters.pop(jid, [])
+                    for loop, fut in waiters:
+                        loop.call_soon_threadsafe(_resolve_future, fut, result, error)
+            time.sleep(POLL_INTERVAL)
+
+    def prune(self, older_than: float = KEEP_SECONDS) -> int:
+        return self._db().execute(
+            "DELETE FROM journal WHERE status NOT IN (?, ?) AND updated < ?",
+            (*OPEN, time.time() - older_than),
+        ).rowcount
+
+    def stats(self) -> dict:
+        """{kind: {status: count}}"""
+        out = {}
+        for kind, status, n in self._db().execute(
+                "SELECT kind, status, COUNT(*) FROM journal GROUP BY kind, status"):
+            out.setdefault(kind, {})[status] = n
+        return out
+
+
+def _resolve_future(fut: asyncio.Future, result, error):
+    if not fut.done():
+        if error:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+
+# ─── worker processes ──────────────────────────────────────────────────────────
+def _resolve(spec: str):
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+def _watch_parent(parent: int, stop: threading.Event):
+    """Set `stop` once process `parent` is gone: the stdin pipe it holds closes (or, on POSIX, we are reparented)."""
+    def on_eof():
+        sys.stdin.buffer.read()     # returns at EOF, i.e. when the parent exits
+        stop.set()
+    threading.Thread(target=on_eof, name="parent-watch", daemon=True).start()
+    if os.name == "posix":
+        def reparented():
+            while not stop.wait(1):
+                if os.getppid() != parent:
+                    stop.set()
+        threading.Thread(target=reparented, name="parent-pid", daemon=True).start()
+
+def run_worker(path: str, kinds: list[str], stop: threading.Event | None = None,
+               parent: int | None = None):
+    """Claim and run jobs of `kinds` until `stop` is set (or process `parent` exits)."""
+    journal  = RequestJournal(path)
+    worker   = f"{os.getpid()}"
+    stop     = stop or threading.Event()
+    if parent:
+        _watch_parent(parent, stop)
+    handlers = {kind: _resolve(HANDLERS[kind]) for kind in kinds}
+    for kind in kinds:
+        if kind in WARMUP:
+            _resolve(WARMUP[kind])()
+    logger.info(f"worker {worker} ready for {', '.join(kinds)}")
+    while not stop.is_set():
+        job = journal.claim(worker, kinds)
+        if job is None:
+            stop.wait(POLL_INTERVAL)
+            continue
+        try:
+            result = handlers[job.kind](**job.payload)
+        except Exception as e:
+            logger.warning(f"job {job.id} ({job.kind}) failed: {e}")
+            journal.fail(job.id, str(e), worker=worker)
+        else:
+            if not journal.ack(job.id, result, worker=worker):
+                logger.info(f"job {job.id} finished after its lease ran out")
+    logger.info(f"worker {worker} stopping")
+
+
+class WorkerPool:
+    """`n` worker processes on the journal at `path`; any that die are restarted until stop()."""
+
+    def __init__(self, n: int, path: str, kinds=tuple(HANDLERS)):
+        # the workers exit by themselves if this process goes away without stop()
+        self.cmd = [sys.executable, os.path.abspath(__file__), "worker", "--db", path,
+                    "--kinds", *kinds, "--parent", str(os.getpid())]
+        self.restarts = 0
+        self._lock    = threading.Lock()
+        self._stop    = threading.Event()
+        self.procs    = [self._spawn() for _ in range(n)]
+        threading.Thread(target=self._supervise, name="journal-workers", daemon=True).start()
+
+    def _spawn(self) -> subprocess.Popen:
+        return subprocess.Popen(self.cmd, stdin=subprocess.PIPE)
+
+    def _supervise(self):
+        while not self._stop.wait(SUPERVISE_INTERVAL):
+            with self._lock:
+                for i, proc in enumerate(self.procs):
+                    if proc.poll() is not None and not self._stop.is_set():
+                        logger.warning(f"worker {proc.pid} exited ({proc.returncode}); restarting it")
+                        self.procs[i] = self._spawn()
+                        self.restarts += 1
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            for proc in self.procs:
+                proc.terminate()
+
+    def __len__(self):
+        return len(self.procs)
+
+def start_workers(n: int, path: str, kinds=tuple(HANDLERS)) -> WorkerPool:
+    """Launch `n` supervised worker processes sharing the journal at `path`."""
+    return WorkerPool(n, path, kinds)
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Journal worker / inspection")
+    p.add_argument("command", choices=["worker", "stats"])
+    p.add_argument("--db", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "requests.sqlite3"))
+    p.add_argument("--kinds", nargs="+", default=list(HANDLERS))
+    p.add_argument("--parent", type=int, help="exit when this process does (set by start_workers)")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "stats":
+        print(json.dumps(RequestJournal(args.db).stats(), indent=2))
+    else:
+        # handlers live in DanzarAI/, imported flat like danzar.py does
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "DanzarAI"))
+        try:
+            run_worker(args.db, args.kinds, parent=args.parent)
+        except KeyboardInterrupt:
+            pass
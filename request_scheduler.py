@@ -0,0 +1,244 @@
+# request_scheduler.py
+"""
+Priority scheduler behind danzar's `request_queue`.
+
+Drop-in for the asyncio.Queue it replaces (put / put_nowait / get /
+task_done / join / qsize / empty) for (author, query, channel) items, but:
+
+- items are served by priority class (GUI, then text, then images), FIFO
+  within a class, so a burst of screenshots can't starve a quick question
+- the queue is bounded: when full, a new item either sheds the newest item
+  of a lower class or is itself rejected, and `on_reject` tells the user
+- an identical request already waiting from the same author and channel
+  is dropped as a duplicate
+- text sent by the same author in the same channel while their previous
+  message is still waiting is merged into that request (one LLM call)
+- with a `journal` (request_journal.py), each accepted request is written
+  to disk and acknowledged by `task_done(item)`, so requests still open
+  after a crash can be put back with `put_nowait(item, jid)`. The writes go
+  to one journal thread in the order they were made, never on the loop.
+"""
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+PRIORITY_GUI   = 0
+PRIORITY_TEXT  = 1
+PRIORITY_IMAGE = 2
+MAX_PENDING     = 32     # waiting requests across all classes
+COALESCE_WINDOW = 15.0   # seconds since the author's last merged message
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+def default_classify(item) -> int:
+    _, query, _ = item
+    if isinstance(query, str) and os.path.isfile(query):
+        return PRIORITY_IMAGE
+    return PRIORITY_TEXT
+
+
+class _Entry:
+    __slots__ = ("prio", "seq", "item", "keys", "enqueued", "updated", "dead", "jid")
+
+    def __init__(self, prio, seq, item, key, jid=None):
+        self.prio, self.seq, self.item, self.jid = prio, seq, item, jid
+        self.keys    = {key}               # one per message merged into this request
+        self.enqueued = self.updated = time.monotonic()
+        self.dead    = False
+
+    def __lt__(self, other):
+        return (self.prio, self.seq) < (other.prio, other.seq)
+
+
+def _log_failure(fut: Future):
+    if fut.exception():
+        logger.error(f"journal write failed: {fut.exception()}")
+
+
+class RequestScheduler:
+    def __init__(self, maxsize: int = MAX_PENDING, classify=default_classify,
+                 on_reject=None, on_wait=None, coalesce_window: float = COALESCE_WINDOW,
+                 journal=None, encode=None):
+        self.maxsize  = maxsize
+        self.classify = classify
+        self.on_reject = on_reject        # async (item, reason) -> None
+        self.on_wait   = on_wait          # (item, seconds queued) -> None, on every get()
+        self.coalesce_window = coalesce_window
+        self.journal  = journal           # RequestJournal, or None to keep requests in memory only
+        self.encode   = encode            # item -> JSON-able dict, or None to not journal that item
+        self.stats    = {"accepted": 0, "coalesced": 0, "deduped": 0, "rejected": 0, "shed": 0}
+        self._heap    = []
+        self._live    = 0
+        self._pending = {}                # (author id, channel id) -> newest waiting text _Entry
+        self._queries = set()             # (author id, channel id, query) waiting
+        self._seq     = itertools.count()
+        self._ready   = asyncio.Event()
+        self._unfinished = 0
+        self._finished   = asyncio.Event()
+        self._finished.set()
+        self._inflight   = {}             # id(item) handed out by get() -> journal id (or its Future)
+        # one thread, so each row's append/update/claim/ack land in order
+        self._io = ThreadPoolExecutor(1, thread_name_prefix="journal") if journal else None
+
+    @staticmethod
+    def _who(item):
+        author, _, channel = item
+        return getattr(author, "id", author), getattr(channel, "id", channel)
+
+    def _query_key(self, item):
+        query = item[1]
+        norm = " ".join(query.lower().split()) if isinstance(query, str) else query
+        return (*self._who(item), norm)
+
+    # ─── journal ───────────────────────────────────────────────────────────────
+    def _write(self, fn, *args) -> Future:
+        """
+        Queue `fn(*args)` on the journal thread. Ids still being appended are
+        passed as their Future and resolved there, after the append.
+        """
+        fut = self._io.submit(lambda: fn(*[a.result() if isinstance(a, Future) else a for a in args]))
+        fut.add_done_callback(_log_failure)
+        return fut
+
+    def _record(self, item):
+        payload = self.encode(item) if self.journal and self.encode else None
+        return None if payload is None else self._write(self.journal.append, "request", payload)
+
+    def _settle(self, jid, status):
+        if jid is not None:
+            self._write(self.journal.ack, jid, None, status)
+
+    def flush(self):
+        """Block until every journal write made so far is on disk (call off the loop)."""
+        if self._io:
+            self._io.submit(lambda: None).result()
+
+    # ─── producer side ─────────────────────────────────────────────────────────
+    def put_nowait(self, item, jid: int | None = None) -> bool:
+        """
+        Queue `item`; returns False if it was merged away or refused.
+        `jid` is the journal row of a request being replayed.
+        """
+        prio = self.classify(item)
+        qkey = self._query_key(item)
+        if qkey in self._queries:
+            self.stats["deduped"] += 1
+            self._settle(jid, "deduped")
+            return False
+
+        who  = self._who(item)
+        prev = self._pending.get(who)
+        if (prio != PRIORITY_IMAGE and prev and not prev.dead
+                and time.monotonic() - prev.updated <= self.coalesce_window):
+            author, query, channel = prev.item
+            prev.item    = (author, f"{query}\n{item[1]}", channel)
+            prev.updated = time.monotonic()
+            prev.keys.add(qkey)
+            self._queries.add(qkey)
+            self.stats["coalesced"] += 1
+            if prev.jid is not None:
+                self._write(self.journal.update, prev.jid, self.encode(prev.item))
+            self._settle(jid, "merged")
+            return False
+
+        if self._live >= self.maxsize and not self._shed_below(prio):
+            self._refuse(item, "rejected")
+            self._settle(jid, "rejected")
+            return False
+
+        entry = _Entry(prio, next(self._seq), item, qkey, jid if jid is not None else self._record(item))
+        heapq.heappush(self._heap, entry)
+        self._live += 1
+        self._queries.add(qkey)
+        if prio != PRIORITY_IMAGE:
+            self._pending[who] = entry
+        self._unfinished += 1
+        self._finished.clear()
+        self._ready.set()
+        self.stats["accepted"] += 1
+        return True
+
+    async def put(self, item, jid: int | None = None) -> bool:
+        return self.put_nowait(item, jid)
+
+    def _shed_below(self, prio) -> bool:
+        """Drop the newest waiting entry of a class lower than `prio`, if any."""
+        victims = [e for e in self._heap if not e.dead and e.prio > prio]
+        if not victims:
+            return False
+        victim = max(victims, key=lambda e: (e.prio, e.seq))
+        self._refuse(victim.item, "shed")
+        self._settle(victim.jid, "shed")
+        self._drop(victim)
+        self._unfinished -= 1
+        return True
+
+    def _drop(self, entry):
+        entry.dead = True
+        self._live -= 1
+        self._queries -= entry.keys
+        if self._pending.get(self._who(entry.item)) is entry:
+            del self._pending[self._who(entry.item)]
+
+    def _refuse(self, item, reason):
+        self.stats[reason] += 1
+        logger.warning(f"request {reason}: queue full ({self._live}/{self.maxsize})")
+        if self.on_reject:
+            try:
+                asyncio.get_running_loop().create_task(self.on_reject(item, reason))
+            except RuntimeError:   # called off the loop; nobody to tell
+                pass
+
+    # ─── consumer side ─────────────────────────────────────────────────────────
+    async def get(self):
+        while True:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                if not entry.dead:
+                    self._drop(entry)   # no longer waiting: later messages start a new request
+                    if self.on_wait:
+                        self.on_wait(entry.item, time.monotonic() - entry.enqueued)
+                    if entry.jid is not None:
+                        self._write(self.journal.claim_id, entry.jid, f"bot-{os.getpid()}")
+                        self._inflight[id(entry.item)] = entry.jid
+                    return entry.item
+            self._ready.clear()
+            await self._ready.wait()
+
+    def fail(self, item, error: str):
+        """
+        Record that handling `item` from get() raised; the journal gives it
+        back for a retry on the next replay. task_done(item) must still follow.
+        """
+        jid = self._inflight.pop(id(item), None)
+        if jid is not None:
+            self._write(self.journal.fail, jid, error)
+
+    def task_done(self, item=None):
+        """Mark a request finished; pass the item from get() to acknowledge it in the journal."""
+        if self._unfinished <= 0:
+            raise ValueError("task_done() called too many times")
+        jid = self._inflight.pop(id(item), None) if item is not None else None
+        self._settle(jid, "done")
+        self._unfinished -= 1
+        if not self._unfinished:
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
+
+    def qsize(self) -> int:
+        return self._live
+
+    def empty(self) -> bool:
+        return not self._live
+
+    def full(self) -> bool:
+        return self._live >= self.maxsize
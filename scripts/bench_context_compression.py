@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Prompt-size / latency benchmark for rag_server.py's context compression.
+
+Runs the same questions through the server's original engine (LlamaIndex
+defaults: top-2 chunks, no compression), the same retrieval depth as now
+without compression, and the current engine with the ContextCompressor
+postprocessor, counting LLM prompt tokens with LlamaIndex's
+TokenCountingHandler and timing each end-to-end query. Needs LM Studio up.
+
+    python scripts/bench_context_compression.py "How does Ancestral Cry work?" ...
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # rag_server loads ./index_storage
+
+import rag_server
+from llama_index.core.callbacks import CallbackManager, TokenCountingHandler
+
+ORIGINAL_TOP_K = 2   # as_query_engine() default, what rag_server.py used before compression
+
+DEFAULT_QUESTIONS = [
+    "What does Ancestral Cry do?",
+    "How do transfigured skill gems differ from normal ones?",
+    "What is Alchemist's Mark used for?",
+    "How does Ambush interact with critical strikes?",
+]
+
+def run(engine, counter, questions):
+    rows = []
+    for q in questions:
+        counter.reset_counts()
+        t0 = time.perf_counter()
+        engine.query(q)
+        dt = time.perf_counter() - t0
+        rows.append((counter.prompt_llm_token_count, dt))
+    return rows
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("questions", nargs="*", default=DEFAULT_QUESTIONS)
+    p.add_argument("--budget", type=int, default=rag_server.CONTEXT_TOKENS,
+                   help="token budget for the compressed context")
+    args = p.parse_args()
+
+    counter = TokenCountingHandler()
+    cb = CallbackManager([counter])
+    rag_server.Settings.callback_manager = cb
+    rag_server.llm.callback_manager = cb
+
+    rag_server.CONTEXT_TOKENS = args.budget
+    engines = {
+        "original":     rag_server.make_query_engine(compress=False, top_k=ORIGINAL_TOP_K),
+        "uncompressed": rag_server.make_query_engine(compress=False),
+        "compressed":   rag_server.make_query_engine(compress=True),
+    }
+
+    # warm-up so model load time doesn't land on the first measured query
+    engines["original"].query(args.questions[0])
+
+    results = {name: run(eng, counter, args.questions) for name, eng in engines.items()}
+
+    print(f"\n{'question':<50} " + " ".join(f"{n[:8] + ' tok':>13} {n[:8] + ' s':>11}" for n in engines))
+    for i, q in enumerate(args.questions):
+        print(f"{q[:50]:<50} " + " ".join(f"{results[n][i][0]:>13} {results[n][i][1]:>11.2f}" for n in engines))
+
+    base_secs = statistics.mean(r[1] for r in results["original"])
+    for name, rows in results.items():
+        toks = [r[0] for r in rows]
+        secs = [r[1] for r in rows]
+        print(f"\n{name:>12}: mean prompt tokens {statistics.mean(toks):.0f}, "
+              f"mean latency {statistics.mean(secs):.2f}s ({statistics.mean(secs) / base_secs:.2f}x original), "
+              f"median latency {statistics.median(secs):.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+CPU latency / output-similarity benchmark for the research models.
+
+Loads MiniLM (embeddings), BART-large-CNN (summaries) and flan-t5-base
+(subtopics) in fp32 and in each requested CPU mode via DanzarAI/devices.py.
+It reports the mean latency per call, the speedup over fp32, and how close
+the outputs stay to fp32:
+  - embeddings: mean cosine similarity to the fp32 vectors
+  - text:       mean cosine similarity of the fp32-MiniLM embeddings of the
+                two outputs, plus unigram F1 (ROUGE-1 style)
+
+    python scripts/bench_cpu_inference.py --modes int8 onnx --repeats 3
+"""
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "DanzarAI"))
+
+import numpy as np
+import torch
+from devices import load_pipeline, load_sentence_transformer, _cpu_mode
+
+TEXT = (
+    "Path of Exile 2 is an action role-playing game developed by Grinding Gear Games. "
+    "Players choose one of several character classes, each with its own passive skill tree. "
+    "Skill gems socketed into gear grant active abilities, and support gems modify them. "
+    "The endgame revolves around the Atlas, where players run maps of increasing difficulty, "
+    "fight pinnacle bosses and craft items with currency orbs that reroll or add modifiers. "
+) * 6
+SENTENCES = [s.strip() + "." for s in TEXT.split(".") if s.strip()][:32]
+PROMPT = (f"You just read this summary:\n\n{TEXT[:600]}\n\nNow output exactly three specific "
+          "follow-up sub-topics as a JSON array of strings.")
+
+def timed(fn, repeats):
+    fn()  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        out = fn()
+    return out, (time.perf_counter() - t0) / repeats
+
+def cos(a, b):
+    """Mean row-wise cosine similarity (works for single vectors too)."""
+    a, b = np.asarray(a, dtype="float32"), np.asarray(b, dtype="float32")
+    sims = (a * b).sum(-1) / (np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1))
+    return float(np.mean(sims))
+
+def unigram_f1(a, b):
+    ca, cb = Counter(a.lower().split()), Counter(b.lower().split())
+    overlap = sum((ca & cb).values())
+    if not overlap:
+        return 0.0
+    p, r = overlap / sum(ca.values()), overlap / sum(cb.values())
+    return 2 * p * r / (p + r)
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--modes", nargs="+", default=["int8", "onnx"])
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = p.parse_args()
+    torch.set_num_threads(args.threads)
+
+    modes = ["fp32"] + [m for m in dict.fromkeys(_cpu_mode(m) for m in args.modes) if m != "fp32"]
+    rows = []
+
+    # ─── embeddings ─────────────────────────────────────────────────────────
+    ref_emb = None
+    judge = load_sentence_transformer("all-MiniLM-L6-v2", device="cpu", cpu_mode="fp32")
+    for mode in modes:
+        m = load_sentence_transformer("all-MiniLM-L6-v2", device="cpu", cpu_mode=mode)
+        emb, dt = timed(lambda: m.encode(SENTENCES, normalize_embeddings=True), args.repeats)
+        ref_emb = emb if ref_emb is None else ref_emb
+        rows.append(("MiniLM embed x32", mode, dt, cos(emb, ref_emb), None))
+
+    # ─── seq2seq models ─────────────────────────────────────────────────────
+    jobs = [
+        ("BART summarize", "summarization", "facebook/bart-large-cnn",
+         lambda pipe: pipe(TEXT, max_length=200, min_length=50, do_sample=False)[0]["summary_text"]),
+        ("flan-t5 subtopics", "text2text-generation", "google/flan-t5-base",
+         lambda pipe: pipe(PROMPT, max_new_tokens=128, num_beams=4, do_sample=False)[0]["generated_text"]),
+    ]
+    for label, task, name, run in jobs:
+        ref = None
+        for mode in modes:
+            pipe = load_pipeline(task, name, device="cpu", cpu_mode=mode)
+            out, dt = timed(lambda: run(pipe), args.repeats)
+            ref = out if ref is None else ref
+            sim = cos(*judge.encode([out, ref], normalize_embeddings=True))
+            rows.append((label, mode, dt, sim, unigram_f1(out, ref)))
+            del pipe
+
+    base = {label: dt for label, mode, dt, *_ in rows if mode == "fp32"}
+    print(f"\n{'model':<20} {'mode':<6} {'latency':>9} {'speedup':>8} {'cosine':>7} {'F1':>6}")
+    for label, mode, dt, sim, f1 in rows:
+        f1s = f"{f1:6.3f}" if f1 is not None else "     -"
+        print(f"{label:<20} {mode:<6} {dt * 1000:7.0f}ms {base[label] / dt:7.2f}x {sim:7.4f} {f1s}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Exercise utils/crawler.py against a local HTTP server serving fixture pages.
+
+Generates N wiki-like pages in a temp dir, serves them with ETag and
+Last-Modified support, then crawls twice: a cold pass (everything
+downloaded) and a warm pass (everything should come back 304 from cache).
+
+    python scripts/bench_crawler.py --pages 200 --concurrency 16
+"""
+import os
+import sys
+import hashlib
+import argparse
+import tempfile
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.crawler import crawl_pages
+
+PAGE = """<html><head><title>{slug}</title><script>var x = 1;</script></head>
+<body><nav>Home | Skills | Items</nav>
+<div class="mw-parser-output"><h2>{slug}</h2>
+{paras}
+</div><footer>fextralife</footer></body></html>"""
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler already honours If-Modified-Since; add ETags."""
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            st = os.stat(path)
+            etag = '"%s"' % hashlib.md5(f"{st.st_mtime_ns}-{st.st_size}".encode()).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return None
+            self._etag = etag
+        return super().send_head()
+
+    def end_headers(self):
+        etag = getattr(self, "_etag", None)
+        if etag:
+            self.send_header("ETag", etag)
+            self._etag = None
+        super().end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def write_fixtures(root: str, n: int) -> list[str]:
+    slugs = []
+    for i in range(n):
+        slug = f"Page_{i:04d}"
+        paras = "\n".join(f"<p>{slug} paragraph {j}. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>"
+                          for j in range(10))
+        with open(os.path.join(root, slug), "w", encoding="utf-8") as f:
+            f.write(PAGE.format(slug=slug, paras=paras))
+        slugs.append(slug)
+    return slugs
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--pages", type=int, default=100)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--host-rate", type=float, default=1000.0,
+                   help="per-host requests/sec (high by default: it's localhost)")
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as site, tempfile.TemporaryDirectory() as cache:
+        slugs = write_fixtures(site, args.pages)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=site))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}/{{}}"
+        try:
+            opts = dict(url_for=base.format, cache_dir=cache, concurrency=args.concurrency,
+                        host_rate=args.host_rate, host_burst=args.concurrency)
+            cold_pages, cold = crawl_pages(slugs, **opts)
+            warm_pages, warm = crawl_pages(slugs, **opts)
+        finally:
+            server.shutdown()
+
+    print(f"cold: {cold.report()}")
+    print(f"warm: {warm.report()}")
+    assert cold.downloaded == args.pages, "cold pass should download every page"
+    assert warm.not_modified == args.pages, "warm pass should be all 304s"
+    assert cold_pages == warm_pages, "cached text should match downloaded text"
+    assert all("Lorem ipsum" in t and "fextralife" not in t for t in warm_pages.values())
+    print("✅ crawler OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark of danzar.py: no Discord token, LM Studio, TTS
+engine or model downloads.
+
+Stand-ins are installed before danzar is imported, and the real
+on_message → RequestScheduler → _process_queue path (and the real
+teach/research sessions) runs unchanged on top of them:
+
+- discord / discord.ext.commands: a fake gateway whose Bot registers the
+  event and command handlers; channels record every send and edit
+- LLM: model_router.set_router over two fake models with fixed latency,
+  serving --llm-slots calls at a time like LM Studio
+- web search: web_search.set_backend with a fake backend
+- tts: null sink (make_wav just sleeps --tts seconds, like the real one it
+  blocks the loop)
+- gui, vision_search and sentence-transformers: headless GUIChannel,
+  OCR + caption stub with latency, hashing embedder
+
+The workload is synthetic (Poisson arrivals over a mix of text mentions,
+small talk, screenshots and !teach/!research commands) or replayed from a
+JSONL file ({"t": seconds, "kind": ..., "author": id, "channel": id,
+"content": str} per line; --record writes one). Reported: throughput,
+queue wait and end-to-end latency percentiles, per-stage timings from
+tracing.py, and what the scheduler merged or turned away.
+
+    python scripts/bench_e2e.py --duration 30 --rate 2 --llm-large 1.5
+"""
+import os
+import sys
+import json
+import time
+import types
+import random
+import shutil
+import asyncio
+import inspect
+import logging
+import hashlib
+import itertools
+import argparse
+import tempfile
+import importlib
+import threading
+from collections import defaultdict, deque
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# root utils/ must win over DanzarAI/utils.py once DanzarAI/ is on the path
+importlib.import_module("utils.compress")
+sys.path.insert(1, os.path.join(ROOT, "DanzarAI"))
+
+BOT_ID   = 1000
+OWNER_ID = 1
+TOPICS   = ["elemental mages", "fire resistance gear", "ice nova builds",
+            "lightning staff drops", "mana regeneration", "endgame bosses"]
+SMALL_TALK = ["hi", "hello there", "how are you", "thanks", "what can you do"]
+
+
+# ─── Fake Discord gateway ──────────────────────────────────────────────────────
+class FakeUser:
+    def __init__(self, uid, name, bot=False):
+        self.id, self.display_name, self.name, self.bot = uid, name, name, bot
+
+class FakeSent:
+    def __init__(self, channel, content):
+        self.channel, self.content = channel, content
+
+    async def edit(self, content=None):
+        self.content = content
+        self.channel.record(content)
+
+class FakeChannel:
+    def __init__(self, cid, on_output):
+        self.id = cid
+        self.on_output = on_output
+        self.outputs = 0
+
+    def record(self, content):
+        self.outputs += 1
+        self.on_output(self, content or "")
+
+    async def send(self, content=None, file=None):
+        self.record(content)
+        return FakeSent(self, content)
+
+_ids = itertools.count(1)
+
+class FakeAttachment:
+    def __init__(self, filename):
+        self.id, self.filename, self.content_type = next(_ids), filename, "image/png"
+
+    async def save(self, path):
+        from PIL import Image
+        Image.new("RGB", (64, 64), (40, 90, 160)).save(path)
+
+class FakeMessage:
+    def __init__(self, author, channel, content, attachments=()):
+        self.id = next(_ids)
+        self.author, self.channel, self.content = author, channel, content
+        self.attachments = list(attachments)
+
+class FakeContext:
+    def __init__(self, msg):
+        self.message, self.author, self.channel = msg, msg.author, msg.channel
+
+    async def send(self, *a, **kw):
+        return await self.channel.send(*a, **kw)
+
+class CheckFailure(Exception):
+    pass
+
+class FakeCommand:
+    def __init__(self, fn, name):
+        self.callback, self.name = fn, name
+        self.checks   = getattr(fn, "__commands_checks__", [])
+        self.on_error = None
+
+    def error(self, fn):
+        self.on_error = fn
+        return fn
+
+    def parse(self, rest: str):
+        params = list(inspect.signature(self.callback).parameters.values())[1:]
+        toks, args, kwargs = rest.split(), [], {}
+        for p in params:
+            if p.kind is p.KEYWORD_ONLY:
+                kwargs[p.name] = " ".join(toks)
+                toks = []
+            elif toks:
+                tok = toks.pop(0)
+                args.append(int(tok) if p.annotation is int else tok)
+        return args, kwargs
+
+class FakeBot:
+    def __init__(self, command_prefix="!", intents=None, **_):
+        self.prefix   = command_prefix
+        self.user     = FakeUser(BOT_ID, "Danzar", bot=True)
+        self.commands = {}
+        self.loop     = None
+
+    def event(self, fn):
+        setattr(self, fn.__name__, fn)
+        return fn
+
+    def command(self, name=None, **_):
+        def wrap(fn):
+            cmd = FakeCommand(fn, name or fn.__name__)
+            self.commands[cmd.name] = cmd
+            return cmd
+        return wrap
+
+    async def process_commands(self, msg):
+        if not msg.content.startswith(self.prefix):
+            return
+        name, _, rest = msg.content[len(self.prefix):].partition(" ")
+        cmd = self.commands.get(name)
+        if cmd is None:
+            return
+        ctx = FakeContext(msg)
+        try:
+            for check in cmd.checks:
+                if not await check(ctx):
+                    raise CheckFailure(name)
+            args, kwargs = cmd.parse(rest)
+            await cmd.callback(ctx, *args, **kwargs)
+        except Exception as e:
+            if cmd.on_error:
+                await cmd.on_error(ctx, e)
+            else:
+                raise
+
+    async def is_owner(self, user):
+        return user.id == OWNER_ID
+
+    def get_channel(self, cid):
+        return None
+
+    async def fetch_channel(self, cid):
+        return None
+
+def _check(pred):
+    def wrap(fn):
+        fn.__commands_checks__ = [*getattr(fn, "__commands_checks__", []), pred]
+        return fn
+    return wrap
+
+
+# ─── Stand-in modules ──────────────────────────────────────────────────────────
+class HashEmbedder:
+    """Deterministic bag-of-words vectors; close enough for dedupe/FAQ behaviour."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, convert_to_numpy=True, **_):
+        single = isinstance(texts, str)
+        out = np.zeros((1 if single else len(texts), self.dim), dtype="float32")
+        for i, t in enumerate([texts] if single else texts):
+            for w in t.lower().split():
+                out[i, int(hashlib.md5(w.encode()).hexdigest(), 16) % self.dim] += 1
+        out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out[0] if single else out
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    sys.modules[name] = mod
+    return mod
+
+def install_stand_ins(args):
+    discord = _module("discord", Intents=types.SimpleNamespace(default=types.SimpleNamespace),
+                      File=lambda fp, filename=None: fp, VoiceChannel=type("VoiceChannel", (), {}))
+    ext = _module("discord.ext")
+    commands = _module("discord.ext.commands", Bot=FakeBot, check=_check, CheckFailure=CheckFailure)
+    discord.ext, ext.commands = ext, commands
+
+    _module("gui", GUIChannel=type("GUIChannel", (), {}))
+    _module("tts", make_wav=lambda text, filename="ai_response.wav": time.sleep(args.tts) or filename,
+            play_wav=lambda path: None, load=lambda: time.sleep(args.model_load))
+
+    def analyze_image(path):
+        from tracing import span
+        with span("ocr"):
+            time.sleep(args.ocr)
+        with span("caption"):
+            time.sleep(args.caption)
+        return {"caption": "a blue square screenshot", "ocr": "HP 120/300  MANA 40"}
+
+    _module("vision_search", load_blip=lambda: time.sleep(args.model_load), analyze_image=analyze_image,
+            caption_image=lambda path: time.sleep(args.caption) or "a blue square screenshot",
+            reverse_image_search=lambda path, max_results=5: [])
+    _module("sentence_transformers",
+            SentenceTransformer=lambda name, **kw: time.sleep(args.model_load) or HashEmbedder())
+
+
+def install_backends(args):
+    import model_router
+    import web_search
+
+    slots = threading.Semaphore(args.llm_slots)
+
+    def fake_model(latency):
+        def respond(messages):
+            with slots:
+                time.sleep(latency)
+            if "follow-up" in messages[0]["content"] or "research next" in messages[-1]["content"]:
+                return f"What about {random.choice(TOPICS)}?"
+            return "• first point\n• second point\n• third point"
+        return respond
+
+    model_router.set_router(model_router.ModelRouter(
+        {"small": fake_model(args.llm_small), "large": fake_model(args.llm_large)}))
+
+    class FakeSearch:
+        def text(self, query, max_results):
+            time.sleep(args.search)
+            return [{"title": query, "href": f"https://example.com/{i}",
+                     "body": f"result {i} about {query}"} for i in range(max_results)]
+    web_search.set_backend(FakeSearch())
+
+
+# ─── Workload ──────────────────────────────────────────────────────────────────
+def synthetic(args):
+    rnd = random.Random(args.seed)
+    mix = [kv.split("=") for kv in args.mix.split(",")]
+    kinds, weights = [k for k, _ in mix], [float(w) for _, w in mix]
+    events, t = [], 0.0
+    while True:
+        t += rnd.expovariate(args.rate)
+        if t >= args.duration:
+            return events
+        kind = rnd.choices(kinds, weights)[0]
+        topic = rnd.choice(TOPICS)
+        content = {
+            "text":     f"how do {topic} work against {rnd.choice(TOPICS)}?",
+            "faq":      rnd.choice(SMALL_TALK),
+            "image":    "",
+            "teach":    f"!teach {args.session_rounds} {topic}",
+            "research": f"!research 1 {topic}",
+        }[kind]
+        events.append({"t": round(t, 3), "kind": kind, "content": content,
+                       "author": 100 + rnd.randrange(args.users),
+                       "channel": 500 + rnd.randrange(args.channels)})
+
+def pct(values, q):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(q * len(s)))] if s else float("nan")
+
+
+async def run(args, events):
+    import danzar
+    import tracing
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.ERROR)
+    work = tempfile.mkdtemp(prefix="danzar-bench-")
+    os.chdir(work)                        # image downloads land here
+    os.environ["DANZAR_LOG_DIR"] = work   # teach.py's session logs, imported on the first !teach
+    danzar.rag_store.path = os.path.join(work, "rag.json")
+    danzar.memory.path    = os.path.join(work, "conversations.json")
+    danzar.faq.path       = None
+    danzar.journal.path   = os.path.join(work, "requests.sqlite3")
+    tracing.reset()
+
+    # (author, channel, is_image) -> issue times not yet answered; images are
+    # never merged and queue behind text, so they are tracked apart
+    issued  = defaultdict(deque)
+    current = {}                          # the request _process_queue is on (single consumer)
+    e2e, answered = [], [0]
+
+    on_wait = danzar.request_queue.on_wait
+    def track_wait(item, waited):
+        on_wait(item, waited)
+        author, query, chan = item
+        current.update(key=(author.id, chan.id, os.path.isfile(query)),
+                       prefix=f"{author.display_name}: ", channel=chan.id,
+                       cutoff=time.perf_counter())
+    danzar.request_queue.on_wait = track_wait
+
+    def on_output(channel, content):
+        # a request is answered by its "<name>: reply" send/edit; every message
+        # of that kind issued before it left the queue (merged ones too) is done
+        if not current or channel.id != current["channel"] or not content.startswith(current["prefix"]):
+            return
+        key, now = current["key"], time.perf_counter()
+        while issued[key] and issued[key][0] <= current["cutoff"]:
+            e2e.append(now - issued[key].popleft())
+        answered[0] += 1
+        current.clear()
+
+    channels = {}
+    def channel(cid):
+        if cid not in channels:
+            channels[cid] = FakeChannel(cid, on_output)
+        return channels[cid]
+
+    danzar.bot.loop = asyncio.get_running_loop()
+    await danzar.on_ready()
+
+    sessions = []
+    t0 = time.perf_counter()
+    for ev in events:
+        delay = t0 + ev["t"] - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        author = FakeUser(ev["author"], f"user{ev['author']}")
+        chan = channel(ev["channel"])
+        if ev["kind"] in ("teach", "research"):
+            await danzar.on_message(FakeMessage(author, chan, ev["content"]))
+            if ev["kind"] == "research":
+                sessions.append(chan)
+            continue
+        atts = [FakeAttachment("image.png")] if ev["kind"] == "image" else []
+        issued[(author.id, chan.id, bool(atts))].append(time.perf_counter())
+        await danzar.on_message(FakeMessage(author, chan, f"<@{BOT_ID}> {ev['content']}", atts))
+    arrivals = time.perf_counter() - t0
+
+    try:
+        await asyncio.wait_for(danzar.request_queue.join(), args.drain)
+    except asyncio.TimeoutError:
+        pass
+    for chan in sessions:                 # timed research sessions: stop them here
+        await danzar.on_message(FakeMessage(FakeUser(OWNER_ID, "owner"), chan, "!stop"))
+    await asyncio.sleep(0.1)
+    wall = time.perf_counter() - t0
+
+    snap = tracing.snapshot()
+    waits = snap.get("queue_wait", {})
+    stats = danzar.request_queue.stats
+    msgs = sum(len(v) for v in issued.values()) + len(e2e)
+    result = {
+        "messages": msgs, "answered_requests": answered[0], "answered_messages": len(e2e),
+        "unanswered_messages": sum(len(v) for v in issued.values()),
+        "arrival_s": arrivals, "wall_s": wall,
+        "throughput_msgs_per_s": len(e2e) / wall if wall else 0.0,
+        "queue_wait_ms": {q: waits.get(f"p{q}_s", float("nan")) * 1000 for q in (50, 95, 99)},
+        "e2e_ms": {q: pct(e2e, q / 100) * 1000 for q in (50, 95, 99)},
+        "scheduler": stats,
+        "stages": snap,
+    }
+    shutil.rmtree(work, ignore_errors=True)
+    return result
+
+def report(r):
+    print(f"messages {r['messages']}: {r['answered_messages']} answered in {r['answered_requests']} "
+          f"requests, {r['unanswered_messages']} unanswered")
+    print(f"wall {r['wall_s']:.1f}s (arrivals over {r['arrival_s']:.1f}s) → "
+          f"{r['throughput_msgs_per_s']:.2f} msgs/s")
+    qw, e = r["queue_wait_ms"], r["e2e_ms"]
+    print(f"queue wait  p50 {qw[50]:8.0f}ms  p95 {qw[95]:8.0f}ms  p99 {qw[99]:8.0f}ms")
+    print(f"end-to-end  p50 {e[50]:8.0f}ms  p95 {e[95]:8.0f}ms  p99 {e[99]:8.0f}ms")
+    print("scheduler   " + ", ".join(f"{k} {v}" for k, v in r["scheduler"].items()))
+    print(f"\n{'stage':<34} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, st in r["stages"].items():
+        print(f"{name[:34]:<34} {st['count']:>5} {st['p50_s'] * 1000:>7.0f}ms "
+              f"{st['p95_s'] * 1000:>7.0f}ms {st['p99_s'] * 1000:>7.0f}ms")
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--duration", type=float, default=20, help="seconds of arrivals")
+    p.add_argument("--rate", type=float, default=1.0, help="messages per second")
+    p.add_argument("--mix", default="text=0.6,faq=0.2,image=0.15,teach=0.03,research=0.02")
+    p.add_argument("--users", type=int, default=8)
+    p.add_argument("--channels", type=int, default=3)
+    p.add_argument("--session-rounds", type=int, default=2, help="rounds per !teach")
+    p.add_argument("--llm-large", type=float, default=1.0, help="seconds per large-model call")
+    p.add_argument("--llm-small", type=float, default=0.3, help="seconds per small-model call")
+    p.add_argument("--llm-slots", type=int, default=1, help="concurrent LLM calls served")
+    p.add_argument("--search", type=float, default=0.3)
+    p.add_argument("--tts", type=float, default=0.2)
+    p.add_argument("--caption", type=float, default=0.4)
+    p.add_argument("--ocr", type=float, default=0.2)
+    p.add_argument("--model-load", type=float, default=0.0,
+                   help="seconds each stand-in model takes to load during warm-up")
+    p.add_argument("--drain", type=float, default=120, help="max seconds to wait for the queue")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--replay", help="JSONL workload to replay instead of a synthetic one")
+    p.add_argument("--record", help="write the workload used to this JSONL file")
+    p.add_argument("--json", help="write the results to this file")
+    p.add_argument("--verbose", action="store_true")
+    args = p.parse_args()
+
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            events = [json.loads(line) for line in f if line.strip()]
+    else:
+        events = synthetic(args)
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(ev) + "\n" for ev in events)
+
+    os.environ.setdefault("DISCORD_TOKEN", "offline-bench")
+    os.environ["DANZAR_METRICS_PORT"] = "0"
+    install_stand_ins(args)
+    install_backends(args)
+    result = asyncio.run(run(args, events))
+    report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
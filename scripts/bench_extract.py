@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for DanzarAI/html_extract.py on a saved page corpus.
+
+Compares the old BeautifulSoup paths (utils/fetch.py's lxml tree and
+research_tool_free's html.parser + decompose) with the streaming extractor,
+single-process and across all cores.
+
+    python scripts/bench_extract.py --corpus .http_cache      # saved crawl
+    python scripts/bench_extract.py --synthetic 500           # generated pages
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+from DanzarAI.html_extract import extract_text, extract_many
+
+def old_fetch(html):
+    soup = BeautifulSoup(html, "lxml")
+    main = soup.find("div", class_="mw-parser-output") or soup.body
+    return main.get_text(separator="\n")
+
+def old_fetch_and_clean(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "aside"]):
+        tag.decompose()
+    text = soup.get_text(separator="\n")
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+def synthetic(n):
+    chrome = "<nav>" + "<a href='#'>link</a> " * 300 + "</nav><script>" + "var a=1;" * 500 + "</script>"
+    body = "".join(f"<p>Paragraph {j}. " + "Skill gems scale with level and quality. " * 15 + "</p>"
+                   for j in range(25))
+    return [f"<html><head><title>P{i}</title></head><body>{chrome}"
+            f"<div class='mw-parser-output'><h2>P{i}</h2>{body}</div>{chrome}"
+            f"<footer>footer</footer></body></html>" for i in range(n)]
+
+def load_corpus(path):
+    files = [f for f in glob.glob(os.path.join(path, "*")) if not f.endswith(".json")]
+    pages = []
+    for f in files:
+        with open(f, "r", encoding="utf-8", errors="replace") as fh:
+            pages.append(fh.read())
+    return pages
+
+def bench(name, fn, pages, total_mb):
+    t0 = time.perf_counter()
+    out = fn(pages)
+    dt = time.perf_counter() - t0
+    chars = sum(len(t) for t in out)
+    print(f"{name:<34} {dt:7.2f}s {len(pages) / dt:9.1f} pages/s {total_mb / dt:7.2f} MB/s {chars:>10} chars out")
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--corpus", help="directory of saved HTML pages")
+    p.add_argument("--synthetic", type=int, default=300, help="pages to generate if no corpus")
+    p.add_argument("--workers", type=int, default=os.cpu_count())
+    args = p.parse_args()
+
+    pages = load_corpus(args.corpus) if args.corpus else synthetic(args.synthetic)
+    if not pages:
+        sys.exit("❌ empty corpus")
+    total_mb = sum(len(p.encode("utf-8")) for p in pages) / 1e6
+    print(f"{len(pages)} pages, {total_mb:.1f} MB, {args.workers} workers\n")
+
+    bench("bs4 lxml (old fetch.py)", lambda ps: [old_fetch(h) for h in ps], pages, total_mb)
+    bench("bs4 html.parser (old research)", lambda ps: [old_fetch_and_clean(h) for h in ps], pages, total_mb)
+    bench("stream, content root, 1 core",
+          lambda ps: [extract_text(h, "div", "mw-parser-output") for h in ps], pages, total_mb)
+    bench("stream, whole page, 1 core", lambda ps: [extract_text(h) for h in ps], pages, total_mb)
+    bench(f"stream, content root, {args.workers} cores",
+          lambda ps: extract_many(ps, "div", "mw-parser-output", workers=args.workers), pages, total_mb)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Model-routing benchmark: DanzarAI/model_router.py over two fake local models.
+
+The fakes take a fixed overhead plus a per-token cost, and the "large" one
+is --ratio times slower. A mix of chat, summary and follow-up calls like a
+teach session's is replayed twice: everything on the large model, then
+routed. Per-route latency is printed for both.
+
+    python scripts/bench_model_router.py --calls 60 --ratio 4
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "DanzarAI"))
+
+from model_router import ModelRouter, prompt_tokens
+
+def fake_model(name, per_token, overhead):
+    def respond(messages):
+        time.sleep(overhead + per_token * prompt_tokens(messages))
+        return f"[{name}] ok"
+    return respond
+
+def workload(n, seed=0):
+    rnd = random.Random(seed)
+    snippets = "I found these on the web:\n" + "\n".join(f"- result {i} " + "lorem " * 30
+                                                         for i in range(5))
+    calls = []
+    for _ in range(n):
+        kind = rnd.choice(["summary", "follow_up", "chat", "chat_short"])
+        if kind == "summary":
+            calls.append(("summary", [{"role": "system", "content": "Bullet points ONLY."},
+                                      {"role": "user", "content": snippets}]))
+        elif kind == "follow_up":
+            calls.append(("follow_up", [{"role": "system", "content": "Ask ONE follow-up question."},
+                                        {"role": "user", "content": "• a\n• b\n• c"}]))
+        elif kind == "chat":
+            calls.append(("chat", [{"role": "system", "content": "You are Danzar."},
+                                   {"role": "user", "content": "Explain how elemental resistances "
+                                    "stack with gear and buffs in the late game, with examples."}]))
+        else:
+            calls.append(("chat", [{"role": "system", "content": "You are Danzar."},
+                                   {"role": "user", "content": "why?"}]))
+    return calls
+
+def run(router, calls):
+    t0 = time.perf_counter()
+    for task, msgs in calls:
+        router.respond(msgs, task)
+    return time.perf_counter() - t0
+
+def show(label, seconds, metrics):
+    print(f"{label}: {seconds:.1f}s total")
+    for name, r in metrics.items():
+        if isinstance(r, dict) and r.get("calls"):
+            print(f"  {name:>5}: {r['calls']:3d} calls, mean {r['mean_s'] * 1000:.0f}ms, "
+                  f"p95 {r['p95_s'] * 1000:.0f}ms")
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--calls", type=int, default=60)
+    p.add_argument("--ratio", type=float, default=4.0, help="how much slower the large model is")
+    p.add_argument("--per-token", type=float, default=0.0002, help="small model s/token")
+    p.add_argument("--overhead", type=float, default=0.01, help="small model s/call")
+    args = p.parse_args()
+
+    small = fake_model("small", args.per_token, args.overhead)
+    large = fake_model("large", args.per_token * args.ratio, args.overhead * args.ratio)
+    calls = workload(args.calls)
+
+    only_large = ModelRouter({"large": large})
+    routed     = ModelRouter({"small": small, "large": large})
+    t_large  = run(only_large, calls)
+    t_routed = run(routed, calls)
+    show("all on large", t_large, only_large.metrics())
+    show("routed", t_routed, routed.metrics())
+    print(f"speedup: {t_large / t_routed:.2f}x")
+
+if __name__ == "__main__":
+    main()
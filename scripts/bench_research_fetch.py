@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Check DanzarAI/page_fetch.iter_pages against a local HTTP stand-in.
+
+The server delays every page by --delay seconds and never answers one
+"hanging" URL. The script compares the old one-URL-at-a-time loop with the
+concurrent stage, including a simulated per-page embedding cost that
+overlaps with the remaining downloads, and reports each stage's time.
+
+    python scripts/bench_research_fetch.py --pages 5 --delay 1.0 --embed 0.3
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "DanzarAI"))
+
+import page_fetch
+from page_fetch import fetch_and_clean, iter_pages
+
+PAGE = ("<html><body><nav>menu</nav><article>"
+        + "<p>Research text about elemental mages and their spells.</p>" * 40
+        + "</article></body></html>").encode()
+
+def make_handler(delay: float, hang: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(hang if self.path.startswith("/hang") else delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--pages", type=int, default=5)
+    p.add_argument("--delay", type=float, default=1.0, help="server latency per page (s)")
+    p.add_argument("--embed", type=float, default=0.3, help="simulated embed time per page (s)")
+    p.add_argument("--deadline", type=float, default=3.0)
+    args = p.parse_args()
+
+    hang = args.deadline + 5
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.delay, hang))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/page/{i}" for i in range(args.pages)] + [f"{base}/hang"]
+    page_fetch.FETCH_TIMEOUT = hang + 1  # make the hanging URL rely on the deadline
+
+    try:
+        # old: fetch one at a time, then embed everything
+        t0 = time.perf_counter()
+        texts = [fetch_and_clean(u, timeout=args.deadline) for u in urls[:-1]]
+        t_fetch = time.perf_counter() - t0
+        time.sleep(args.embed * len(texts))
+        seq_total = time.perf_counter() - t0
+        print(f"sequential: fetch {t_fetch:.2f}s + embed {args.embed * len(texts):.2f}s "
+              f"= {seq_total:.2f}s (hanging URL skipped)")
+
+        # new: concurrent with a deadline, embedding as pages arrive
+        t0 = time.perf_counter()
+        got, embed_t, first = [], 0.0, None
+        for url, text in iter_pages(urls, deadline=args.deadline, timeout=hang + 1):
+            first = first or time.perf_counter() - t0
+            te = time.perf_counter()
+            time.sleep(args.embed)
+            embed_t += time.perf_counter() - te
+            got.append((url, text))
+        conc_total = time.perf_counter() - t0
+        print(f"concurrent: first page after {first:.2f}s, embed {embed_t:.2f}s, "
+              f"total {conc_total:.2f}s, {len(got)}/{len(urls)} pages")
+    finally:
+        server.shutdown()
+
+    assert len(got) == args.pages, "every non-hanging page should arrive"
+    assert all("elemental mages" in t and "menu" not in t for _, t in got)
+    assert conc_total < args.deadline + args.embed * args.pages + 0.5, "deadline not honoured"
+    print(f"✅ speedup {seq_total / conc_total:.1f}x")
+
+if __name__ == "__main__":
+    main()
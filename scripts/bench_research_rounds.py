@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Rounds-per-minute benchmark: sequential vs pipelined research_session.
+
+Runs DanzarAI/research.py's real round loop, indexing into a real
+RAGStore, for a fixed time budget. The LLM, web search and embedder are
+replaced by stand-ins with configurable latency. The LLM stand-in serves
+--llm-slots requests at a time, like LM Studio with one loaded model.
+
+    python scripts/bench_research_rounds.py --seconds 60 --llm 2.0 --search 1.5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "DanzarAI"))
+
+import numpy as np
+import research
+from rag_store import RAGStore
+
+class NullChannel:
+    async def send(self, content):
+        pass
+
+class SlowEmbedder:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def get_sentence_embedding_dimension(self):
+        return 8
+
+    def encode(self, texts, convert_to_numpy=True):
+        time.sleep(self.delay)
+        return np.random.rand(len(texts), 8).astype("float32")
+
+def install_stand_ins(args):
+    slots = asyncio.Semaphore(args.llm_slots)
+    counter = {"q": 0, "searches": 0}
+
+    async def llm_respond(messages, model=None, task="chat"):
+        async with slots:
+            await asyncio.sleep(args.llm)
+        if "research next" in messages[-1]["content"]:
+            counter["q"] += 1
+            return f"What about sub-question {counter['q']}?"
+        return "• a\n• b\n• c"
+
+    async def web_search(query):
+        counter["searches"] += 1
+        await asyncio.sleep(args.search)
+        return f"I found these on the web:\n- result for {query}"
+
+    async def run_blocking(fn, *a, **kw):
+        return fn(*a, **kw)
+
+    research.llm_respond = llm_respond
+    research.web_search = web_search
+    research.run_blocking = run_blocking
+    return counter
+
+async def run(pipelined, args):
+    counter = install_stand_ins(args)
+    store = RAGStore(SlowEmbedder(args.embed), dedup_threshold=None)  # count every entry
+    store.start()
+    state = SimpleNamespace(rag_store=store, settings={"personality": "You are Danzar."},
+                            save_rag=store.flush)
+    stats = await research.research_session("elemental mages", args.seconds / 60, NullChannel(),
+                                            pipelined=pipelined, state=state)
+    store.close()
+    stats["searches"] = counter["searches"]
+    stats["indexed"] = len(store)
+    assert len(store) == len(store.snapshot()) == 3 * stats["rounds"]
+    return stats
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--seconds", type=float, default=30)
+    p.add_argument("--llm", type=float, default=2.0, help="seconds per LLM call")
+    p.add_argument("--search", type=float, default=1.5, help="seconds per web search")
+    p.add_argument("--embed", type=float, default=0.2, help="seconds per embedder batch")
+    p.add_argument("--llm-slots", type=int, default=1, help="concurrent LLM requests served")
+    args = p.parse_args()
+
+    results = {name: asyncio.run(run(flag, args))
+               for name, flag in (("sequential", False), ("pipelined", True))}
+    for name, st in results.items():
+        print(f"{name:>10}: {st['rounds']} rounds in {args.seconds:.0f}s budget → "
+              f"{st['rounds_per_min']:.2f} rounds/min, {st['searches']} searches, "
+              f"{st['prefetch_hits']} prefetch hits, {st['indexed']} entries indexed")
+    base = results["sequential"]["rounds_per_min"]
+    if base:
+        print(f"speedup: {results['pipelined']['rounds_per_min'] / base:.2f}x")
+
+if __name__ == "__main__":
+    main()
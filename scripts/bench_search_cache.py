@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Search-layer benchmark: DanzarAI/web_search.py's SearchClient against a fake
+DuckDuckGo backend with configurable latency.
+
+Replays a research-style workload (follow-up questions that repeat or differ
+only in case/punctuation) with and without the cache, then knocks the
+backend over to show stale results being served.
+
+    python scripts/bench_search_cache.py --latency 0.5 --rate 2
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "DanzarAI"))
+
+from web_search import SearchClient
+
+TOPICS = ["elemental mages", "fire resistance gear", "ice nova builds",
+          "lightning staff drops", "mana regeneration", "endgame bosses"]
+
+class FakeBackend:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls   = 0
+        self.down    = False
+
+    def text(self, query, max_results):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.down:
+            raise RuntimeError("202 Ratelimit")
+        return [{"title": f"{query} #{i}", "href": f"https://example.com/{i}",
+                 "body": f"result {i} for {query}"} for i in range(max_results)]
+
+def workload(n, seed=0):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        q = rnd.choice(TOPICS)
+        out.append(rnd.choice([q, q.title(), q + "?", "  " + q.upper() + " "]))
+    return out
+
+def run(queries, args, ttl):
+    backend = FakeBackend(args.latency)
+    client  = SearchClient(backend, ttl=ttl, rate=args.rate, burst=args.burst)
+    t0 = time.perf_counter()
+    for i in range(0, len(queries), args.batch):
+        client.search_many(queries[i:i + args.batch])
+    return time.perf_counter() - t0, backend, client
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--queries", type=int, default=60)
+    p.add_argument("--batch", type=int, default=3, help="queries per search_many call")
+    p.add_argument("--latency", type=float, default=0.3, help="seconds per backend call")
+    p.add_argument("--rate", type=float, default=2.0, help="backend calls per second")
+    p.add_argument("--burst", type=int, default=3)
+    args = p.parse_args()
+    queries = workload(args.queries)
+
+    base_t, base_b, _ = run(queries, args, ttl=0)
+    t, backend, client = run(queries, args, ttl=600)
+    print(f"  no cache: {len(queries)} queries, {base_b.calls} backend calls, {base_t:.1f}s")
+    print(f"    cached: {len(queries)} queries, {backend.calls} backend calls, {t:.1f}s "
+          f"({client.hit_rate:.0%} hit rate) → {base_t / t:.1f}x faster")
+
+    # upstream failure: expired entries are still served within stale_ttl
+    client.ttl = 0
+    backend.down = True
+    served = sum(bool(client.results(q)) for q in TOPICS)
+    print(f"backend down: {served}/{len(TOPICS)} queries answered from stale cache "
+          f"({client.stats['errors']} upstream errors)")
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,30 @@
 # tts.py
 
-from TTS.api import TTS
 from pydub import AudioSegment
 import winsound
 import os
+import threading
 
-# initialize once
-tts = TTS(model_name="tts_models/en/vctk/vits", progress_bar=False, gpu=False)
+# initialize once, on first use (or from danzar.py's startup warm-up)
+tts   = None
+_lock = threading.Lock()
+
+def load():
+    """
+    Load the VITS voice; importing TTS and building the model takes seconds.
+    """
+    global tts
+    with _lock:
+        if tts is None:
+            from TTS.api import TTS
+            tts = TTS(model_name="tts_models/en/vctk/vits", progress_bar=False, gpu=False)
+    return tts
 
 def make_wav(text: str, filename: str = "ai_response.wav") -> str:
     """
     Synthesize `text` to a WAV file on disk and return its filename.
     """
-    tts.tts_to_file(text=text, speaker="p231", file_path=filename)
+    load().tts_to_file(text=text, speaker="p231", file_path=filename)
     return filename
 
 def play_wav(path: str):
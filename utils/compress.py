@@ -0,0 +1,102 @@
+import re
+import numpy as np
+
+# Rough tokens-per-char ratio for English wiki text on Gemma/Llama tokenizers.
+CHARS_PER_TOKEN = 4
+
+_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+def split_sentences(text: str, min_chars: int = 12) -> list[str]:
+    """Split on sentence punctuation and line breaks, dropping tiny fragments."""
+    sents = [s.strip() for s in _SENT_SPLIT.split(text)]
+    return [s for s in sents if len(s) >= min_chars]
+
+def _normalize(vecs: np.ndarray) -> np.ndarray:
+    vecs = np.asarray(vecs, dtype="float32")
+    if vecs.ndim == 1:
+        vecs = vecs.reshape(1, -1)
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs / np.maximum(norms, 1e-12)
+
+def mmr_order(query_vec: np.ndarray, vecs: np.ndarray, lam: float = 0.7,
+              dup_threshold: float = 1.0) -> list[int]:
+    """
+    Maximal Marginal Relevance ordering of `vecs` (already L2-normalized).
+    Items whose similarity to something already picked is >= dup_threshold
+    are dropped entirely as redundant.
+    """
+    rel = vecs @ query_vec
+    sims = vecs @ vecs.T
+    n = len(vecs)
+    # running max similarity of each item to the picked set
+    red = np.full(n, -1.0, dtype="float32")
+    open_ = np.ones(n, dtype=bool)
+    picked = []
+    while open_.any():
+        scores = lam * rel - (1 - lam) * np.maximum(red, 0.0)
+        scores[~open_] = -np.inf
+        idx = int(np.argmax(scores))
+        open_[idx] = False
+        if picked and red[idx] >= dup_threshold:
+            continue
+        picked.append(idx)
+        red = np.maximum(red, sims[:, idx])
+    return picked
+
+def compress_context(query: str, chunks: list[str], embed_fn, token_budget: int = 768,
+                     lam: float = 0.7, chunk_dup_threshold: float = 0.92,
+                     sent_dup_threshold: float = 0.95) -> list[tuple[int, str]]:
+    """
+    Shrink retrieved `chunks` to the sentences most relevant to `query`.
+
+    1) drop near-duplicate chunks (MMR over chunk embeddings)
+    2) rank every sentence of the survivors by MMR against the query
+    3) keep sentences in rank order until `token_budget` is spent
+    4) reassemble each chunk from its kept sentences, in original order
+
+    `embed_fn(list[str]) -> array[n, dim]`. Returns [(chunk_index, text), …]
+    for chunks that still have content, ordered by their best sentence rank.
+    """
+    if not chunks:
+        return []
+
+    vecs = _normalize(embed_fn([query] + list(chunks)))
+    q_vec, c_vecs = vecs[0], vecs[1:]
+    kept_chunks = mmr_order(q_vec, c_vecs, lam, chunk_dup_threshold)
+
+    sents, owner = [], []
+    for ci in kept_chunks:
+        for s in split_sentences(chunks[ci]) or [chunks[ci].strip()]:
+            sents.append(s)
+            owner.append(ci)
+    if not sents:
+        return []
+
+    s_vecs = _normalize(embed_fn(sents))
+    ranked = mmr_order(q_vec, s_vecs, lam, sent_dup_threshold)
+
+    chosen, used = set(), 0
+    for si in ranked:
+        cost = estimate_tokens(sents[si])
+        if used + cost > token_budget:
+            if not chosen:
+                # always keep at least the single best sentence, truncated
+                sents[si] = sents[si][: token_budget * CHARS_PER_TOKEN]
+                chosen.add(si)
+            continue
+        chosen.add(si)
+        used += cost
+
+    first_rank = {}
+    for rank, si in enumerate(ranked):
+        if si in chosen:
+            first_rank.setdefault(owner[si], rank)
+
+    out = []
+    for ci in sorted(first_rank, key=first_rank.get):
+        text = " ".join(sents[si] for si in range(len(sents)) if si in chosen and owner[si] == ci)
+        out.append((ci, text))
+    return out
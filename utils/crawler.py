@@ -0,0 +1,200 @@
+"""
+Concurrent wiki crawler built on utils/fetch.py.
+
+- bounded concurrency (one shared aiohttp connection pool)
+- per-host token-bucket rate limits
+- conditional GETs (If-None-Match / If-Modified-Since) against an on-disk
+  response cache, so unchanged pages cost a 304 instead of a full download
+- throughput stats for every crawl
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from utils.fetch import page_url, extract_main_many
+
+logger = logging.getLogger(__name__)
+
+# ─── CONFIG ────────────────────────────────────────────────────────────────────
+CACHE_DIR      = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".http_cache")
+CONCURRENCY    = 8      # in-flight requests overall
+HOST_RATE      = 4.0    # requests per second per host
+HOST_BURST     = 4      # bucket size per host
+TIMEOUT        = 15     # seconds per request
+USER_AGENT     = "DanzarAI-crawler/1.0"
+# ────────────────────────────────────────────────────────────────────────────────
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens/sec, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate     = rate
+        self.capacity = burst
+        self.tokens   = float(burst)
+        self.updated  = time.monotonic()
+        self._lock    = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ResponseCache:
+    """One `<sha1>.json` (validators) + `<sha1>.body` (raw HTML) per URL."""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.dir, key + ".json"), os.path.join(self.dir, key + ".body")
+
+    def get(self, url: str):
+        meta_p, body_p = self._paths(url)
+        try:
+            with open(meta_p, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_p, "r", encoding="utf-8") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def put(self, url: str, headers, body: str):
+        meta_p, body_p = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        with open(body_p, "w", encoding="utf-8") as f:
+            f.write(body)
+        with open(meta_p, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int              # HTTP status, 0 on network error
+    html: str | None = None
+    from_cache: bool = False
+
+
+@dataclass
+class CrawlStats:
+    pages: int = 0
+    downloaded: int = 0      # 200s
+    not_modified: int = 0    # 304s served from cache
+    errors: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+    per_host: dict = field(default_factory=dict)
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    def report(self) -> str:
+        mb = self.bytes / 1e6
+        return (
+            f"{self.pages} pages in {self.elapsed:.2f}s "
+            f"({self.pages_per_sec:.1f} pages/s, {mb / self.elapsed if self.elapsed else 0:.2f} MB/s) — "
+            f"{self.downloaded} downloaded, {self.not_modified} not modified, {self.errors} errors"
+        )
+
+
+class Crawler:
+    def __init__(self, cache_dir: str = CACHE_DIR, concurrency: int = CONCURRENCY,
+                 host_rate: float = HOST_RATE, host_burst: int = HOST_BURST,
+                 timeout: float = TIMEOUT):
+        self.cache       = ResponseCache(cache_dir)
+        self.concurrency = concurrency
+        self.host_rate   = host_rate
+        self.host_burst  = host_burst
+        self.timeout     = timeout
+        self._buckets    = {}
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return self._buckets[host]
+
+    async def _fetch(self, session, sem, url: str, stats: CrawlStats) -> FetchResult:
+        import aiohttp
+
+        meta, cached = self.cache.get(url)
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        async with sem:
+            await self._bucket(url).acquire()
+            try:
+                async with session.get(url, headers=headers) as resp:
+                    if resp.status == 304 and cached is not None:
+                        stats.not_modified += 1
+                        return FetchResult(url, 304, cached, from_cache=True)
+                    body = await resp.read()
+                    stats.bytes += len(body)
+                    if resp.status != 200:
+                        stats.errors += 1
+                        return FetchResult(url, resp.status)
+                    html = body.decode(resp.charset or "utf-8", errors="replace")
+                    self.cache.put(url, resp.headers, html)
+                    stats.downloaded += 1
+                    return FetchResult(url, 200, html)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"fetch {url} failed: {e!r}")
+                stats.errors += 1
+                return FetchResult(url, 0)
+
+    async def crawl(self, urls: list[str]) -> tuple[list[FetchResult], CrawlStats]:
+        """Fetch every URL; results come back in input order."""
+        import aiohttp
+
+        stats = CrawlStats(pages=len(urls))
+        sem   = asyncio.Semaphore(self.concurrency)
+        t0    = time.perf_counter()
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT},
+        ) as session:
+            results = await asyncio.gather(*(self._fetch(session, sem, u, stats) for u in urls))
+        stats.elapsed = time.perf_counter() - t0
+        for r in results:
+            host = urlsplit(r.url).netloc
+            stats.per_host[host] = stats.per_host.get(host, 0) + 1
+        logger.info(f"crawl: {stats.report()}")
+        return results, stats
+
+
+def crawl_pages(slugs: list[str], url_for=page_url, **kwargs) -> tuple[dict, CrawlStats]:
+    """
+    Sync entry point for scrapers: returns ({slug: main text or None}, stats).
+    `url_for` maps a slug to a URL (defaults to the wiki's BASE_URL).
+    """
+    crawler = Crawler(**kwargs)
+    results, stats = asyncio.run(crawler.crawl([url_for(s) for s in slugs]))
+    texts = iter(extract_main_many([r.html for r in results if r.html]))
+    pages = {s: (next(texts) if r.html else None) for s, r in zip(slugs, results)}
+    return pages, stats
@@ -1,12 +1,24 @@
 import requests
-from bs4 import BeautifulSoup
+
+from DanzarAI.html_extract import extract_text, extract_many
 
 BASE_URL = "https://pathofexile2.wiki.fextralife.com/{}"
+TIMEOUT  = 15  # seconds
+
+_session = requests.Session()
+
+def page_url(slug: str) -> str:
+    return BASE_URL.format(slug)
+
+def extract_main(html: str) -> str:
+    # "\n\n" between blocks so utils/chunk.py still splits on paragraphs
+    return extract_text(html, "div", "mw-parser-output", paragraph_sep="\n\n")
+
+def extract_main_many(pages: list[str]) -> list[str]:
+    return extract_many(pages, "div", "mw-parser-output", paragraph_sep="\n\n")
 
 def fetch_page(slug: str) -> str|None:
-    resp = requests.get(BASE_URL.format(slug))
+    resp = _session.get(page_url(slug), timeout=TIMEOUT)
     if resp.status_code != 200:
         return None
-    soup = BeautifulSoup(resp.text, "lxml")
-    main = soup.find("div", class_="mw-parser-output") or soup.body
-    return main.get_text(separator="\n")
+    return extract_main(resp.text)